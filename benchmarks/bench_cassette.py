@@ -0,0 +1,102 @@
+"""Record scripted conversations against the fake LLM, then replay them through Flask without the network.
+
+Zero-latency replay leaves only graph, routing and Flask/serialization time,
+so the per-turn numbers are the app's own overhead and repeat run to run.
+
+    python -m benchmarks.bench_cassette --conversations 50 --latency 0.2 --jitter 0.1
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.fake_llm_server import FakeLLMBehavior, start_fake_llm_server  # noqa: E402
+from benchmarks.load_test import conversation_script  # noqa: E402
+
+behavior = FakeLLMBehavior()
+server = start_fake_llm_server(behavior)
+os.environ["GROQ_API_BASE"] = f"http://127.0.0.1:{server.server_address[1]}"
+os.environ.setdefault("GROQ_API_KEY", "fake")
+os.environ["CHATBOT_WARM_UP"] = "false"
+
+import chatbot.provider as provider  # noqa: E402
+from chatbot.chatbot_api import InsuranceChatbotAPI  # noqa: E402
+from chatbot.metrics import METRICS  # noqa: E402
+from config import Config  # noqa: E402
+from main import app  # noqa: E402
+
+
+def use_chatbot(mode, path, latency_scale=1.0):
+    Config.LLM_CASSETTE_MODE = mode
+    Config.LLM_CASSETTE_PATH = path
+    Config.LLM_CASSETTE_LATENCY_SCALE = latency_scale
+    provider._chatbot = InsuranceChatbotAPI()
+    return provider._chatbot
+
+
+def run_conversations(client, conversations, seed):
+    """Per-turn wall times and every reply, in order"""
+    rng = random.Random(seed)
+    turn_seconds, replies = [], []
+    for _ in range(conversations):
+        conversation_id = client.post("/api/chat/start").get_json()["conversation_id"]
+        for _step, message in conversation_script(rng):
+            started = time.perf_counter()
+            body = client.post(f"/api/chat/{conversation_id}", json={"message": message}).get_json()
+            turn_seconds.append(time.perf_counter() - started)
+            replies.append(body.get("response"))
+    return sorted(turn_seconds), replies
+
+
+def summary(turn_seconds):
+    p = lambda q: turn_seconds[min(len(turn_seconds) - 1, int(len(turn_seconds) * q))] * 1000  # noqa: E731
+    return f"p50 {p(0.5):8.2f}ms  p95 {p(0.95):8.2f}ms  total {sum(turn_seconds):6.2f}s"
+
+
+def node_overhead():
+    for labels, histogram in sorted(METRICS.series("chatbot_node_duration_seconds").items()):
+        print(f"    {dict(labels)['node']:30s} p50 {histogram.percentile(50) * 1000:8.3f}ms  calls {histogram.count}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--conversations", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--jitter", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "cassette.jsonl")
+    client = app.test_client()
+
+    behavior.__init__(latency=args.latency, jitter=args.jitter)
+    use_chatbot("record", path)
+    recorded, live_replies = run_conversations(client, args.conversations, args.seed)
+    print(f"record (live)       {summary(recorded)}  upstream requests {behavior.requests}")
+
+    requests_before = behavior.requests
+    chatbot = use_chatbot("replay", path, 1.0)
+    at_recorded, _ = run_conversations(client, args.conversations, args.seed)
+    print(f"replay (recorded)   {summary(at_recorded)}")
+
+    runs = []
+    for run in range(2):
+        chatbot = use_chatbot("replay", path, 0.0)
+        METRICS.reset("chatbot_node_duration_seconds")
+        turn_seconds, replies = run_conversations(client, args.conversations, args.seed)
+        runs.append(replies)
+        print(f"replay (zero) #{run + 1}   {summary(turn_seconds)}")
+    print("  graph nodes at zero latency:")
+    node_overhead()
+    print(f"replies identical to the live run: {runs[0] == runs[1] == live_replies}; "
+          f"upstream requests during replay {behavior.requests - requests_before}; "
+          f"cassette misses {chatbot.cassette.misses}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Per-request cost of /types and /quote bodies: jsonify on every call vs prepared bytes per catalog version.
+
+    python -m benchmarks.bench_catalog_responses --requests 20000
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("CHATBOT_WARM_UP", "false")
+
+from flask import jsonify  # noqa: E402
+
+from chatbot.catalog import current_catalog  # noqa: E402
+from main import app  # noqa: E402
+from routes.catalog_responses import responses_for  # noqa: E402
+
+
+def quote_payload(catalog, insurance_type, age):
+    entries = catalog.index.lookup(insurance_type, age)
+    return {
+        "age": age,
+        "insurance_type": insurance_type,
+        "age_bracket": entries[0].age_bracket,
+        "quote": {entry.plan_tier: entry.plan for entry in entries},
+        "catalog_version": catalog.version,
+        "status": "success",
+    }
+
+
+def per_request_us(fn, requests):
+    started = time.perf_counter()
+    for _ in range(requests):
+        fn()
+    return (time.perf_counter() - started) / requests * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    catalog = current_catalog()
+    prepared = responses_for(catalog)
+    cases = {
+        "/types": lambda: {
+            "insurance_types": catalog.index.insurance_types(),
+            "age_brackets": {t: catalog.index.brackets(t) for t in catalog.index.insurance_types()},
+            "catalog_version": catalog.version,
+            "status": "success",
+        },
+        "/quote": lambda: quote_payload(catalog, "health", 30),
+    }
+    for route, build in cases.items():
+        etag = None
+        for label, headers in (("identity", {}), ("gzip", {"Accept-Encoding": "gzip"}), ("304", None)):
+            if headers is None:
+                headers = {"If-None-Match": f'"{etag}"'}
+            with app.test_request_context(route, headers=headers):
+                jsonify_us = per_request_us(lambda: jsonify(build()), args.requests)
+                response = prepared.get(route, build).respond(catalog.version)
+                etag = response.get_etag()[0]
+                prepared_us = per_request_us(lambda: prepared.get(route, build).respond(catalog.version), args.requests)
+            print(f"{route:7s} {label:9s} jsonify {jsonify_us:7.1f} us   prepared {prepared_us:7.1f} us   "
+                  f"status {response.status_code}  {len(response.get_data())} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Conversation snapshot file: restore time for a large store, incremental pass cost and first-use decode.
+
+    python -m benchmarks.bench_conversation_snapshot --conversations 1000000 --changed 0.01
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.bench_state_memory import make_state  # noqa: E402
+from chatbot.conversation_snapshot import MAGIC, _PUT, ConversationSnapshotter, _encode  # noqa: E402
+from chatbot.conversation_store import InMemoryConversationStore, serialize_state  # noqa: E402
+
+
+def write_snapshot_file(path, conversations, turns):
+    """Write the file the snapshotter would produce, without holding every state in memory first"""
+    now = time.time()
+    with open(path, "wb") as handle:
+        handle.write(MAGIC)
+        for i in range(conversations):
+            handle.write(_encode(_PUT, f"conversation-{i}", now - 600, now - i * 1e-3,
+                                 serialize_state(make_state(i, turns))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--conversations", type=int, default=200000)
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--changed", type=float, default=0.01, help="fraction of conversations changed per pass")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "conversations.snap")
+    started = time.perf_counter()
+    write_snapshot_file(path, args.conversations, args.turns)
+    print(f"wrote {args.conversations} conversations, {os.path.getsize(path) / 2**20:.1f} MiB "
+          f"in {time.perf_counter() - started:.1f}s")
+
+    store = InMemoryConversationStore(max_size=args.conversations * 2, ttl_seconds=24 * 3600)
+    snapshotter = ConversationSnapshotter(store, path)
+    restored = snapshotter.restore()
+    print(f"restore   {restored} conversations in {snapshotter.restore_seconds:.2f}s "
+          f"({restored / snapshotter.restore_seconds:,.0f}/s)")
+
+    started = time.perf_counter()
+    first = store.get("conversation-0")
+    first_ms = (time.perf_counter() - started) * 1000
+    started = time.perf_counter()
+    store.get("conversation-0")
+    print(f"first get after restore (decodes) {first_ms:.3f} ms, second get {(time.perf_counter() - started) * 1000:.3f} ms, "
+          f"{len(first['state']['messages'])} messages")
+
+    changed = max(1, int(args.conversations * args.changed))
+    for i in range(changed):
+        store.touch(f"conversation-{i * (args.conversations // changed)}")
+    size_before = os.path.getsize(path)
+    started = time.perf_counter()
+    written = snapshotter.snapshot()
+    print(f"incremental pass: {written} records, {(os.path.getsize(path) - size_before) / 2**20:.1f} MiB "
+          f"in {(time.perf_counter() - started) * 1000:.0f} ms")
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
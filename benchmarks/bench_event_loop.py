@@ -0,0 +1,121 @@
+"""Compare a fresh event loop per request against the shared per-worker loop.
+
+Runs a local keep-alive HTTP server that stands in for the LLM API and hammers
+it from a thread pool (the way threaded Flask calls `async_route`), reporting
+p50/p99 latency for both modes.
+
+    python -m benchmarks.bench_event_loop --requests 2000 --concurrency 32
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from chatbot.utils import run_async  # noqa: E402
+
+BODY = b'{"choices": [{"message": {"role": "assistant", "content": "ok"}}]}'
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    latency = 0.01
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(self.latency)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def new_loop_per_request(url):
+    """The original `async_route` wrapper: one loop (and one client) per request"""
+    async def call():
+        async with httpx.AsyncClient() as client:
+            response = await client.post(url, json={"messages": []})
+            return response.json()
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        return loop.run_until_complete(call())
+    finally:
+        loop.close()
+
+
+def shared_loop(url, client):
+    """Shared per-worker loop with a pooled client"""
+    async def call():
+        response = await client.post(url, json={"messages": []})
+        return response.json()
+
+    return run_async(call())
+
+
+def run(name, fn, total, concurrency):
+    latencies = []
+    lock = threading.Lock()
+
+    def one(_):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(total)))
+    wall = time.perf_counter() - started
+    print(f"{name:<22} p50={percentile(latencies, 50) * 1000:7.2f}ms "
+          f"p99={percentile(latencies, 99) * 1000:7.2f}ms "
+          f"mean={statistics.mean(latencies) * 1000:7.2f}ms "
+          f"throughput={total / wall:8.1f} req/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency-ms", type=float, default=10.0)
+    args = parser.parse_args()
+
+    FakeLLMHandler.latency = args.latency_ms / 1000
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeLLMHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/v1/chat/completions"
+
+    client = run_async(_make_client())
+    print(f"{args.requests} requests, concurrency {args.concurrency}, upstream latency {args.latency_ms}ms")
+    run("new loop per request", lambda: new_loop_per_request(url), args.requests, args.concurrency)
+    run("shared worker loop", lambda: shared_loop(url, client), args.requests, args.concurrency)
+    server.shutdown()
+
+
+async def _make_client():
+    return httpx.AsyncClient(limits=httpx.Limits(max_keepalive_connections=64))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Train the intent classifier on a synthetic traffic log and print its evaluation report.
+
+Real deployments train on the INTENT_LOG_PATH log; this generates one with
+the shape the LLM produces (message, intent, fields, extraction latency).
+
+    python -m benchmarks.bench_intent_classifier --records 20000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from chatbot.intent_classifier import print_report, train  # noqa: E402
+
+TYPES = {"health": ["health", "medical", "mediclaim"], "life": ["life", "term life"], "auto": ["car", "auto", "bike"]}
+WHO = {"self": ["me", "myself"], "spouse": ["my wife", "my husband", "my partner"], "child": ["my son", "my daughter"],
+       "parent": ["my mother", "my father", "my parents"]}
+
+GREETINGS = ["hi", "hello", "hey there", "good morning", "hiya", "hello, anyone here?", "hey, how are you doing",
+             "good evening team", "namaste", "hi there, hope you're well"]
+SUGGESTIONS = ["which plan would you recommend", "what do you suggest for {who}", "can you compare the {type} plans",
+               "which one is the best value", "is gold better than silver for {who}",
+               "what would you pick in my place", "help me decide between these", "any advice on {type} cover",
+               "which of these gives more coverage for the money", "should I go for the premium tier"]
+INFO = ["I need {type} insurance", "looking for {type} cover for {who}", "I'm {age} and want {type} insurance",
+        "{type} insurance for {who}, {age} years old", "what {type} plans do you have", "get me a {type} quote",
+        "how much is {type} insurance for {who}", "do you sell {type} policies",
+        "{who} needs {type} insurance, age {age}", "price of {type} cover at {age}"]
+OTHER = ["tell me a joke", "what's the weather like", "who won the match yesterday", "can you write me a poem",
+         "what's your name", "how do I reset my password", "translate this to french", "what time is it",
+         "recommend a good movie", "are you a robot"]
+
+
+def fill(template, rng):
+    insurance_type = rng.choice(list(TYPES))
+    who = rng.choice(list(WHO))
+    age = rng.randint(18, 80)
+    message = template.format(type=rng.choice(TYPES[insurance_type]), who=rng.choice(WHO[who]), age=age)
+    fields = {
+        "age": age if "{age}" in template else None,
+        "insurance_type": insurance_type if "{type}" in template else None,
+        "insured_for": who if "{who}" in template else ("self" if "{age}" in template and "I'm" in template else None),
+    }
+    return message, fields
+
+
+def synthetic_log(path, records, seed=0):
+    rng = random.Random(seed)
+    classes = [("greet", GREETINGS, 0.2), ("ask_suggestion", SUGGESTIONS, 0.2), ("get_insurance_info", INFO, 0.45),
+               ("other", OTHER, 0.15)]
+    with open(path, "w", encoding="utf-8") as handle:
+        for _ in range(records):
+            intent, templates, _ = rng.choices(classes, weights=[weight for *_, weight in classes])[0]
+            message, fields = fill(rng.choice(templates), rng)
+            if rng.random() < 0.3:
+                message = message.capitalize() + rng.choice(["", "?", "!", " please", " thanks"])
+            if rng.random() < 0.03:
+                # The LLM is not perfectly consistent either
+                intent = rng.choice(classes)[0]
+            handle.write(json.dumps(dict(fields, message=message, intent=intent,
+                                         llm_seconds=round(rng.lognormvariate(-1.0, 0.4), 4))) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=20000)
+    parser.add_argument("--min-confidence", type=float, default=0.9)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    log_path = os.path.join(directory, "intents.jsonl")
+    synthetic_log(log_path, args.records)
+    report = train([log_path], os.path.join(directory, "intent.npz"), min_confidence=args.min_confidence)
+    print(f"trained on {report['train_records']} records in {report['train_seconds']:.1f}s")
+    print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""Exercise the LLM gateway against the local fake LLM server: queueing, priorities, retries, timeouts and the breaker.
+
+    python -m benchmarks.bench_llm_gateway
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.fake_llm_server import FakeLLMBehavior, start_fake_llm_server  # noqa: E402
+
+behavior = FakeLLMBehavior()
+server = start_fake_llm_server(behavior)
+os.environ["GROQ_API_BASE"] = f"http://127.0.0.1:{server.server_address[1]}"
+os.environ["LLM_CACHE_ENABLED"] = "false"
+
+from langchain_core.messages import HumanMessage, SystemMessage  # noqa: E402
+from langchain_groq import ChatGroq  # noqa: E402
+
+from chatbot.llm_gateway import CircuitBreaker, LLMGateway, current_conversation, current_node  # noqa: E402
+
+PROMPT = [SystemMessage(content="You are a helpful insurance assistant."), HumanMessage(content="Tell me about health plans")]
+
+
+def make_gateway(**overrides):
+    options = dict(max_concurrency=8, max_queue=100, default_timeout=5.0, max_retries=2, retry_base_delay=0.05,
+                   breaker=CircuitBreaker(failure_threshold=5, reset_seconds=1.0))
+    options.update(overrides)
+    llm = ChatGroq(api_key="fake", model="fake", temperature=0, max_retries=0)
+    return LLMGateway(llm, **options)
+
+
+async def timed_call(gateway, node=None, conversation=None):
+    token = current_node.set(node)
+    conversation_token = current_conversation.set(conversation)
+    started = time.perf_counter()
+    try:
+        await gateway.ainvoke(PROMPT)
+        outcome = "ok"
+    except Exception as e:
+        outcome = type(e).__name__
+    finally:
+        current_conversation.reset(conversation_token)
+        current_node.reset(token)
+    return outcome, time.perf_counter() - started
+
+
+async def burst(gateway, calls, node=None):
+    results = await asyncio.gather(*(timed_call(gateway, node) for _ in range(calls)))
+    outcomes = {}
+    for outcome, _ in results:
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+    latencies = sorted(seconds for _, seconds in results)
+    return outcomes, latencies
+
+
+def report(name, outcomes, latencies, gateway):
+    p50 = latencies[len(latencies) // 2] * 1000
+    worst = latencies[-1] * 1000
+    stats = gateway.stats()
+    print(f"{name:12s} {str(outcomes):48s} p50 {p50:7.1f}ms  max {worst:7.1f}ms  "
+          f"retries {stats['retries']:3d}  timeouts {stats['timeouts']:3d}  circuit {stats['circuit']}")
+
+
+async def scenarios(calls):
+    behavior.__init__(latency=0.1)
+    gateway = make_gateway()
+    report("healthy", *await burst(gateway, calls), gateway)
+
+    behavior.__init__(latency=0.2)
+    gateway = make_gateway(max_concurrency=4, max_queue=16)
+    report("overload", *await burst(gateway, calls), gateway)
+
+    behavior.__init__(latency=0.05, error_rate=0.3, seed=1)
+    gateway = make_gateway(max_retries=0, breaker=CircuitBreaker(failure_threshold=10 ** 6, reset_seconds=1))
+    report("flaky", *await burst(gateway, calls), gateway)
+    behavior.__init__(latency=0.05, error_rate=0.3, seed=1)
+    gateway = make_gateway(breaker=CircuitBreaker(failure_threshold=10 ** 6, reset_seconds=1))
+    report("flaky+retry", *await burst(gateway, calls), gateway)
+
+    behavior.__init__(hang_rate=1.0, hang_seconds=3)
+    gateway = make_gateway(node_timeouts={"extract_info_with_llm": 0.5})
+    report("hang", *await burst(gateway, 8, node="extract_info_with_llm"), gateway)
+
+    behavior.__init__(latency=0.05, error_rate=1.0)
+    gateway = make_gateway(max_retries=0)
+    report("outage", *await burst(gateway, calls), gateway)
+    outcomes, latencies = await burst(gateway, calls)
+    report("outage+open", outcomes, latencies, gateway)
+
+    behavior.__init__(latency=0.05)
+    await asyncio.sleep(1.1)
+    report("recovered", *await burst(gateway, 1), gateway)
+    report("closed", *await burst(gateway, calls), gateway)
+
+
+async def priority_scenarios(calls):
+    """Short follow-ups queued behind a burst of long generations, and one chatty conversation among quiet ones"""
+    priorities = {"ask_followup_with_llm": 0, "generate_suggestion_with_llm": 2}
+    for label, node_priorities in (("fifo", {}), ("priority", priorities)):
+        behavior.__init__(latency=0.05)
+        gateway = make_gateway(max_concurrency=4, max_queue=2 * calls, node_priorities=node_priorities,
+                               priority_step=5.0)
+        long_calls = [timed_call(gateway, "generate_suggestion_with_llm", f"c{i}") for i in range(calls)]
+        short_calls = [timed_call(gateway, "ask_followup_with_llm", f"f{i}") for i in range(calls // 10)]
+        results = await asyncio.gather(*long_calls, *short_calls)
+        short = sorted(seconds for _, seconds in results[calls:])
+        long = sorted(seconds for _, seconds in results[:calls])
+        print(f"{label:12s} follow-up p50 {short[len(short) // 2] * 1000:7.1f}ms max {short[-1] * 1000:7.1f}ms   "
+              f"suggestion p50 {long[len(long) // 2] * 1000:7.1f}ms max {long[-1] * 1000:7.1f}ms")
+
+    behavior.__init__(latency=0.05)
+    gateway = make_gateway(max_concurrency=2, priority_step=0.5)
+    chatty = [timed_call(gateway, None, "chatty") for _ in range(calls // 2)]
+    quiet = [timed_call(gateway, None, f"quiet{i}") for i in range(5)]
+    results = await asyncio.gather(*chatty, *quiet)
+    print(f"{'fairness':12s} quiet conversations max {max(s for _, s in results[calls // 2:]) * 1000:7.1f}ms   "
+          f"chatty conversation max {max(s for _, s in results[:calls // 2]) * 1000:7.1f}ms")
+
+    behavior.__init__(latency=0.2)
+    gateway = make_gateway(max_concurrency=4, max_queue=16)
+    pending = [asyncio.ensure_future(timed_call(gateway)) for _ in range(calls)]
+    await asyncio.sleep(0.01)
+    print(f"{'admission':12s} {gateway.waiting} waiting -> new turns get 429, Retry-After {gateway.retry_after()}s")
+    await asyncio.gather(*pending)
+
+
+def chatbot_fallback():
+    """With the circuit open, a chat turn returns the node's fallback text without waiting on the upstream"""
+    from chatbot.chatbot_api import InsuranceChatbotAPI
+    from chatbot.utils import run_async
+
+    behavior.__init__(latency=0.05, error_rate=1.0)
+    chatbot = InsuranceChatbotAPI(llm_api_key="fake")
+    chatbot.fast_extractor = None
+    for _ in range(chatbot.llm_gateway.breaker.failure_threshold):
+        run_async(chatbot.chat("tell me about something"))
+    started = time.perf_counter()
+    response, _ = run_async(chatbot.chat("tell me about something"))
+    print(f"chatbot with open circuit: {(time.perf_counter() - started) * 1000:.1f}ms -> {response[:60]!r}")
+    print(f"gateway stats: {chatbot.llm_gateway.stats()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(scenarios(args.calls))
+    asyncio.run(priority_scenarios(args.calls))
+    chatbot_fallback()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Multi-worker load test for the shared SQLite conversation backend.
+
+Spawns N worker processes that each load the Flask app against the same
+SQLite file and loop over /start, /<id> and /<id>/history, reading
+conversations created by other workers to prove state is shared. The LLM is
+replaced by an instant echo so the numbers reflect the store and Flask only.
+
+    python -m benchmarks.bench_multiworker --workers 1 2 4 --seconds 5
+"""
+import argparse
+import multiprocessing
+import os
+import queue
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+# Time a worker gets to import the app, on top of the measured run
+WORKER_STARTUP_SECONDS = 60
+
+
+def _load_app(db_path):
+    sys.path.insert(0, str(ROOT))
+    os.environ["CONVERSATION_BACKEND"] = "sqlite"
+    os.environ["CONVERSATION_DB_PATH"] = db_path
+    os.environ.setdefault("GROQ_API_KEY", "benchmark")
+    from main import app
+    from chatbot.provider import get_chatbot
+
+    async def echo_chat(user_input, state, conversation_id=None):
+        state["messages"].append({"role": "user", "content": user_input})
+        state["messages"].append({"role": "assistant", "content": f"echo: {user_input}"})
+        state["last_response"] = f"echo: {user_input}"
+        return state["last_response"], state
+
+    get_chatbot().chat = echo_chat
+    return app
+
+
+def worker(db_path, seconds, shared_ids, results):
+    sys.stdout = open(os.devnull, "w")  # keep worker output out of the report
+    client = _load_app(db_path).test_client()
+    ops = 0
+    cross_reads = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        conversation_id = client.post("/api/chat/start").get_json()["conversation_id"]
+        shared_ids.append(conversation_id)
+        assert client.post(f"/api/chat/{conversation_id}", json={"message": "hi"}).status_code == 200
+        history = client.get(f"/api/chat/{conversation_id}/history").get_json()
+        assert len(history["messages"]) == 2, "read-your-writes violated"
+        ops += 3
+        # Conversations started by any worker must be visible here
+        other_id = random.choice(shared_ids)
+        assert client.get(f"/api/chat/{other_id}/history").status_code == 200
+        cross_reads += 1
+        ops += 1
+    results.put((ops, cross_reads))
+
+
+def _collect(procs, results, deadline):
+    """One result per worker; fails fast when a worker dies (its traceback is on stderr) or the deadline passes"""
+    totals = []
+    while len(totals) < len(procs):
+        try:
+            totals.append(results.get(timeout=1.0))
+        except queue.Empty:
+            crashed = [proc.exitcode for proc in procs if proc.exitcode not in (None, 0)]
+            if crashed:
+                raise RuntimeError(f"{len(crashed)} of {len(procs)} workers crashed with exit codes {crashed}")
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"only {len(totals)} of {len(procs)} workers reported before the deadline")
+    return totals
+
+
+def run(worker_count, seconds):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "conversations.db")
+        _load_app(db_path)  # create the schema before workers race for it
+        ctx = multiprocessing.get_context("spawn")
+        manager = ctx.Manager()
+        shared_ids = manager.list()
+        results = ctx.Queue()
+        procs = [ctx.Process(target=worker, args=(db_path, seconds, shared_ids, results)) for _ in range(worker_count)]
+        for proc in procs:
+            proc.start()
+        try:
+            totals = _collect(procs, results, time.monotonic() + seconds + WORKER_STARTUP_SECONDS)
+        finally:
+            for proc in procs:
+                proc.join(timeout=5)
+                if proc.is_alive():
+                    proc.terminate()
+                    proc.join()
+            manager.shutdown()
+        failed = [proc.exitcode for proc in procs if proc.exitcode]
+        if failed:
+            raise RuntimeError(f"{len(failed)} of {len(procs)} workers exited with codes {failed}")
+    ops = sum(t[0] for t in totals)
+    cross = sum(t[1] for t in totals)
+    return ops / seconds, cross
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    print(f"cpu count: {os.cpu_count()}")
+    baseline = None
+    for count in args.workers:
+        throughput, cross = run(count, args.seconds)
+        baseline = baseline or throughput
+        print(f"workers={count:<3} {throughput:9.1f} req/s  speedup={throughput / baseline:5.2f}x  "
+              f"cross-worker reads={cross}")
+
+
+if __name__ == "__main__":
+    main()
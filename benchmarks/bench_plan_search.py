@@ -0,0 +1,83 @@
+"""Attribute search over a large synthetic catalog: prebuilt indexes vs scanning every plan.
+
+    python -m benchmarks.bench_plan_search --plans 100000 --queries 200
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from chatbot.catalog import CatalogSnapshot  # noqa: E402
+from chatbot.plan_search import parse_amount_range  # noqa: E402
+
+ADD_ONS = ("Dental cover", "Maternity cover", "Vision cover", "Critical illness", "Wellness package")
+
+
+def synthetic_catalog(plans, rng):
+    catalog = {}
+    for i in range(plans):
+        low = rng.randint(10, 400)
+        catalog.setdefault(("health", "auto", "life")[i % 3], {}).setdefault(f"Tier{i // 300}", {})[
+            f"{18 + i % 60}-{18 + i % 60 + rng.randint(0, 20)}"
+        ] = {
+            "premium": f"${low}-{low + rng.randint(10, 100)}/month",
+            "deductible": f"${rng.choice((0, 500, 1000, 1500))}",
+            "cashless": rng.random() < 0.5,
+            "add_ons": rng.sample(ADD_ONS, 2),
+        }
+    return catalog
+
+
+def scan(entries, premium_max, add_on):
+    """What answering the query without indexes costs: parse and test every plan, then sort"""
+    matches = []
+    for entry in entries:
+        plan = entry.plan
+        if entry.insurance_type != "health" or not plan.get("cashless") or add_on not in plan.get("add_ons", ()):
+            continue
+        premium = parse_amount_range(plan["premium"])
+        if premium and premium[0] <= premium_max:
+            matches.append((premium[0], entry))
+    matches.sort(key=lambda match: match[0])
+    return len(matches), [entry for _, entry in matches[:10]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--plans", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    catalog = synthetic_catalog(args.plans, rng)
+    started = time.perf_counter()
+    snapshot = CatalogSnapshot.build(catalog, "synthetic")
+    print(f"{snapshot.plan_count} plans, snapshot with indexes built in {time.perf_counter() - started:.2f}s")
+
+    queries = [(rng.choice((50, 100, 200)), rng.choice(ADD_ONS)) for _ in range(args.queries)]
+    entries = snapshot.index.entries()
+
+    started = time.perf_counter()
+    scanned = [scan(entries, premium_max, add_on) for premium_max, add_on in queries]
+    scan_ms = (time.perf_counter() - started) * 1000 / len(queries)
+
+    started = time.perf_counter()
+    indexed = [
+        snapshot.search.search({
+            "insurance_type": ["health"], "flags": {"cashless": True}, "add_ons": [add_on],
+            "premium_max": premium_max, "sort": "premium", "limit": 10,
+        })
+        for premium_max, add_on in queries
+    ]
+    index_ms = (time.perf_counter() - started) * 1000 / len(queries)
+
+    mismatches = sum(a[0] != b.total for a, b in zip(scanned, indexed))
+    print(f"scan   {scan_ms:8.3f} ms/query")
+    print(f"index  {index_ms:8.3f} ms/query  ({scan_ms / index_ms:.1f}x faster, {mismatches} total mismatches)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Per-turn prompt construction cost: building templates per call vs the prebuilt registry.
+
+    python -m benchmarks.bench_prompts --iterations 20000
+"""
+import argparse
+import sys
+import timeit
+from pathlib import Path
+
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.prompts import ChatPromptTemplate
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from chatbot.prompts import build_prompt_registry  # noqa: E402
+
+STATE = {"user_age": 25, "insurance_type": None, "insured_for": "self", "intent": "get_insurance_info"}
+MISSING = ["insurance_type"]
+HISTORY = "user: hi\nassistant: Hello! How may I assist you today?\nuser: I'm 25"
+
+
+def per_call_extraction(user_message):
+    """How _extract_info_with_llm built its prompt before the registry"""
+    prompt = ChatPromptTemplate.from_messages([
+        SystemMessage(content="""You are an intent and information extraction assistant.
+
+        Return ONLY a JSON object with this format:
+        {
+            "age": number_or_null,
+            "insurance_type": "health" | "life" | "auto" | null,
+            "insured_for": "self" | "spouse" | "child" | "parent" | null,
+            "intent": "get_insurance_info" | "ask_suggestion" | "other"
+        }
+
+        Rules:
+        - "get_insurance_info": User is giving info or asking for an insurance plan.
+        - "ask_suggestion": User is asking for advice, recommendation, or comparison based on existing info.
+        - "other": Anything unrelated to insurance.
+        - "greet": If the user says "hi", "hello", etc.
+
+        Examples:
+        - "I'm 25 and need health insurance" -> {"age": 25, "insurance_type": "health", "insured_for": "self", "intent": "get_insurance_info"}
+        - "Looking for car insurance for my father" -> {"age": null, "insurance_type": "auto", "insured_for": "parent", "intent": "get_insurance_info"}
+        - "My wife needs life insurance, she's 30" -> {"age": 30, "insurance_type": "life", "insured_for": "spouse", "intent": "get_insurance_info"}
+        - "What do you suggest?" -> {"age": null, "insurance_type": null, "insured_for": null, "intent": "ask_suggestion"}
+        - "Tell me a joke" -> {"age": null, "insurance_type": null, "insured_for": null, "intent": "other"}
+        - "If Greetings {"age": null, "insurance_type": null, "insured_for": null, "intent": "greet"}"""),
+        HumanMessage(content=f"Extract from: {user_message}")
+    ])
+    return prompt.format_messages()
+
+
+def per_call_followup(state, missing_info, history_text):
+    """How _ask_followup_with_llm built its prompt before the registry"""
+    prompt = ChatPromptTemplate.from_messages([
+        SystemMessage(content="""You are a friendly insurance assistant.
+    CRITICAL RULES:
+        1. ONLY ask for the missing information: {', '.join(missing_info)}
+        2. DO NOT ask about coverage details, family members, medical conditions, etc.
+        3. Keep it simple and direct
+        4. Available insurance types: health, life, auto
+        5. Insured for options: self, spouse, child, parent
+        6. Only ask for the missing information, nothing else!
+        7. For FIRST-TIME greetings (when conversation history is empty or minimal), greet warmly and say "How may I assist you today?"
+        8. For SUBSEQUENT greetings (when conversation history exists), acknowledge the greeting briefly and ask for missing info.
+
+        Current user info:
+        - Age: {state.get('user_age', 'unknown')}
+        - Insurance type: {state.get('insurance_type', 'unknown')}
+        - Insured For: {state.get('insured_for', 'unknown')}"""),
+        HumanMessage(content=f"""
+    Missing information that I need: {', '.join(missing_info)}
+    Intent: {state.get("intent")}
+    Is this first interaction: {len(history_text.strip()) < 50}
+
+    Conversation history:
+    {history_text}
+
+    INSTRUCTIONS:
+    - If intent is "greet" AND this is the first interaction (minimal/no history), respond with warm greeting + "How may I assist you today?"
+    - If intent is "greet" AND this is NOT the first interaction (history exists), acknowledge greeting + ask for missing info
+    - For all other intents, ask for missing information only
+
+    Generate appropriate response based on above rules.""")
+    ])
+    return prompt.format_messages()
+
+
+def per_call_turn():
+    per_call_extraction("I'm 25")
+    per_call_followup(STATE, MISSING, HISTORY)
+
+
+def registry_turn(prompts):
+    prompts["extraction"].format_messages(user_message="I'm 25")
+    prompts["followup"].format_messages(
+        missing_info=", ".join(MISSING),
+        user_age=STATE["user_age"] or "unknown",
+        insurance_type=STATE["insurance_type"] or "unknown",
+        insured_for=STATE["insured_for"] or "unknown",
+        intent=STATE["intent"],
+        is_first_interaction=len(HISTORY.strip()) < 50,
+        history_text=HISTORY,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    build_seconds = timeit.timeit(build_prompt_registry, number=10) / 10
+    prompts = build_prompt_registry()
+    before = timeit.timeit(per_call_turn, number=args.iterations) / args.iterations
+    after = timeit.timeit(lambda: registry_turn(prompts), number=args.iterations) / args.iterations
+
+    print("extraction + follow-up prompt per turn")
+    print(f"  per-call templates: {before * 1e6:8.1f} us/turn")
+    print(f"  prebuilt registry:  {after * 1e6:8.1f} us/turn  ({before / after:.1f}x)")
+    print(f"  one-time registry build: {build_seconds * 1e3:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
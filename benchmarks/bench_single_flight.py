@@ -0,0 +1,63 @@
+"""Upstream calls for a burst of identical prompts, with and without single-flight.
+
+    python -m benchmarks.bench_single_flight --burst 1000 --distinct 20
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from langchain_core.messages import HumanMessage, SystemMessage  # noqa: E402
+from langchain_groq import ChatGroq  # noqa: E402
+
+from benchmarks.fake_llm_server import FakeLLMBehavior, start_fake_llm_server  # noqa: E402
+from chatbot.llm_gateway import CircuitBreaker, LLMGateway  # noqa: E402
+from chatbot.single_flight import SingleFlightChatModel  # noqa: E402
+
+
+def prompt(text):
+    return [SystemMessage(content="You are a friendly insurance assistant."), HumanMessage(content=text)]
+
+
+async def run(llm, burst, distinct):
+    # A campaign burst of identical greetings mixed with a few distinct messages
+    prompts = [prompt("hi") for _ in range(burst)] + [prompt(f"I'm {18 + i} and need health insurance") for i in range(distinct)]
+    started = time.perf_counter()
+    results = await asyncio.gather(*(llm.ainvoke(p) for p in prompts), return_exceptions=True)
+    elapsed = time.perf_counter() - started
+    failures = sum(isinstance(result, Exception) for result in results)
+    return elapsed, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--burst", type=int, default=1000)
+    parser.add_argument("--distinct", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.2)
+    args = parser.parse_args()
+
+    behavior = FakeLLMBehavior(latency=args.latency)
+    server = start_fake_llm_server(behavior)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    for label, single_flight in (("direct", False), ("single-flight", True)):
+        behavior.requests = 0
+        gateway = LLMGateway(
+            ChatGroq(api_key="fake", model="fake", base_url=base_url, temperature=0, max_retries=0),
+            max_concurrency=16, max_queue=args.burst + args.distinct, default_timeout=120,
+            breaker=CircuitBreaker(failure_threshold=10 ** 6, reset_seconds=1),
+        )
+        llm = SingleFlightChatModel(gateway, "fake") if single_flight else gateway
+        elapsed, failures = asyncio.run(run(llm, args.burst, args.distinct))
+        line = f"{label:14s} upstream requests {behavior.requests:5d}  wall {elapsed:6.2f}s  failures {failures}"
+        if single_flight:
+            stats = llm.stats()
+            line += f"  collapsed {stats['collapsed']} ({stats['collapse_rate']:.0%})"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
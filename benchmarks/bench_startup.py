@@ -0,0 +1,94 @@
+"""Startup cost: `python -X importtime` breakdown of `import main` and time to first response.
+
+    python -m benchmarks.bench_startup --top 15
+    python -m benchmarks.bench_startup --output startup.json
+
+Each measurement runs in a fresh interpreter so nothing is already imported.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+FIRST_RESPONSE = """
+import time
+started = time.perf_counter()
+from main import app
+imported = time.perf_counter()
+client = app.test_client()
+status = client.get("/api/insurance/types").status_code
+served = time.perf_counter()
+from chatbot.provider import get_chatbot
+chat_ready = get_chatbot() is not None
+built = time.perf_counter()
+conversation = client.post("/api/chat/start").get_json().get("conversation_id")
+# No message: 400 when chat is enabled (without calling the LLM), 503 when it is disabled
+message_status = client.post(f"/api/chat/{conversation}", json={}).status_code
+print(json.dumps({
+    "import_main_ms": (imported - started) * 1000,
+    "first_insurance_response_ms": (served - started) * 1000,
+    "insurance_status": status,
+    "chatbot_build_ms": (built - served) * 1000,
+    "chat_ready": chat_ready,
+    "chat_message_status": message_status,
+}))
+"""
+
+
+def run_python(args, env_overrides):
+    env = dict(os.environ, **env_overrides)
+    return subprocess.run([sys.executable, *args], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+
+
+def importtime_breakdown(env_overrides):
+    """Self and cumulative import time (ms) per top-level package for `import main`"""
+    stderr = run_python(["-X", "importtime", "-c", "import main"], env_overrides).stderr
+    self_by_package = defaultdict(float)
+    total_ms = 0.0
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        package = name.strip().split(".")[0]
+        self_by_package[package] += int(self_us) / 1000
+        if name.strip() == "main":
+            total_ms = int(cumulative_us) / 1000
+    return total_ms, dict(sorted(self_by_package.items(), key=lambda item: -item[1]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=12)
+    parser.add_argument("--output", help="write the results as JSON")
+    args = parser.parse_args()
+
+    results = {}
+    total_ms, packages = importtime_breakdown({"CHATBOT_WARM_UP": "false", "GROQ_API_KEY": "benchmark"})
+    results["import_main_ms"] = round(total_ms, 1)
+    results["import_self_ms_by_package"] = {name: round(ms, 1) for name, ms in packages.items()}
+    print(f"import main: {total_ms:.1f} ms (python -X importtime, warm-up off)")
+    for name, ms in list(packages.items())[:args.top]:
+        print(f"  {name:32s} {ms:8.1f} ms")
+
+    for label, env in (
+        ("warm-up off", {"CHATBOT_WARM_UP": "false", "GROQ_API_KEY": "benchmark"}),
+        ("warm-up on", {"CHATBOT_WARM_UP": "true", "GROQ_API_KEY": "benchmark"}),
+        ("no API key", {"CHATBOT_WARM_UP": "false", "GROQ_API_KEY": ""}),
+    ):
+        timings = json.loads(run_python(["-c", "import json\n" + FIRST_RESPONSE], env).stdout.strip().splitlines()[-1])
+        results[label] = timings
+        print(f"{label:12s} import {timings['import_main_ms']:7.1f} ms  first /api/insurance/types "
+              f"{timings['first_insurance_response_ms']:7.1f} ms  chatbot build {timings['chatbot_build_ms']:7.1f} ms  "
+              f"chat {'ready' if timings['chat_ready'] else 'disabled'} (message -> {timings['chat_message_status']})")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
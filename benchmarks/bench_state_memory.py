@@ -0,0 +1,90 @@
+"""Memory held by the in-memory conversation store: plain dict states vs compact slot states.
+
+    python -m benchmarks.bench_state_memory --conversations 100000 --turns 3
+"""
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from chatbot.catalog import current_catalog  # noqa: E402
+from chatbot.conversation_store import InMemoryConversationStore  # noqa: E402
+from chatbot.state import ChatbotState  # noqa: E402
+
+TYPES = ("health", "life", "auto")
+INSURED_FOR = ("self", "spouse", "child", "parent")
+
+
+def make_state(i, turns):
+    """A mid-conversation state shaped like the ones the graph produces"""
+    insurance_type = TYPES[i % len(TYPES)]
+    age = 18 + i % 60
+    messages = []
+    for turn in range(turns):
+        messages.append({"role": "user", "content": f"I'm {age} and need {insurance_type} insurance (turn {turn}, #{i})"})
+        messages.append({"role": "assistant", "content": f"Here are the {insurance_type} plans for age {age}. " * 4 + str(i)})
+    docs = [
+        {"insurance_type": e.insurance_type, "plan_tier": e.plan_tier, "age_bracket": e.age_bracket, "data": e.plan}
+        for e in current_catalog().index.lookup(insurance_type, age)
+    ]
+    # Values parsed from JSON are fresh str objects, as they are for states coming off the wire or the LLM
+    return ChatbotState(
+        messages=messages,
+        user_age=age,
+        insurance_type="".join(insurance_type),
+        user_query=messages[-2]["content"],
+        relevant_docs=docs,
+        missing_info=[],
+        conversation_stage="".join("info_complete"),
+        last_response=messages[-1]["content"],
+        insured_for="".join(INSURED_FOR[i % len(INSURED_FOR)]),
+        intent="".join("get_insurance_info"),
+        greeting_detected=False,
+        candidate_response=None,
+        history_summary="",
+        history_overflow=[],
+    )
+
+
+def measure(compact, conversations, turns):
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    store = InMemoryConversationStore(max_size=conversations, ttl_seconds=3600, compact=compact)
+    started = time.perf_counter()
+    for i in range(conversations):
+        store.put(f"conversation-{i}", make_state(i, turns))
+    fill_seconds = time.perf_counter() - started
+    gc.collect()
+    held = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+
+    started = time.perf_counter()
+    for i in range(0, conversations, 10):
+        store.get(f"conversation-{i}")
+    get_us = (time.perf_counter() - started) / len(range(0, conversations, 10)) * 1e6
+    return held, fill_seconds, get_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--conversations", type=int, default=100000)
+    parser.add_argument("--turns", type=int, default=3)
+    args = parser.parse_args()
+
+    results = {}
+    for label, compact in (("dict", False), ("compact", True)):
+        held, fill_seconds, get_us = measure(compact, args.conversations, args.turns)
+        results[label] = held
+        print(f"{label:8s} {held / 2**20:8.1f} MiB  {held / args.conversations:7.0f} B/conversation  "
+              f"fill {fill_seconds:5.2f}s  get {get_us:5.1f}us")
+    print(f"compact saves {(1 - results['compact'] / results['dict']) * 100:.0f}% "
+          f"at {args.conversations} conversations x {args.turns} turns")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""Local stand-in for the Groq chat completions API with configurable latency, token rate and errors.
+
+Point ChatGroq at it with `base_url="http://127.0.0.1:<port>"` (or GROQ_API_BASE).
+Run standalone for manual testing:
+
+    python -m benchmarks.fake_llm_server --port 8099 --latency 0.3 --token-rate 200 --error-rate 0.1
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeLLMBehavior:
+    """Knobs read on every request, so a benchmark can change them between scenarios"""
+
+    def __init__(self, latency=0.05, jitter=0.0, error_rate=0.0, rate_limit_rate=0.0,
+                 hang_rate=0.0, hang_seconds=30.0, seed=0, token_rate=0.0):
+        self.latency = latency
+        # Completion tokens generated per second after the first-token latency; 0 means instant
+        self.token_rate = token_rate
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.hang_rate = hang_rate
+        self.hang_seconds = hang_seconds
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+
+    def draw(self):
+        with self.lock:
+            self.requests += 1
+            return self.random.random(), self.random.random()
+
+
+def reply_for(messages):
+    """Deterministic reply: JSON for the extraction prompts, an echo of the prompt otherwise"""
+    system = messages[0]["content"] if messages else ""
+    last = messages[-1]["content"] if messages else ""
+    if "Return ONLY a JSON object" in system:
+        fields = {"age": None, "insurance_type": None, "insured_for": "self", "intent": "get_insurance_info"}
+        for word in last.replace(",", " ").split():
+            if word.isdigit():
+                fields["age"] = int(word)
+            elif word in ("health", "life", "auto"):
+                fields["insurance_type"] = word
+        if '"reply"' in system:
+            fields["reply"] = "Thanks! " + last[-80:]
+        return json.dumps(fields)
+    return "Here is what I found: " + " ".join(last.split()[:40])
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        behavior = self.server.behavior
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        fault, spread = behavior.draw()
+
+        if fault < behavior.hang_rate:
+            time.sleep(behavior.hang_seconds)
+        else:
+            time.sleep(max(0.0, behavior.latency + behavior.jitter * (2 * spread - 1)))
+        fault -= behavior.hang_rate
+        if 0 <= fault < behavior.error_rate:
+            return self._send_json(503, {"error": {"message": "injected upstream error", "type": "server_error"}})
+        fault -= behavior.error_rate
+        if 0 <= fault < behavior.rate_limit_rate:
+            return self._send_json(429, {"error": {"message": "injected rate limit", "type": "rate_limit"}})
+
+        content = reply_for(request.get("messages", []))
+        created = int(time.time())
+        model = request.get("model", "fake")
+        usage = {
+            "prompt_tokens": sum(len(m.get("content", "").split()) for m in request.get("messages", [])),
+            "completion_tokens": len(content.split()),
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+
+        words = content.split(" ")
+        per_token = 1.0 / behavior.token_rate if behavior.token_rate else 0.0
+
+        if not request.get("stream"):
+            time.sleep(per_token * len(words))
+            return self._send_json(200, {
+                "id": f"fake-{behavior.requests}", "object": "chat.completion", "created": created, "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": usage,
+            })
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        for i, word in enumerate(words):
+            if i and per_token:
+                time.sleep(per_token)
+            chunk = {
+                "id": f"fake-{behavior.requests}", "object": "chat.completion.chunk", "created": created, "model": model,
+                "choices": [{"index": 0, "delta": {"content": word if i == 0 else " " + word}, "finish_reason": None}],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+        final = {
+            "id": f"fake-{behavior.requests}", "object": "chat.completion.chunk", "created": created, "model": model,
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}], "x_groq": {"usage": usage},
+        }
+        self.wfile.write(f"data: {json.dumps(final)}\n\ndata: [DONE]\n\n".encode("utf-8"))
+        self.close_connection = True
+
+
+class FakeLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients that time out hang up mid-response; that is expected here
+        pass
+
+
+def start_fake_llm_server(behavior: FakeLLMBehavior, port: int = 0) -> FakeLLMServer:
+    """Serve in a daemon thread; the bound port is `server.server_address[1]`"""
+    server = FakeLLMServer(("127.0.0.1", port), FakeLLMHandler)
+    server.behavior = behavior
+    threading.Thread(target=server.serve_forever, name="fake-llm-server", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--token-rate", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--hang-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    server = start_fake_llm_server(FakeLLMBehavior(
+        latency=args.latency, jitter=args.jitter, token_rate=args.token_rate, error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate, hang_rate=args.hang_rate,
+    ), args.port)
+    print(f"Fake LLM listening on http://127.0.0.1:{server.server_address[1]}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""Load test: scripted multi-turn conversations against the Flask app, with a local fake LLM.
+
+Each virtual user runs start -> greeting -> age -> insurance type -> suggestion
+conversations over real HTTP. The app talks to benchmarks.fake_llm_server through
+the normal ChatGroq client, so no Groq quota is used and runs are repeatable.
+
+    python -m benchmarks.load_test --levels 1,4,16,64 --conversations 3 --latency 0.2 --token-rate 300
+    python -m benchmarks.load_test --output after.json --baseline before.json
+
+Reports requests/sec, p50/p95/p99 per route (client side) and per graph path
+(server side) and peak RSS for every concurrency level, and writes it all as JSON.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import resource
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.fake_llm_server import FakeLLMBehavior, start_fake_llm_server  # noqa: E402
+
+AGES = list(range(18, 80))
+TYPES = ("health", "life", "auto")
+INSURED = (("me", "self"), ("my wife", "spouse"), ("my son", "child"), ("my father", "parent"))
+GREETINGS = ("hi", "hello", "hey there")
+SUGGESTIONS = ("what do you suggest?", "which plan would you recommend?", "compare them for me")
+# Phrasings the rule-based fast path can't fully explain, so extraction goes to the LLM
+CHATTY = (
+    "ok so I've been thinking about {type} cover, can you look at it for {who}",
+    "my friend told me to ask about {type} stuff for {who}",
+)
+
+
+def conversation_script(rng):
+    """The messages of one conversation, after /start"""
+    age = rng.choice(AGES)
+    insurance_type = rng.choice(TYPES)
+    who, _ = rng.choice(INSURED)
+    type_message = (rng.choice(CHATTY) if rng.random() < 0.3 else "{type} insurance for {who}").format(
+        type=insurance_type, who=who
+    )
+    return [
+        ("greeting", rng.choice(GREETINGS)),
+        ("age", f"I'm {age}"),
+        ("type", type_message),
+        ("suggestion", rng.choice(SUGGESTIONS)),
+    ]
+
+
+class RSSSampler:
+    """Tracks the highest resident set size seen while running"""
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak_bytes = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def current_bytes():
+        try:
+            with open("/proc/self/status") as status:
+                for line in status:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1]) * 1024
+        except OSError:
+            pass
+        # Not Linux: fall back to the process-lifetime peak (kilobytes on Linux, bytes on macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak_bytes = max(self.peak_bytes, self.current_bytes())
+
+    def __enter__(self):
+        self.peak_bytes = self.current_bytes()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak_bytes = max(self.peak_bytes, self.current_bytes())
+
+
+def summarize(histogram):
+    return {
+        "count": histogram.count,
+        "mean_ms": round(histogram.total / histogram.count * 1000, 2) if histogram.count else 0.0,
+        "p50_ms": round(histogram.percentile(50) * 1000, 2),
+        "p95_ms": round(histogram.percentile(95) * 1000, 2),
+        "p99_ms": round(histogram.percentile(99) * 1000, 2),
+    }
+
+
+async def virtual_user(client, user_id, conversations, seed, routes, errors, Histogram):
+    import httpx
+
+    rng = random.Random(seed * 100003 + user_id)
+
+    async def call(label, path, payload=None):
+        started = time.perf_counter()
+        try:
+            response = await client.post(path, json=payload)
+            ok = response.status_code < 400
+            body = response.json() if ok else None
+        except httpx.HTTPError:
+            ok, body = False, None
+        routes.setdefault(label, Histogram(scale=1e6)).record(time.perf_counter() - started)
+        if not ok:
+            errors[label] = errors.get(label, 0) + 1
+        return body
+
+    for _ in range(conversations):
+        started = await call("POST /api/chat/start", "/api/chat/start")
+        if not started:
+            continue
+        conversation_id = started["conversation_id"]
+        for _step, message in conversation_script(rng):
+            await call("POST /api/chat/<id>", f"/api/chat/{conversation_id}", {"message": message})
+
+
+async def run_level(base_url, concurrency, conversations, seed, Histogram):
+    import httpx
+
+    routes, errors = {}, {}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            virtual_user(client, user_id, conversations, seed, routes, errors, Histogram)
+            for user_id in range(concurrency)
+        ))
+        elapsed = time.perf_counter() - started
+    return routes, errors, elapsed
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).resolve().parent.parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_level(level):
+    print(f"\nconcurrency {level['concurrency']}: {level['requests']} requests in {level['duration_seconds']}s "
+          f"= {level['rps']} req/s, {level['errors']} errors, peak RSS {level['peak_rss_mb']} MiB")
+    for kind in ("routes", "paths"):
+        for name, stats in level[kind].items():
+            print(f"  {kind[:-1]:5s} {name[:70]:70s} n={stats['count']:5d}  p50 {stats['p50_ms']:8.1f}  "
+                  f"p95 {stats['p95_ms']:8.1f}  p99 {stats['p99_ms']:8.1f} ms")
+
+
+def compare(results, baseline_path):
+    """Print the change in throughput and route p95 against a previous results file"""
+    baseline = {level["concurrency"]: level for level in json.loads(Path(baseline_path).read_text())["levels"]}
+    print(f"\nvs {baseline_path}:")
+    for level in results["levels"]:
+        before = baseline.get(level["concurrency"])
+        if not before:
+            continue
+        line = f"  concurrency {level['concurrency']:4d}: rps {before['rps']} -> {level['rps']}"
+        for route, stats in level["routes"].items():
+            if route in before["routes"]:
+                line += f"; {route} p95 {before['routes'][route]['p95_ms']} -> {stats['p95_ms']} ms"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--levels", default="1,4,16,64", help="comma-separated concurrency levels")
+    parser.add_argument("--conversations", type=int, default=3, help="conversations per virtual user per level")
+    parser.add_argument("--latency", type=float, default=0.2, help="fake LLM time to first token, seconds")
+    parser.add_argument("--token-rate", type=float, default=300, help="fake LLM completion tokens per second")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--no-llm-cache", action="store_true")
+    parser.add_argument("--output", default="load_test_results.json")
+    parser.add_argument("--baseline", help="previous results file to compare against")
+    args = parser.parse_args()
+
+    behavior = FakeLLMBehavior(latency=args.latency, token_rate=args.token_rate, seed=args.seed)
+    llm_server = start_fake_llm_server(behavior)
+    os.environ["GROQ_API_BASE"] = f"http://127.0.0.1:{llm_server.server_address[1]}"
+    os.environ["GROQ_API_KEY"] = "fake"
+    os.environ["CONVERSATION_BACKEND"] = "memory"
+    if args.no_llm_cache:
+        os.environ["LLM_CACHE_ENABLED"] = "false"
+
+    from werkzeug.serving import make_server
+
+    from chatbot.metrics import METRICS, Histogram
+    from main import app
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    app_server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=app_server.serve_forever, name="load-test-app", daemon=True).start()
+    base_url = f"http://127.0.0.1:{app_server.server_port}"
+
+    results = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {
+            "levels": args.levels, "conversations_per_user": args.conversations, "llm_latency": args.latency,
+            "llm_token_rate": args.token_rate, "seed": args.seed, "llm_cache": not args.no_llm_cache,
+        },
+        "levels": [],
+    }
+    for concurrency in (int(level) for level in args.levels.split(",")):
+        METRICS.reset("chatbot_turn_duration_seconds")
+        llm_requests = behavior.requests
+        with RSSSampler() as rss:
+            routes, errors, elapsed = asyncio.run(run_level(base_url, concurrency, args.conversations, args.seed, Histogram))
+        requests = sum(histogram.count for histogram in routes.values())
+        level = {
+            "concurrency": concurrency,
+            "requests": requests,
+            "errors": sum(errors.values()),
+            "duration_seconds": round(elapsed, 3),
+            "rps": round(requests / elapsed, 2),
+            "llm_requests": behavior.requests - llm_requests,
+            "peak_rss_mb": round(rss.peak_bytes / 2 ** 20, 1),
+            "routes": {route: summarize(histogram) for route, histogram in sorted(routes.items())},
+            "paths": {
+                dict(labels)["path"]: summarize(histogram)
+                for labels, histogram in sorted(METRICS.series("chatbot_turn_duration_seconds").items())
+            },
+        }
+        results["levels"].append(level)
+        print_level(level)
+
+    Path(args.output).write_text(json.dumps(results, indent=2))
+    print(f"\nresults written to {args.output}")
+    if args.baseline:
+        compare(results, args.baseline)
+    app_server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
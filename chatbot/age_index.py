@@ -0,0 +1,144 @@
+from bisect import bisect_right
+from collections import defaultdict
+from typing import TYPE_CHECKING, Any, Dict, List, NamedTuple, Optional, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+ANY_AGE = "any_age"
+
+
+class PlanEntry(NamedTuple):
+    insurance_type: str
+    plan_tier: str
+    age_bracket: str
+    plan: Dict[str, Any]
+
+
+def parse_bracket(bracket: str) -> Optional[Tuple[int, int]]:
+    """Parse "18-25" into inclusive bounds; returns None for "any_age" """
+    if bracket == ANY_AGE:
+        return None
+    low, high = bracket.split("-")
+    return int(low), int(high)
+
+
+class AgeBracketIndex:
+    """Maps (insurance_type, age) to the matching plan entries in O(log n).
+
+    Bracket bounds per type are cut into non-overlapping segments, each holding
+    every entry that covers it (including "any_age" entries), so a lookup is
+    one bisect over the segment start points. Entries keep catalog order.
+    """
+
+    def __init__(self, database: Dict[str, Dict[str, Dict[str, Dict[str, Any]]]]):
+        self._starts: Dict[str, List[int]] = {}
+        self._ends: Dict[str, List[int]] = {}
+        self._segments: Dict[str, List[Tuple[PlanEntry, ...]]] = {}
+        self._any_age: Dict[str, Tuple[PlanEntry, ...]] = {}
+        self._brackets: Dict[str, List[str]] = {}
+        self._arrays: Dict[str, Tuple["np.ndarray", "np.ndarray"]] = {}
+        self._entries: List[PlanEntry] = []
+        self._by_key: Dict[Tuple[str, str, str], PlanEntry] = {}
+        for insurance_type, tiers in database.items():
+            self._index_type(insurance_type, tiers)
+
+    def _index_type(self, insurance_type: str, tiers: Dict[str, Dict[str, Dict[str, Any]]]) -> None:
+        bounded = []  # (position, low, high, entry)
+        any_age = []
+        brackets = []
+        for plan_tier, plans_by_age in tiers.items():
+            for age_bracket, plan in plans_by_age.items():
+                entry = PlanEntry(insurance_type, plan_tier, age_bracket, plan)
+                self._entries.append(entry)
+                self._by_key[(insurance_type, plan_tier, age_bracket)] = entry
+                if age_bracket not in brackets:
+                    brackets.append(age_bracket)
+                bounds = parse_bracket(age_bracket)
+                if bounds is None:
+                    any_age.append((len(bounded) + len(any_age), entry))
+                else:
+                    bounded.append((len(bounded) + len(any_age), bounds[0], bounds[1], entry))
+
+        # Sweep over bracket boundaries; each segment [points[i], points[i + 1]) has a fixed set of entries
+        opening, closing = defaultdict(list), defaultdict(list)
+        for position, low, high, entry in bounded:
+            opening[low].append((position, entry))
+            closing[high + 1].append(position)
+        points = sorted(set(opening) | set(closing))
+        active: Dict[int, PlanEntry] = {}
+        starts, ends, segments = [], [], []
+        for low, next_low in zip(points, points[1:]):
+            for position in closing.get(low, ()):
+                del active[position]
+            active.update(opening.get(low, ()))
+            if not active and not any_age:
+                continue
+            covering = sorted(list(active.items()) + any_age, key=lambda item: item[0])
+            starts.append(low)
+            ends.append(next_low - 1)
+            segments.append(tuple(entry for _, entry in covering))
+
+        self._starts[insurance_type] = starts
+        self._ends[insurance_type] = ends
+        self._segments[insurance_type] = segments
+        self._any_age[insurance_type] = tuple(entry for _, entry in any_age)
+        self._brackets[insurance_type] = brackets
+
+    def lookup(self, insurance_type: str, age: int) -> Tuple[PlanEntry, ...]:
+        """Return every plan entry of `insurance_type` available at `age`"""
+        starts = self._starts.get(insurance_type)
+        if starts is None:
+            return ()
+        position = bisect_right(starts, age) - 1
+        if position >= 0 and age <= self._ends[insurance_type][position]:
+            return self._segments[insurance_type][position]
+        return self._any_age[insurance_type]
+
+    def segment_positions(self, insurance_type: str, ages: "np.ndarray") -> "np.ndarray":
+        """Vectorized lookup: segment position for each age, or -1 where only any_age entries apply"""
+        # numpy is only needed for batch quotes, so it is imported on first use rather than at startup
+        import numpy as np
+
+        arrays = self._arrays.get(insurance_type)
+        if arrays is None:
+            arrays = (
+                np.array(self._starts[insurance_type], dtype=np.int64),
+                np.array(self._ends[insurance_type], dtype=np.int64),
+            )
+            self._arrays[insurance_type] = arrays
+        starts, ends = arrays
+        if not len(starts):
+            return np.full(len(ages), -1, dtype=np.int64)
+        positions = np.searchsorted(starts, ages, side="right") - 1
+        covered = (positions >= 0) & (ages <= ends[np.clip(positions, 0, None)])
+        return np.where(covered, positions, -1)
+
+    def entries_at(self, insurance_type: str, position: int) -> Tuple[PlanEntry, ...]:
+        """Entries for a position returned by segment_positions"""
+        if position < 0:
+            return self._any_age[insurance_type]
+        return self._segments[insurance_type][position]
+
+    def bracket_for(self, insurance_type: str, age: int) -> Optional[str]:
+        """Return the first matching age bracket, or None when no plan covers the age"""
+        entries = self.lookup(insurance_type, age)
+        return entries[0].age_bracket if entries else None
+
+    def __contains__(self, insurance_type: str) -> bool:
+        return insurance_type in self._brackets
+
+    def plan_ref(self, insurance_type: str, plan_tier: str, age_bracket: str) -> Optional[PlanEntry]:
+        """The shared entry for a plan, used as a compact reference instead of copying the plan"""
+        return self._by_key.get((insurance_type, plan_tier, age_bracket))
+
+    def entries(self) -> List[PlanEntry]:
+        """Every plan entry in catalog order"""
+        return list(self._entries)
+
+    def insurance_types(self) -> List[str]:
+        return list(self._brackets)
+
+    def brackets(self, insurance_type: str) -> List[str]:
+        return self._brackets.get(insurance_type, [])
+
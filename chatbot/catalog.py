@@ -0,0 +1,309 @@
+import copy
+import hashlib
+import json
+import mmap
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import Config
+from .age_index import ANY_AGE, AgeBracketIndex
+from .plan_search import PlanSearchIndex
+
+# Nested catalog: {insurance_type: {plan_tier: {age_bracket: plan}}}, the shape of insurance_db.INSURANCE_DATABASE
+Catalog = Dict[str, Dict[str, Dict[str, Dict[str, Any]]]]
+
+# File suffixes read as one plan per line; everything else is parsed as a single nested JSON document
+JSONL_SUFFIXES = (".jsonl", ".ndjson")
+
+# Stop collecting validation errors after this many so a broken file still gives a readable message
+_MAX_ERRORS = 20
+
+
+class CatalogError(ValueError):
+    """The catalog file is missing, unreadable or fails validation"""
+
+
+def _bracket_error(bracket: Any) -> Optional[str]:
+    if bracket == ANY_AGE:
+        return None
+    if not isinstance(bracket, str) or bracket.count("-") != 1:
+        return f"age bracket {bracket!r} must be 'low-high' or '{ANY_AGE}'"
+    low, high = bracket.split("-")
+    if not (low.isdigit() and high.isdigit()):
+        return f"age bracket {bracket!r} must be 'low-high' or '{ANY_AGE}'"
+    if int(low) > int(high):
+        return f"age bracket {bracket!r} has low > high"
+    return None
+
+
+def validate_catalog(catalog: Any) -> None:
+    """Raise CatalogError listing what is wrong with a nested catalog, if anything"""
+    errors: List[str] = []
+    if not isinstance(catalog, dict) or not catalog:
+        raise CatalogError("catalog must be a non-empty object of insurance types")
+    for insurance_type, tiers in catalog.items():
+        if not isinstance(insurance_type, str):
+            errors.append(f"insurance type {insurance_type!r} must be a string")
+            continue
+        if not isinstance(tiers, dict) or not tiers:
+            errors.append(f"{insurance_type}: must be a non-empty object of plan tiers")
+            continue
+        for plan_tier, plans_by_age in tiers.items():
+            where = f"{insurance_type}/{plan_tier}"
+            if not isinstance(plan_tier, str):
+                errors.append(f"{where}: plan tier must be a string")
+                continue
+            if not isinstance(plans_by_age, dict) or not plans_by_age:
+                errors.append(f"{where}: must be a non-empty object of age brackets")
+                continue
+            for age_bracket, plan in plans_by_age.items():
+                bracket_error = _bracket_error(age_bracket)
+                if bracket_error:
+                    errors.append(f"{where}: {bracket_error}")
+                if not isinstance(plan, dict):
+                    errors.append(f"{where}/{age_bracket}: plan must be an object")
+                elif not isinstance(plan.get("premium"), str):
+                    errors.append(f"{where}/{age_bracket}: plan needs a 'premium' string")
+        if len(errors) >= _MAX_ERRORS:
+            break
+    if errors:
+        raise CatalogError("invalid catalog: " + "; ".join(errors[:_MAX_ERRORS]))
+
+
+def catalog_version(catalog: Catalog) -> str:
+    """Content hash, so every worker loading the same file agrees on the version and unchanged files don't swap"""
+    payload = json.dumps(catalog, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def _read_jsonl(path: str) -> Catalog:
+    """Build the nested catalog from one plan per line, reading the file through mmap"""
+    catalog: Catalog = {}
+    with open(path, "rb") as handle:
+        if os.fstat(handle.fileno()).st_size == 0:
+            return catalog
+        # Lines are parsed straight out of the page cache instead of reading the whole file into memory first
+        with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            for line_number, line in enumerate(iter(mapped.readline, b""), start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                    key = (row["insurance_type"], row["plan_tier"], row["age_bracket"])
+                    plan = row["plan"]
+                except (ValueError, KeyError, TypeError) as e:
+                    raise CatalogError(f"{path}:{line_number}: expected an object with insurance_type, "
+                                       f"plan_tier, age_bracket and plan ({e})")
+                if not all(isinstance(part, str) for part in key):
+                    raise CatalogError(f"{path}:{line_number}: insurance_type, plan_tier and age_bracket "
+                                       f"must be strings, got {key!r}")
+                plans_by_age = catalog.setdefault(key[0], {}).setdefault(key[1], {})
+                if key[2] in plans_by_age:
+                    raise CatalogError(f"{path}:{line_number}: duplicate plan {'/'.join(key)}")
+                plans_by_age[key[2]] = plan
+    return catalog
+
+
+def read_catalog_file(path: str) -> Catalog:
+    """Parse a .json (nested) or .jsonl (one plan per line) catalog file"""
+    try:
+        if path.endswith(JSONL_SUFFIXES):
+            return _read_jsonl(path)
+        with open(path, "rb") as handle:
+            return json.load(handle)
+    except OSError as e:
+        raise CatalogError(f"cannot read catalog {path}: {e}")
+    except json.JSONDecodeError as e:
+        raise CatalogError(f"{path}: invalid JSON: {e}")
+    except UnicodeDecodeError as e:
+        raise CatalogError(f"{path}: not valid UTF-8: {e}")
+
+
+def write_catalog_file(catalog: Catalog, path: str) -> None:
+    """Write a catalog in the format implied by the suffix, replacing the file atomically"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as handle:
+        if path.endswith(JSONL_SUFFIXES):
+            for insurance_type, tiers in catalog.items():
+                for plan_tier, plans_by_age in tiers.items():
+                    for age_bracket, plan in plans_by_age.items():
+                        handle.write(json.dumps({
+                            "insurance_type": insurance_type, "plan_tier": plan_tier,
+                            "age_bracket": age_bracket, "plan": plan,
+                        }, ensure_ascii=False) + "\n")
+        else:
+            json.dump(catalog, handle, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """One validated catalog and the indexes built from it (age brackets and attribute search).
+
+    Snapshots are never modified: a reload builds a new one and swaps the
+    reference, so a request that grabbed a snapshot sees one consistent
+    catalog even if a reload lands halfway through it.
+    """
+    version: str
+    source: str
+    loaded_at: float
+    database: Catalog
+    index: AgeBracketIndex
+    search: PlanSearchIndex
+
+    @classmethod
+    def build(cls, catalog: Catalog, source: str) -> "CatalogSnapshot":
+        validate_catalog(catalog)
+        index = AgeBracketIndex(catalog)
+        return cls(
+            version=catalog_version(catalog),
+            source=source,
+            loaded_at=time.time(),
+            database=catalog,
+            index=index,
+            search=PlanSearchIndex(index.entries()),
+        )
+
+    @property
+    def plan_count(self) -> int:
+        return len(self.index.entries())
+
+
+class CatalogStore:
+    """Holds the current CatalogSnapshot and reloads it when the catalog file changes.
+
+    With no path the built-in insurance_db catalog is used and never
+    reloaded. Readers call `current()`; a reload that fails validation keeps
+    serving the previous snapshot and reports the error in `stats()`.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.reloads = 0
+        self.failed_reloads = 0
+        self.last_error: Optional[str] = None
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._file_signature: Optional[Tuple[int, int]] = None
+        # A broken file is reported once, not on every poll, until it changes again
+        self._failed_signature: Optional[Tuple[int, int]] = None
+        self._lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+        self._watcher_stop = threading.Event()
+
+    def current(self) -> CatalogSnapshot:
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._lock:
+                if self._snapshot is None:
+                    self._snapshot = self._load()
+                snapshot = self._snapshot
+        return snapshot
+
+    def _signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self) -> CatalogSnapshot:
+        if not self.path:
+            from .insurance_db import INSURANCE_DATABASE
+
+            # The snapshot owns its data; nobody can change it through the module-level literal
+            return CatalogSnapshot.build(copy.deepcopy(INSURANCE_DATABASE), "builtin")
+        signature = self._signature()
+        snapshot = CatalogSnapshot.build(read_catalog_file(self.path), self.path)
+        self._file_signature = signature
+        return snapshot
+
+    def reload(self, force: bool = False) -> bool:
+        """Load the catalog file again; returns True when a new version was swapped in.
+
+        Raises CatalogError (and keeps the current snapshot) if the file is invalid.
+        """
+        if not self.path:
+            return False
+        with self._lock:
+            signature = self._signature()
+            if not force and self._snapshot is not None and signature in (self._file_signature, self._failed_signature):
+                return False
+            try:
+                snapshot = self._load()
+            except Exception as e:
+                # Anything validation missed is still a bad file, not a reason to stop serving or watching
+                error = e if isinstance(e, CatalogError) else CatalogError(f"{self.path}: cannot load catalog: {e!r}")
+                self.failed_reloads += 1
+                self.last_error = str(error)
+                self._failed_signature = signature
+                if error is e:
+                    raise
+                raise error from e
+            self.last_error = None
+            self._failed_signature = None
+            if self._snapshot is not None and snapshot.version == self._snapshot.version:
+                return False
+            self._snapshot = snapshot
+            self.reloads += 1
+        print(f"Catalog reloaded: version {snapshot.version}, {snapshot.plan_count} plans from {snapshot.source}")
+        return True
+
+    def start_watcher(self, interval: float) -> None:
+        """Poll the catalog file's mtime and size every `interval` seconds and reload on change"""
+        if not self.path or interval <= 0:
+            return
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self._watcher_stop.clear()
+        self._watcher = threading.Thread(
+            target=self._watch_forever, args=(interval,), name="catalog-watcher", daemon=True
+        )
+        self._watcher.start()
+
+    def stop_watcher(self) -> None:
+        self._watcher_stop.set()
+
+    def _watch_forever(self, interval: float) -> None:
+        while not self._watcher_stop.wait(interval):
+            try:
+                self.reload()
+            except Exception as e:
+                print(f"Catalog reload failed, still serving the previous version: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        return {
+            "version": snapshot.version if snapshot else None,
+            "source": snapshot.source if snapshot else None,
+            "plans": snapshot.plan_count if snapshot else 0,
+            "loaded_at": snapshot.loaded_at if snapshot else None,
+            "reloads": self.reloads,
+            "failed_reloads": self.failed_reloads,
+            "last_error": self.last_error,
+            "watching": self._watcher is not None and self._watcher.is_alive(),
+        }
+
+
+CATALOG = CatalogStore(Config.CATALOG_PATH)
+
+
+def current_catalog() -> CatalogSnapshot:
+    """The catalog snapshot to use for the rest of this request or turn"""
+    return CATALOG.current()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Validate a catalog file or export the built-in catalog")
+    parser.add_argument("path", help="catalog file (.json, or .jsonl for one plan per line)")
+    parser.add_argument("--export", action="store_true", help="write the built-in catalog to PATH instead")
+    args = parser.parse_args()
+    if args.export:
+        write_catalog_file(CatalogStore().current().database, args.path)
+    snapshot = CatalogSnapshot.build(read_catalog_file(args.path), args.path)
+    print(f"{args.path}: version {snapshot.version}, {len(snapshot.database)} insurance types, "
+          f"{snapshot.plan_count} plans")
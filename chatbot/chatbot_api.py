@@ -1,34 +1,118 @@
 from .state import ChatbotState
-from .insurance_db import INSURANCE_DATABASE
-from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
+from .catalog import current_catalog
+from .plan_search import filters_from_message
+from .fast_extract import FastPathExtractor, FastPathStats
+from .llm_cache import CachedChatModel, LLMResponseCache
+from .llm_cassette import CassetteChatModel, LLMCassette
+from .llm_gateway import (
+    CircuitBreaker, LLMGateway, current_conversation, current_node, parse_node_priorities, parse_node_timeouts
+)
+from .metrics import METRICS
+from .prompts import build_prompt_registry
+from .single_flight import SingleFlightChatModel
+from .turn_stats import TurnStats, count_llm_call, finish_turn, record_node, start_turn
 from langgraph.graph import StateGraph, END
 from langchain_groq import ChatGroq
 from config import Config
 import textwrap
+import copy
 import json
 import re
-from langchain_core.prompts import ChatPromptTemplate
-from typing import TypedDict, List, Optional, Dict, Any
+import inspect
+import time
+from functools import wraps
+from typing import TypedDict, List, Optional, Dict, Any, AsyncIterator
+
+# Nodes whose LLM output is the user-facing reply; the extraction node's JSON is never streamed
+STREAMED_NODES = {
+    "ask_followup_with_llm",
+    "acknowledge_greeting",
+    "generate_response_with_llm",
+    "generate_suggestion_with_llm",
+    "accept_single_call_reply",
+}
+
 class InsuranceChatbotAPI:
     def __init__(self, llm_api_key: str = None):
         self.llm_api_key = llm_api_key or Config.GROQ_API_KEY
-        if not self.llm_api_key:
+        replaying = Config.LLM_CASSETTE_MODE == "replay"
+        if not self.llm_api_key and not replaying:
             raise ValueError("OpenAI API key is required. Set OPENAI_API_KEY environment variable or pass it directly.")
         
-        self.llm =  ChatGroq(api_key=Config.GROQ_API_KEY, model="llama3-70b-8192", temperature=0)
+        # The gateway owns timeouts and retries, so the client's own are turned off
+        upstream = ChatGroq(api_key=self.llm_api_key or "replay", model=Config.LLM_MODEL, temperature=0, max_retries=0)
+        self.cassette = None
+        if Config.LLM_CASSETTE_MODE:
+            self.cassette = LLMCassette(Config.LLM_CASSETTE_PATH, Config.LLM_CASSETTE_MODE)
+            upstream = CassetteChatModel(upstream, self.cassette, Config.LLM_MODEL, Config.LLM_CASSETTE_LATENCY_SCALE)
+        self.llm_gateway = LLMGateway(
+            upstream,
+            max_concurrency=Config.LLM_MAX_CONCURRENCY,
+            max_queue=Config.LLM_MAX_QUEUE,
+            default_timeout=Config.LLM_TIMEOUT_SECONDS,
+            node_timeouts=parse_node_timeouts(Config.LLM_NODE_TIMEOUTS),
+            max_retries=Config.LLM_MAX_RETRIES,
+            retry_base_delay=Config.LLM_RETRY_BASE_DELAY,
+            breaker=CircuitBreaker(Config.LLM_BREAKER_FAILURES, Config.LLM_BREAKER_RESET_SECONDS),
+            node_priorities=parse_node_priorities(Config.LLM_NODE_PRIORITIES),
+            default_priority=Config.LLM_DEFAULT_PRIORITY,
+            priority_step=Config.LLM_PRIORITY_STEP_SECONDS,
+        )
+        self.llm = self.llm_gateway
+        self.single_flight = None
+        if Config.LLM_SINGLE_FLIGHT_ENABLED:
+            # Between the cache and the gateway: collapsed callers never take a gateway slot
+            self.single_flight = SingleFlightChatModel(self.llm, Config.LLM_MODEL)
+            self.llm = self.single_flight
+        self.llm_cache = None
+        if Config.LLM_CACHE_ENABLED and Config.LLM_CASSETTE_MODE == "record":
+            # A cache hit never reaches the cassette, so the recording would miss those prompts
+            print("LLM response cache disabled while recording an LLM cassette")
+        elif Config.LLM_CACHE_ENABLED:
+            # Every node calls the model with temperature=0, so identical prompts get identical answers
+            self.llm_cache = LLMResponseCache(
+                max_entries=Config.LLM_CACHE_MAX_ENTRIES,
+                ttl_seconds=Config.LLM_CACHE_TTL_SECONDS,
+                disk_path=Config.LLM_CACHE_DISK_PATH,
+                max_disk_entries=Config.LLM_CACHE_DISK_MAX_ENTRIES,
+                purge_every=Config.LLM_CACHE_DISK_PURGE_EVERY,
+            )
+            self.llm = CachedChatModel(self.llm, self.llm_cache, Config.LLM_MODEL)
+        self.fast_extractor = FastPathExtractor() if Config.FAST_PATH_ENABLED else None
+        self.fast_path_stats = FastPathStats()
+        self.intent_classifier = None
+        if Config.INTENT_CLASSIFIER_PATH:
+            # Imported here so numpy is only loaded when a model is configured
+            from .intent_classifier import IntentClassifier
+            try:
+                self.intent_classifier = IntentClassifier.load(Config.INTENT_CLASSIFIER_PATH)
+                self.intent_rules = self.fast_extractor or FastPathExtractor()
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Intent classifier not loaded, extraction stays on the LLM: {e}")
+        self.intent_log = None
+        if Config.INTENT_LOG_PATH:
+            from .intent_classifier import IntentLog
+            self.intent_log = IntentLog(Config.INTENT_LOG_PATH)
+        self.prompts = build_prompt_registry()
+        self.single_call = Config.CHAT_SINGLE_CALL
+        self.turn_stats = TurnStats()
+        self._catalog_summary = (None, "")
         self.graph = self._build_graph()
     
     def _build_graph(self) -> StateGraph:
         """Build the LangGraph workflow with LLM integration"""
         graph = StateGraph(ChatbotState)
+
+        def add_node(name, fn):
+            graph.add_node(name, self._timed_node(name, fn))
         
         # Add nodes
-        graph.add_node("extract_info_with_llm", self._extract_info_with_llm)
-        graph.add_node("ask_followup_with_llm", self._ask_followup_with_llm)
-        graph.add_node("acknowledge_greeting", self._acknowledge_greeting)
-        graph.add_node("search_documents", self._search_documents)
-        graph.add_node("generate_response_with_llm", self._generate_response_with_llm)
-        graph.add_node("generate_suggestion_with_llm", self._generate_suggestion_with_llm)
+        add_node("extract_info_with_llm", self._extract_info_with_llm)
+        add_node("ask_followup_with_llm", self._ask_followup_with_llm)
+        add_node("acknowledge_greeting", self._acknowledge_greeting)
+        add_node("search_documents", self._search_documents)
+        add_node("generate_response_with_llm", self._generate_response_with_llm)
+        add_node("generate_suggestion_with_llm", self._generate_suggestion_with_llm)
         
         # Define edges
         graph.add_conditional_edges(
@@ -47,10 +131,179 @@ class InsuranceChatbotAPI:
         graph.add_edge("search_documents", "generate_response_with_llm")
         graph.add_edge("generate_response_with_llm", END)
         graph.add_edge("generate_suggestion_with_llm", END)
-        # Set entry point
-        graph.set_entry_point("extract_info_with_llm")
+
+        if self.single_call:
+            # One LLM call extracts the fields and drafts the reply; the draft is checked
+            # against the catalog and the two-call nodes above are only used as a fallback
+            add_node("extract_and_reply_with_llm", self._extract_and_reply_with_llm)
+            add_node("verify_single_call_reply", self._verify_single_call_reply)
+            add_node("accept_single_call_reply", self._accept_single_call_reply)
+            graph.add_conditional_edges(
+                "extract_and_reply_with_llm",
+                self._route_single_call,
+                {
+                    "accept_reply": "accept_single_call_reply",
+                    "verify_reply": "verify_single_call_reply",
+                    "collect_info": "ask_followup_with_llm",
+                    "acknowledge_greeting": "acknowledge_greeting",
+                    "search_docs": "search_documents",
+                    "generate_suggestion_with_llm": "generate_suggestion_with_llm"
+                }
+            )
+            graph.add_conditional_edges(
+                "verify_single_call_reply",
+                self._route_verified_reply,
+                {
+                    "accept_reply": "accept_single_call_reply",
+                    "generate_response_with_llm": "generate_response_with_llm",
+                    "generate_suggestion_with_llm": "generate_suggestion_with_llm"
+                }
+            )
+            graph.add_edge("accept_single_call_reply", END)
+            graph.set_entry_point("extract_and_reply_with_llm")
+        else:
+            # Set entry point
+            graph.set_entry_point("extract_info_with_llm")
         
         return graph.compile()
+
+    @staticmethod
+    def _timed_node(name: str, fn):
+        """Wrap a node so its wall time lands in the node duration histogram and the turn's path"""
+        if inspect.iscoroutinefunction(fn):
+            @wraps(fn)
+            async def timed(state):
+                record_node(name)
+                start = time.perf_counter()
+                try:
+                    return await fn(state)
+                finally:
+                    METRICS.observe("chatbot_node_duration_seconds", time.perf_counter() - start, node=name)
+        else:
+            @wraps(fn)
+            def timed(state):
+                record_node(name)
+                start = time.perf_counter()
+                try:
+                    return fn(state)
+                finally:
+                    METRICS.observe("chatbot_node_duration_seconds", time.perf_counter() - start, node=name)
+        return timed
+
+    async def _invoke_llm(self, node: str, messages):
+        """Every node's LLM call goes through here.
+
+        Raises whatever the gateway raises (timeouts, LLMUnavailable when the
+        queue is full or the circuit is open); each node catches it and answers
+        with its fallback text.
+        """
+        count_llm_call()
+        token = current_node.set(node)
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            response = await self.llm.ainvoke(messages)
+            outcome = "cache_hit" if response.response_metadata.get("cache") == "hit" else "ok"
+            return response
+        finally:
+            current_node.reset(token)
+            METRICS.observe("chatbot_llm_call_duration_seconds", time.perf_counter() - start, node=node)
+            METRICS.inc("chatbot_llm_calls_total", node=node, outcome=outcome)
+
+    @staticmethod
+    def _fallback(node: str) -> None:
+        METRICS.inc("chatbot_fallbacks_total", node=node)
+
+    @property
+    def catalog_summary(self) -> str:
+        """One line per plan, used by the single-call prompt to draft replies; rebuilt when the catalog reloads"""
+        catalog = current_catalog()
+        version, summary = self._catalog_summary
+        if version != catalog.version:
+            summary = "\n".join(
+                f"- {entry.insurance_type} | {entry.plan_tier} | ages {entry.age_bracket} | "
+                f"premium {entry.plan.get('premium', 'N/A')} | coverage {entry.plan.get('coverage', 'N/A')}"
+                for entry in catalog.index.entries()
+            )
+            self._catalog_summary = (catalog.version, summary)
+        return summary
+
+    async def _extract_and_reply_with_llm(self, state: ChatbotState) -> ChatbotState:
+        """Extract the user's details and draft the reply in one structured LLM call"""
+        user_message = state["user_query"]
+        state["candidate_response"] = None
+        if self.fast_extractor:
+            fast = self.fast_extractor.extract(user_message)
+            if fast and fast.confidence >= Config.FAST_PATH_MIN_CONFIDENCE:
+                # Extraction is free, so the normal path already costs a single call
+                self._apply_extraction(state, fast.fields)
+                self.fast_path_stats.record_hit()
+                return self._update_missing_info(state)
+
+        history_text = "\n".join(
+            f"{msg['role']}: {msg['content']}" for msg in state.get("messages", [])[-4:-1]
+        )
+        single_call_prompt = self.prompts["single_call"].format_messages(
+            catalog=self.catalog_summary,
+            user_age=state.get("user_age") or "unknown",
+            insurance_type=state.get("insurance_type") or "unknown",
+            insured_for=state.get("insured_for") or "unknown",
+            history_text=history_text,
+            user_message=user_message
+        )
+        try:
+            llm_response = await self._invoke_llm("extract_and_reply_with_llm", single_call_prompt)
+            result = json.loads(llm_response.content)
+            self._apply_extraction(state, result)
+            if isinstance(result.get("reply"), str) and result["reply"].strip():
+                state["candidate_response"] = result["reply"]
+            else:
+                self.turn_stats.record_fallback("single_call")
+                self._fallback("extract_and_reply_with_llm")
+        except Exception:
+            self.turn_stats.record_fallback("single_call")
+            self._fallback("extract_and_reply_with_llm")
+            age_match = re.search(r'\b(\d{1,2})\b', user_message)
+            if age_match and 18 <= int(age_match.group(1)) <= 100:
+                state["user_age"] = int(age_match.group(1))
+        return self._update_missing_info(state)
+
+    def _route_single_call(self, state: ChatbotState) -> str:
+        """Accept the drafted reply, check it against the catalog, or fall back to the two-call path"""
+        route = self._should_collect_info(state)
+        if not state.get("candidate_response"):
+            return route
+        if route in ("collect_info", "acknowledge_greeting"):
+            return "accept_reply"
+        return "verify_reply"
+
+    def _verify_single_call_reply(self, state: ChatbotState) -> ChatbotState:
+        """Keep the drafted reply only if it quotes the premium of every matching plan"""
+        state = self._search_documents(state)
+        reply = " ".join(state["candidate_response"].lower().split())
+        docs = state["relevant_docs"]
+        grounded = bool(docs) and all(
+            " ".join(str(doc["data"].get("premium", "")).lower().split()) in reply for doc in docs
+        )
+        if not grounded:
+            state["candidate_response"] = None
+            self.turn_stats.record_fallback("single_call")
+            self._fallback("verify_single_call_reply")
+        return state
+
+    def _route_verified_reply(self, state: ChatbotState) -> str:
+        if state.get("candidate_response"):
+            return "accept_reply"
+        if state.get("intent") == "ask_suggestion" and state.get("relevant_docs"):
+            return "generate_suggestion_with_llm"
+        return "generate_response_with_llm"
+
+    def _accept_single_call_reply(self, state: ChatbotState) -> ChatbotState:
+        response = state["candidate_response"]
+        state["candidate_response"] = None
+        state["last_response"] = response
+        state["messages"].append({"role": "assistant", "content": response})
+        return state
     
     ##To Do- working on this changd in should_collect_info and also in nodes and edges.
     async def _acknowledge_greeting(self, state: ChatbotState) -> ChatbotState:
@@ -60,29 +313,15 @@ class InsuranceChatbotAPI:
         insured_for = state.get("insured_for", "")
         
         # Create engaging response with options
-        greeting_prompt = ChatPromptTemplate.from_messages([
-            SystemMessage(content=f"""You are a friendly insurance assistant. 
-            The user just greeted you and you have their complete info:
-            - Age: {user_age}
-            - Insurance Type: {insurance_type}
-            - Insured For: {insured_for}
-            
-            Generate an engaging greeting that:
-            1. Acknowledges them warmly
-            2. Confirms their info briefly
-            3. Offers 2-3 specific next steps like:
-            - "Would you like to see available plans?"
-            - "Should I recommend the best options for you?"
-            - "Do you want to compare different coverage levels?"
-            
-            Keep it friendly, concise, and action-oriented."""),
-            HumanMessage(content="Generate engaging greeting with options")
-        ])
+        greeting_prompt = self.prompts["greeting"].format_messages(
+            user_age=user_age, insurance_type=insurance_type, insured_for=insured_for
+        )
         
         try:
-            llm_response = await self.llm.ainvoke(greeting_prompt.format_messages())
+            llm_response = await self._invoke_llm("acknowledge_greeting", greeting_prompt)
             response = llm_response.content
         except Exception:
+            self._fallback("acknowledge_greeting")
             # Fallback engaging response
             response = f"""Hello! 👋 Great to meet you! 
 
@@ -107,23 +346,28 @@ class InsuranceChatbotAPI:
         insurance_type = state.get("insurance_type")
         insured_for = state.get("insured_for")
 
-        suggestion_prompt = ChatPromptTemplate.from_messages([
-            SystemMessage(content="""You are an expert insurance advisor.
-            Based on the given plans, suggest the best choice, explain why, 
-            and include pros/cons in bullet points. Be friendly and clear."""),
-            HumanMessage(content=f"""
-            User Info:
-            Age: {user_age}
-            Insurance Type: {insurance_type}
-            Insured For: {insured_for}
-
-            Plans:
-            {json.dumps(relevant_docs, indent=2)}
-            """)
-        ])
+        suggestion_prompt = self.prompts["suggestion"].format_messages(
+            user_age=user_age,
+            insurance_type=insurance_type,
+            insured_for=insured_for,
+            plans=json.dumps(relevant_docs, indent=2)
+        )
+
+        try:
+            llm_response = await self._invoke_llm("generate_suggestion_with_llm", suggestion_prompt)
+            response = llm_response.content
+        except Exception:
+            self._fallback("generate_suggestion_with_llm")
+            # Fallback: list the plans so the user still gets something to compare
+            plan_lines = "\n".join(
+                f"• **{doc.get('plan_tier', 'N/A').title()}**: {doc['data'].get('premium', 'Contact for quote')}, "
+                f"coverage {doc['data'].get('coverage', 'Standard coverage')}"
+                for doc in relevant_docs
+            )
+            response = f"""Here are the {insurance_type} plans that fit your profile:
+{plan_lines}
 
-        llm_response = await self.llm.ainvoke(suggestion_prompt.format_messages())
-        response = llm_response.content
+I can't put together a detailed recommendation right now. Would you like more details about any of these plans? 😊"""
 
         state["last_response"] = response
         state["messages"].append({"role": "assistant", "content": response})
@@ -132,53 +376,56 @@ class InsuranceChatbotAPI:
     async def _extract_info_with_llm(self, state: ChatbotState) -> ChatbotState:
         """Use LLM to extract age and insurance type from user message"""
         user_message = state["user_query"]
-        print(f"Extracting info from message: {user_message}")
-        extraction_prompt = ChatPromptTemplate.from_messages([
-            SystemMessage(content="""You are an intent and information extraction assistant.
-
-        Return ONLY a JSON object with this format:
-        {
-            "age": number_or_null,
-            "insurance_type": "health" | "life" | "auto" | null,
-            "insured_for": "self" | "spouse" | "child" | "parent" | null,
-            "intent": "get_insurance_info" | "ask_suggestion" | "other"
-        }
-
-        Rules:
-        - "get_insurance_info": User is giving info or asking for an insurance plan.
-        - "ask_suggestion": User is asking for advice, recommendation, or comparison based on existing info.
-        - "other": Anything unrelated to insurance.
-        - "greet": If the user says "hi", "hello", etc.
-
-        Examples:
-        - "I'm 25 and need health insurance" -> {"age": 25, "insurance_type": "health", "insured_for": "self", "intent": "get_insurance_info"}
-        - "Looking for car insurance for my father" -> {"age": null, "insurance_type": "auto", "insured_for": "parent", "intent": "get_insurance_info"}
-        - "My wife needs life insurance, she's 30" -> {"age": 30, "insurance_type": "life", "insured_for": "spouse", "intent": "get_insurance_info"}
-        - "What do you suggest?" -> {"age": null, "insurance_type": null, "insured_for": null, "intent": "ask_suggestion"}
-        - "Tell me a joke" -> {"age": null, "insurance_type": null, "insured_for": null, "intent": "other"}
-        - "If Greetings {"age": null, "insurance_type": null, "insured_for": null, "intent": "greet"}"""),
-            HumanMessage(content=f"Extract from: {user_message}")
-        ])
+        # Obvious turns ("hi", "I'm 25", "health insurance for my wife") never reach the LLM
+        if self.fast_extractor:
+            fast = self.fast_extractor.extract(user_message)
+            if fast and fast.confidence >= Config.FAST_PATH_MIN_CONFIDENCE:
+                self._apply_extraction(state, fast.fields)
+                self.fast_path_stats.record_hit()
+                return self._update_missing_info(state)
+        # Then the trained intent classifier, which defers to the LLM when it is unsure
+        if self.intent_classifier:
+            local = self.intent_classifier.extract(user_message, self.intent_rules,
+                                                   Config.INTENT_CLASSIFIER_MIN_CONFIDENCE,
+                                                   Config.FAST_PATH_MIN_CONFIDENCE)
+            if local is not None:
+                self._apply_extraction(state, local)
+                self.fast_path_stats.record_classifier_hit()
+                return self._update_missing_info(state)
+
+        extraction_prompt = self.prompts["extraction"].format_messages(user_message=user_message)
         
+        start = time.perf_counter()
         try:
-            llm_response = await self.llm.ainvoke(extraction_prompt.format_messages())
+            llm_response = await self._invoke_llm("extract_info_with_llm", extraction_prompt)
             extracted_data = json.loads(llm_response.content)
-            print("LLM extraction response:", extracted_data)
-            if extracted_data["age"] is not None:
-                state["user_age"] = extracted_data["age"]
-
-            if extracted_data["insurance_type"] is not None:
-                state["insurance_type"] = extracted_data["insurance_type"]
-
-            if extracted_data["insured_for"] is not None:
-                state["insured_for"] = extracted_data["insured_for"]
-            
-            state["intent"] = extracted_data["intent"]
+            self._apply_extraction(state, extracted_data)
+            if self.intent_log:
+                self.intent_log.record(user_message, extracted_data, time.perf_counter() - start)
         except (json.JSONDecodeError, Exception):
+            self._fallback("extract_info_with_llm")
             # Fallback to regex if LLM fails
             age_match = re.search(r'\b(\d{1,2})\b', user_message)
             if age_match and 18 <= int(age_match.group(1)) <= 100:
                 state["user_age"] = int(age_match.group(1))
+        self.fast_path_stats.record_llm(time.perf_counter() - start)
+        return self._update_missing_info(state)
+
+    def _apply_extraction(self, state: ChatbotState, extracted_data: Dict[str, Any]) -> None:
+        """Merge extracted fields into the state, keeping known values the message didn't mention"""
+        if extracted_data["age"] is not None:
+            state["user_age"] = extracted_data["age"]
+
+        if extracted_data["insurance_type"] is not None:
+            state["insurance_type"] = extracted_data["insurance_type"]
+
+        if extracted_data["insured_for"] is not None:
+            state["insured_for"] = extracted_data["insured_for"]
+        
+        state["intent"] = extracted_data["intent"]
+
+    def _update_missing_info(self, state: ChatbotState) -> ChatbotState:
+        """Record which of age, insurance_type and insured_for are still unknown"""
         missing_info = []
         if not state.get("user_age"):
             missing_info.append("age")
@@ -222,7 +469,6 @@ class InsuranceChatbotAPI:
     async def _ask_followup_with_llm(self, state) -> ChatbotState:
 
         """Use LLM to generate natural follow-up questions"""
-        print("state in follow up:", state)
         missing_info = state.get("missing_info", [])
         conversation_history = state.get("messages", [])
         intent = state.get("intent")
@@ -231,43 +477,21 @@ class InsuranceChatbotAPI:
             for msg in conversation_history[-3:]
         ])
         
-        followup_prompt = ChatPromptTemplate.from_messages([
-        SystemMessage(content="""You are a friendly insurance assistant. 
-    CRITICAL RULES:
-        
-        1. ONLY ask for the missing information: {', '.join(missing_info)}
-        2. DO NOT ask about coverage details, family members, medical conditions, etc.
-        3. Keep it simple and direct
-        4. Available insurance types: health, life, auto
-        5. Insured for options: self, spouse, child, parent
-        6. Only ask for the missing information, nothing else!   
-        7. For FIRST-TIME greetings (when conversation history is empty or minimal), greet warmly and say "How may I assist you today?"
-        8. For SUBSEQUENT greetings (when conversation history exists), acknowledge the greeting briefly and ask for missing info.
-        
-        Current user info:
-        - Age: {state.get('user_age', 'unknown')}
-        - Insurance type: {state.get('insurance_type', 'unknown')}
-        - Insured For: {state.get('insured_for', 'unknown')}"""),
-    HumanMessage(content=f"""
-    Missing information that I need: {', '.join(missing_info)}
-    Intent: {intent}
-    Is this first interaction: {len(history_text.strip()) < 50}
-    
-    Conversation history:
-    {history_text}
-    
-    INSTRUCTIONS:
-    - If intent is "greet" AND this is the first interaction (minimal/no history), respond with warm greeting + "How may I assist you today?"
-    - If intent is "greet" AND this is NOT the first interaction (history exists), acknowledge greeting + ask for missing info
-    - For all other intents, ask for missing information only
-    
-    Generate appropriate response based on above rules.""")
-])
+        followup_prompt = self.prompts["followup"].format_messages(
+            missing_info=", ".join(missing_info),
+            user_age=state.get("user_age") or "unknown",
+            insurance_type=state.get("insurance_type") or "unknown",
+            insured_for=state.get("insured_for") or "unknown",
+            intent=intent,
+            is_first_interaction=len(history_text.strip()) < 50,
+            history_text=history_text
+        )
         
         try:
-            llm_response = await self.llm.ainvoke(followup_prompt.format_messages())
+            llm_response = await self._invoke_llm("ask_followup_with_llm", followup_prompt)
             response = llm_response.content
         except Exception as e:
+            self._fallback("ask_followup_with_llm")
             # Fallback response if LLM fails
             if "age" in missing_info and "insurance_type" in missing_info:
                 response = "Hi! I'd be happy to help you find insurance options. Could you tell me your age and what type of insurance you're looking for? (health, life, or auto)"
@@ -286,20 +510,25 @@ class InsuranceChatbotAPI:
         """Search insurance documents"""
         age = state["user_age"]
         insurance_type = state["insurance_type"]
-        
-        age_bracket = self._get_age_bracket(age, insurance_type)
-        
-        relevant_docs = []
-        if insurance_type in INSURANCE_DATABASE:
-            for plan_tier, plans_by_age in INSURANCE_DATABASE[insurance_type].items():
-                if age_bracket in plans_by_age:
-                    doc = plans_by_age[age_bracket]
-                    relevant_docs.append({
-                        "insurance_type": insurance_type,
-                        "plan_tier": plan_tier,
-                        "age_bracket": age_bracket,
-                        "data": doc
-                    })
+        catalog = current_catalog()
+        entries = catalog.index.lookup(insurance_type, age)
+
+        # "cashless ... with maternity under $200" narrows the plans through the catalog's search index
+        filters = filters_from_message(state.get("user_query") or "", catalog.search)
+        if filters and entries:
+            filters.update(insurance_type=[insurance_type], age=age, limit=len(entries))
+            # When nothing matches every filter, show all plans for the age rather than none
+            entries = catalog.search.search(filters, catalog.index).entries or entries
+
+        relevant_docs = [
+            {
+                "insurance_type": entry.insurance_type,
+                "plan_tier": entry.plan_tier,
+                "age_bracket": entry.age_bracket,
+                "data": entry.plan
+            }
+            for entry in entries
+        ]
 
         state["relevant_docs"] = relevant_docs
         # print("Relevant documents found:", relevant_docs)
@@ -313,13 +542,13 @@ class InsuranceChatbotAPI:
         insured_for = state["insured_for"]
         if not relevant_docs:
             try:
-                no_results_prompt = ChatPromptTemplate.from_messages([
-                    SystemMessage(content="You are a helpful insurance assistant. Generate a polite response when no insurance options are found."),
-                    HumanMessage(content=f"No insurance options found for {insured_for} {insurance_type} insurance for age {user_age}. Suggest contacting support.")
-                ])
-                llm_response = await self.llm.ainvoke(no_results_prompt.format_messages())
+                no_results_prompt = self.prompts["no_results"].format_messages(
+                    insured_for=insured_for, insurance_type=insurance_type, user_age=user_age
+                )
+                llm_response = await self._invoke_llm("generate_response_with_llm", no_results_prompt)
                 response = llm_response.content
             except Exception:
+                self._fallback("generate_response_with_llm")
                 response = f"I apologize, but I couldn't find specific {insurance_type} insurance options for your age group. Please contact our support team for personalized assistance."
         else:
             all_insurance_info = []
@@ -346,21 +575,12 @@ class InsuranceChatbotAPI:
             final_output = "\n" + "-"*40 + "\n".join(all_insurance_info)
             
             try:
-                response_prompt = ChatPromptTemplate.from_messages([
-                    SystemMessage(content="""You are a helpful insurance assistant. 
-                    Present the list of insurance information in a friendly, well-formatted way using emojis and clear structure.
-                    Be enthusiastic but professional."""),
-                    HumanMessage(content=f"""
-                    Present this insurance information to the user:
-                    {final_output}
-                    If there are multiple options at the end summarize them and compare them.
-                    Make it engaging and ask if they want more details.
-                    """)
-                ])
+                response_prompt = self.prompts["response"].format_messages(insurance_info=final_output)
                 
-                llm_response = await self.llm.ainvoke(response_prompt.format_messages())
+                llm_response = await self._invoke_llm("generate_response_with_llm", response_prompt)
                 response = llm_response.content
             except Exception:
+                self._fallback("generate_response_with_llm")
                 response = f"""🎯 Great! I found {insurance_type} insurance options for you:
 📊 **Premium**: {doc_data.get('premium', 'Contact for quote')}
 🛡️ **Coverage**: {doc_data.get('coverage', 'Standard coverage')}
@@ -374,23 +594,12 @@ Would you like more details about this plan or have any questions? 😊"""
     
     def _get_age_bracket(self, age: int, insurance_type: str) -> str:
         """Get age bracket for insurance type"""
-        if insurance_type == "health":
-            if 18 <= age <= 25: return "18-25"
-            elif 26 <= age <= 35: return "26-35"
-            elif 36 <= age <= 50: return "36-50"
-            elif 51 <= age <= 65: return "51-65"
-        elif insurance_type == "life":
-            if 18 <= age <= 30: return "18-30"
-            elif 31 <= age <= 45: return "31-45"
-            elif 46 <= age <= 60: return "46-60"
-        elif insurance_type == "auto":
-            if 18 <= age <= 25: return "18-25"
-            elif 26 <= age <= 40: return "26-40"
-            elif 41 <= age <= 65: return "41-65"
-        return "general"
+        return current_catalog().index.bracket_for(insurance_type, age) or "general"
     
-    async def chat(self, user_input: str, state: Optional[ChatbotState] = None) -> tuple[str, ChatbotState]:
-        """Main chat interface"""
+    async def chat(
+        self, user_input: str, state: Optional[ChatbotState] = None, conversation_id: Optional[str] = None
+    ) -> tuple[str, ChatbotState]:
+        """Main chat interface; `conversation_id` lets the LLM gateway queue conversations fairly"""
         if state is None:
             state = ChatbotState(
                 messages=[],
@@ -403,13 +612,70 @@ Would you like more details about this plan or have any questions? 😊"""
                 last_response="",
                 insured_for= None,
                 intent=None,
-                greeting_detected=False  # Initialize greeting_detected as False
+                greeting_detected=False,  # Initialize greeting_detected as False
+                history_summary="",
+                history_overflow=[],
+                history_trimmed=0
             )
         
         state["messages"].append({"role": "user", "content": user_input})
         state["user_query"] = user_input
         
         # Run the graph
-        result = await self.graph.ainvoke(state)
+        token = start_turn()
+        conversation_token = current_conversation.set(conversation_id)
+        try:
+            result = await self.graph.ainvoke(state)
+        finally:
+            current_conversation.reset(conversation_token)
+            self._finish_turn(token)
         
-        return result["last_response"], result
\ No newline at end of file
+        return result["last_response"], result
+
+    def _finish_turn(self, token) -> None:
+        trace = finish_turn(token)
+        self.turn_stats.record(self._mode(), trace.llm_calls)
+        METRICS.observe("chatbot_turn_duration_seconds", time.perf_counter() - trace.started, path=trace.path)
+
+    def _mode(self) -> str:
+        return "single_call" if self.single_call else "two_call"
+
+    async def stream_chat(
+        self, user_input: str, state: ChatbotState, conversation_id: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Run one turn and yield events as they happen.
+
+        Yields {"event": "token"} for each reply token, {"event": "node"} when a
+        graph node finishes and a final {"event": "done"} carrying the updated
+        state. The graph works on a copy, so the caller's state is untouched
+        unless the run completes and the caller commits the final state.
+        """
+        state = copy.deepcopy(state)
+        state["messages"].append({"role": "user", "content": user_input})
+        state["user_query"] = user_input
+
+        result = state
+        streamed = set()
+        token = start_turn()
+        conversation_token = current_conversation.set(conversation_id)
+        try:
+            async for mode, chunk in self.graph.astream(state, stream_mode=["messages", "updates", "values"]):
+                if mode == "messages":
+                    message, metadata = chunk
+                    node = metadata.get("langgraph_node")
+                    if node in STREAMED_NODES and message.content:
+                        streamed.add(node)
+                        yield {"event": "token", "node": node, "content": message.content}
+                elif mode == "updates":
+                    for node, update in chunk.items():
+                        # Cached or fallback replies arrive whole; send them as a single token
+                        if node in STREAMED_NODES and node not in streamed and update.get("last_response"):
+                            yield {"event": "token", "node": node, "content": update["last_response"]}
+                        yield {"event": "node", "node": node}
+                else:
+                    result = chunk
+        finally:
+            current_conversation.reset(conversation_token)
+            self._finish_turn(token)
+
+        yield {"event": "done", "response": result["last_response"], "state": result}
@@ -0,0 +1,137 @@
+import sys
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+
+from .age_index import PlanEntry
+from .catalog import current_catalog
+from .state import ChatbotState
+
+ROLES = ("user", "assistant", "system")
+_ROLE_CODES = {role: code for code, role in enumerate(ROLES)}
+
+# Fields that only ever hold a handful of distinct values; interning makes every conversation share one copy
+_INTERNED_FIELDS = ("insurance_type", "insured_for", "intent", "conversation_stage")
+
+# missing_info is one of very few combinations, so identical tuples are shared too
+_missing_info_tuples: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _shared_missing_info(missing_info: List[str]) -> Tuple[str, ...]:
+    key = tuple(sys.intern(item) for item in missing_info)
+    return _missing_info_tuples.setdefault(key, key)
+
+
+class MessageLog:
+    """Chat messages as a role-code array plus a list of contents, instead of one dict per message"""
+
+    __slots__ = ("roles", "contents")
+
+    def __init__(self, messages: List[Dict[str, str]] = ()):
+        self.roles = array("B", (_ROLE_CODES[message["role"]] for message in messages))
+        self.contents = [message["content"] for message in messages]
+
+    def __len__(self) -> int:
+        return len(self.contents)
+
+    def to_dicts(self) -> List[Dict[str, str]]:
+        return [{"role": ROLES[code], "content": content} for code, content in zip(self.roles, self.contents)]
+
+    def __getitem__(self, index: slice) -> List[Dict[str, str]]:
+        """A slice as message dicts, without building the rest of the log"""
+        return [{"role": ROLES[code], "content": content} for code, content in zip(self.roles[index], self.contents[index])]
+
+
+def _plan_refs(docs: List[Dict[str, Any]]) -> tuple:
+    """Replace documents built from the catalog with the shared catalog entry; anything else is kept as is"""
+    refs = []
+    index = current_catalog().index
+    for doc in docs:
+        entry = index.plan_ref(doc.get("insurance_type"), doc.get("plan_tier"), doc.get("age_bracket"))
+        refs.append(entry if entry is not None and entry.plan == doc.get("data") else doc)
+    return tuple(refs)
+
+
+def _fresh(value: Any) -> Any:
+    """Copy of a JSON-like value, so a node editing it can't reach the shared catalog or stored state"""
+    if isinstance(value, dict):
+        return {key: _fresh(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_fresh(item) for item in value]
+    return value
+
+
+def _plan_docs(refs: tuple) -> List[Dict[str, Any]]:
+    return [
+        {
+            "insurance_type": ref.insurance_type,
+            "plan_tier": ref.plan_tier,
+            "age_bracket": ref.age_bracket,
+            "data": _fresh(ref.plan),
+        } if isinstance(ref, PlanEntry) else _fresh(ref)
+        for ref in refs
+    ]
+
+
+class CompactState:
+    """Memory-lean form of a ChatbotState for long-lived storage.
+
+    Messages live in a MessageLog, enum-like strings are interned, and
+    relevant_docs hold references to the shared catalog entries. Keys the
+    slots don't know about are kept in `extra` so nothing is dropped.
+    """
+
+    __slots__ = (
+        "messages", "user_age", "insurance_type", "user_query", "relevant_docs", "missing_info",
+        "conversation_stage", "last_response", "insured_for", "intent", "greeting_detected",
+        "candidate_response", "history_summary", "history_overflow", "history_trimmed", "extra",
+    )
+
+    def __init__(self, state: ChatbotState):
+        extra = dict(state)
+        self.messages = MessageLog(extra.pop("messages", []))
+        overflow = extra.pop("history_overflow", None)
+        self.history_overflow = MessageLog(overflow) if overflow else None
+        self.history_trimmed = extra.pop("history_trimmed", 0) or 0
+        self.relevant_docs = _plan_refs(extra.pop("relevant_docs", []) or [])
+        self.missing_info = _shared_missing_info(extra.pop("missing_info", []) or [])
+        for field in _INTERNED_FIELDS:
+            setattr(self, field, _intern(extra.pop(field, None)))
+        for field in ("user_age", "user_query", "last_response", "greeting_detected",
+                      "candidate_response", "history_summary"):
+            setattr(self, field, extra.pop(field, None))
+        self.extra = extra or None
+
+    def to_state(self) -> ChatbotState:
+        """Rebuild the dict the LangGraph nodes work with; every mutable value is a fresh copy"""
+        state = ChatbotState(
+            messages=self.messages.to_dicts(),
+            user_age=self.user_age,
+            insurance_type=self.insurance_type,
+            user_query=self.user_query,
+            relevant_docs=_plan_docs(self.relevant_docs),
+            missing_info=list(self.missing_info),
+            conversation_stage=self.conversation_stage,
+            last_response=self.last_response,
+            insured_for=self.insured_for,
+            intent=self.intent,
+            greeting_detected=self.greeting_detected,
+            candidate_response=self.candidate_response,
+            history_summary=self.history_summary or "",
+            history_overflow=self.history_overflow.to_dicts() if self.history_overflow else [],
+            history_trimmed=self.history_trimmed,
+        )
+        if self.extra:
+            state.update(_fresh(self.extra))
+        return state
+
+
+def pack_state(state: ChatbotState) -> CompactState:
+    return CompactState(state)
+
+
+def unpack_state(compact: CompactState) -> ChatbotState:
+    return compact.to_state()
@@ -0,0 +1,204 @@
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .conversation_store import InMemoryConversationStore
+
+# File layout: MAGIC, then records of <length:u32><kind:u8><created_at:f64><last_activity:f64><id_len:u16><id><state>,
+# where length counts the bytes after itself and state is serialize_state output (empty for deletes)
+MAGIC = b"CONVSNAP1\n"
+_HEADER = struct.Struct(">IBddH")
+_PUT = 1
+_DELETE = 2
+
+# Rewrite the whole file once it holds this many times more records than there are live conversations
+_COMPACT_RATIO = 3
+_COMPACT_MIN_RECORDS = 10000
+
+
+def _encode(kind: int, conversation_id: str, created_at: float, last_activity: float, state: bytes) -> bytes:
+    key = conversation_id.encode("utf-8")
+    return _HEADER.pack(_HEADER.size - 4 + len(key) + len(state), kind, created_at, last_activity, len(key)) + key + state
+
+
+def read_snapshot(path: str) -> Tuple[Dict[str, Tuple[bytes, float, float]], int, int]:
+    """Replay a snapshot file into {id: (state bytes, created_at, last_activity)}.
+
+    Only the fixed-size record headers are parsed; state bytes are kept as is
+    and decoded by the store on first use. Returns the live records, the
+    number of records read and the offset of the end of the last complete
+    record (a crash mid-append leaves a torn tail after it).
+    """
+    records: Dict[str, Tuple[bytes, float, float]] = {}
+    count = 0
+    with open(path, "rb") as handle:
+        size = os.fstat(handle.fileno()).st_size
+        if size < len(MAGIC):
+            return records, 0, 0
+        with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            if data[:len(MAGIC)] != MAGIC:
+                raise ValueError(f"{path} is not a conversation snapshot")
+            offset = len(MAGIC)
+            while offset + _HEADER.size <= size:
+                length, kind, created_at, last_activity, key_length = _HEADER.unpack_from(data, offset)
+                end = offset + 4 + length
+                if end > size:
+                    break
+                key_end = offset + _HEADER.size + key_length
+                conversation_id = data[offset + _HEADER.size:key_end].decode("utf-8")
+                if kind == _PUT:
+                    records[conversation_id] = (data[key_end:end], created_at, last_activity)
+                else:
+                    records.pop(conversation_id, None)
+                count += 1
+                offset = end
+    return records, count, offset
+
+
+class ConversationSnapshotter:
+    """Keeps an append-only snapshot file of an in-memory conversation store and restores it at startup.
+
+    Every `interval` seconds the conversations written since the previous
+    pass are appended (removed ones as delete records), so a pass costs
+    O(changed conversations). When superseded records pile up the file is
+    rewritten from the live store and swapped in with an atomic rename.
+    """
+
+    def __init__(self, store: InMemoryConversationStore, path: str):
+        self.store = store
+        self.path = path
+        self.records_in_file = 0
+        self.snapshots = 0
+        self.rewrites = 0
+        self.restored = 0
+        self.restore_seconds: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._restored = threading.Event()
+        self._handle = None
+        self._write_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        store.track_changes()
+
+    def restore(self) -> int:
+        """Load the snapshot file into the store; returns how many conversations were restored"""
+        started = time.perf_counter()
+        try:
+            if not os.path.exists(self.path):
+                return 0
+            records, count, valid_end = read_snapshot(self.path)
+            if valid_end and valid_end < os.path.getsize(self.path):
+                print(f"Conversation snapshot {self.path}: dropping a torn record at offset {valid_end}")
+                os.truncate(self.path, valid_end)
+            self.records_in_file = count
+            cutoff = time.time() - self.store.ttl.total_seconds()
+            self.restored = self.store.restore(
+                (conversation_id, blob, created_at, last_activity)
+                for conversation_id, (blob, created_at, last_activity) in records.items()
+                if last_activity >= cutoff
+            )
+            return self.restored
+        finally:
+            self.restore_seconds = time.perf_counter() - started
+            self._restored.set()
+
+    def wait_restored(self, timeout: float) -> bool:
+        """Block until the startup restore has finished (or `timeout` passes)"""
+        return self._restored.wait(timeout)
+
+    @property
+    def restoring(self) -> bool:
+        return not self._restored.is_set()
+
+    def _open(self):
+        if self._handle is None:
+            self._handle = open(self.path, "ab")
+            if self._handle.tell() == 0:
+                self._handle.write(MAGIC)
+        return self._handle
+
+    def snapshot(self) -> int:
+        """Append the changes since the last pass; returns the number of records written"""
+        with self._write_lock:
+            if self.records_in_file > max(_COMPACT_MIN_RECORDS, _COMPACT_RATIO * len(self.store)):
+                return self._rewrite()
+            changed, removed = self.store.drain_changes()
+            if not changed and not removed:
+                return 0
+            chunks: List[bytes] = [_encode(_DELETE, conversation_id, 0.0, 0.0, b"") for conversation_id in removed]
+            for conversation_id, record in changed:
+                chunks.append(_encode(_PUT, conversation_id, record.created_at, record.last_activity,
+                                      self.store.encoded_state(record)))
+            handle = self._open()
+            handle.write(b"".join(chunks))
+            handle.flush()
+            os.fsync(handle.fileno())
+            self.records_in_file += len(chunks)
+            self.snapshots += 1
+            return len(chunks)
+
+    def _rewrite(self) -> int:
+        records, _ = self.store.drain_changes(everything=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "wb") as handle:
+            handle.write(MAGIC)
+            for conversation_id, record in records:
+                handle.write(_encode(_PUT, conversation_id, record.created_at, record.last_activity,
+                                     self.store.encoded_state(record)))
+            handle.flush()
+            os.fsync(handle.fileno())
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+        os.replace(tmp_path, self.path)
+        self.records_in_file = len(records)
+        self.rewrites += 1
+        return len(records)
+
+    def start(self, interval: float) -> None:
+        """Restore in a background thread, then snapshot every `interval` seconds"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval,), name="conversation-snapshot", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread and write a last snapshot, e.g. on shutdown"""
+        self._stop.set()
+        if self._restored.is_set():
+            self.snapshot()
+
+    def _run(self, interval: float) -> None:
+        try:
+            restored = self.restore()
+            print(f"Restored {restored} conversations from {self.path} in {self.restore_seconds:.2f}s")
+        except ValueError as e:
+            # Keep the unreadable file for inspection and start a fresh one
+            self.last_error = str(e)
+            os.replace(self.path, f"{self.path}.corrupt")
+            print(f"Conversation restore failed, starting empty (moved to {self.path}.corrupt): {e}")
+        except OSError as e:
+            self.last_error = str(e)
+            print(f"Conversation restore failed, starting empty: {e}")
+        while not self._stop.wait(interval):
+            try:
+                self.snapshot()
+            except OSError as e:
+                self.last_error = str(e)
+                print(f"Conversation snapshot failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "restoring": self.restoring,
+            "restored": self.restored,
+            "restore_seconds": self.restore_seconds,
+            "records_in_file": self.records_in_file,
+            "snapshots": self.snapshots,
+            "rewrites": self.rewrites,
+            "last_error": self.last_error,
+        }
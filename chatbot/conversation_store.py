@@ -0,0 +1,534 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from config import Config
+from .compact_state import pack_state, unpack_state
+from .history import history_page
+from .state import ChatbotState
+
+
+class ConversationStore(ABC):
+    """Interface for conversation storage backends.
+
+    A record is a dict with "state", "created_at" and "last_activity" keys.
+    Backends implement the storage primitives; the background sweeper is shared.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float, sweep_batch: int = 1000):
+        self.max_size = max_size
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.sweep_batch = sweep_batch
+        self._sweeper: Optional[threading.Thread] = None
+        self._sweeper_stop = threading.Event()
+        self._sweeper_lock = threading.Lock()
+        self.last_sweep: Optional[datetime] = None
+
+    @abstractmethod
+    def create(self, conversation_id: str, state: ChatbotState) -> Dict[str, Any]:
+        ...
+
+    @abstractmethod
+    def get(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def put(self, conversation_id: str, state: ChatbotState) -> None:
+        ...
+
+    @abstractmethod
+    def touch(self, conversation_id: str) -> bool:
+        ...
+
+    @abstractmethod
+    def delete(self, conversation_id: str) -> bool:
+        ...
+
+    @abstractmethod
+    def update(self, conversation_id: str, fn: Callable[[ChatbotState], None]) -> bool:
+        """Atomically apply `fn` to a copy of the stored state without counting as activity"""
+
+    @abstractmethod
+    def iter_states(self, limit: int) -> Iterator[ChatbotState]:
+        """Yield up to `limit` stored states, for sampling stats"""
+
+    def read_messages(self, conversation_id: str, since: int, limit: Optional[int]) -> Optional[Dict[str, Any]]:
+        """A `history_page` of the conversation plus "last_activity", and "summary" when the page is truncated.
+
+        This default loads the whole state; backends that can slice the stored
+        messages directly override it.
+        """
+        conversation = self.get(conversation_id)
+        if conversation is None:
+            return None
+        state = conversation["state"]
+        return self._page_record(
+            history_page(state.get("messages", []), state.get("history_trimmed") or 0, since, limit),
+            state.get("history_summary"), conversation["last_activity"],
+        )
+
+    @staticmethod
+    def _page_record(page: Dict[str, Any], summary: Optional[str], last_activity: datetime) -> Dict[str, Any]:
+        page["last_activity"] = last_activity
+        if page["truncated"]:
+            # Messages the client missed are only left in the summary
+            page["summary"] = summary or ""
+        return page
+
+    @abstractmethod
+    def expire_batch(self, limit: int) -> int:
+        """Remove up to `limit` idle conversations, oldest first"""
+
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        ...
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+    def __contains__(self, conversation_id: str) -> bool:
+        return self.get(conversation_id) is not None
+
+    def _expired(self, last_activity: float) -> bool:
+        """Idle past the TTL; such conversations are hidden even before the sweeper removes them"""
+        return last_activity < time.time() - self.ttl.total_seconds()
+
+    def expire(self, max_items: Optional[int] = None) -> int:
+        """Expire idle conversations in small batches so requests are never blocked for long"""
+        removed = 0
+        while max_items is None or removed < max_items:
+            limit = self.sweep_batch if max_items is None else min(self.sweep_batch, max_items - removed)
+            count = self.expire_batch(limit)
+            removed += count
+            if count < limit:
+                break
+        self.last_sweep = datetime.now()
+        return removed
+
+    def start_sweeper(self, interval: float) -> None:
+        """Start the background thread that expires idle conversations every `interval` seconds"""
+        with self._sweeper_lock:
+            if self._sweeper is not None and self._sweeper.is_alive():
+                return
+            self._sweeper_stop.clear()
+            self._sweeper = threading.Thread(
+                target=self._sweep_forever, args=(interval,), name="conversation-sweeper", daemon=True
+            )
+            self._sweeper.start()
+
+    def stop_sweeper(self) -> None:
+        self._sweeper_stop.set()
+
+    def _sweep_forever(self, interval: float) -> None:
+        while not self._sweeper_stop.wait(interval):
+            try:
+                self.expire()
+            except Exception as e:
+                print(f"Conversation sweep failed: {e}")
+
+
+def _copy_state(state: ChatbotState) -> ChatbotState:
+    """Shallow copy with its own lists, so appending a message never reaches the stored (or caller's) state"""
+    return {key: list(value) if isinstance(value, list) else value for key, value in state.items()}
+
+
+class _MemoryRecord:
+    __slots__ = ("state", "created_at", "last_activity")
+
+    def __init__(self, state, created_at: float, last_activity: float):
+        self.state = state
+        self.created_at = created_at
+        self.last_activity = last_activity
+
+
+class InMemoryConversationStore(ConversationStore):
+    """Process-local store kept in an OrderedDict ordered by last activity.
+
+    Every write moves the conversation to the end, so the front is both the
+    least recently used entry (evicted when max_size is exceeded) and the
+    oldest one (expired once idle for longer than the TTL).
+
+    With `compact` set, states are held as CompactState and timestamps as
+    floats; `get` hands back the usual record dict with a fresh ChatbotState.
+    Without it `get` still returns a copy with its own lists, so a turn in
+    progress never shows up in the store before it is committed.
+
+    Conversations restored from a snapshot keep their serialized bytes until
+    first used, so a restart doesn't decode states nobody comes back to.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float, sweep_batch: int = 1000, compact: bool = True):
+        super().__init__(max_size, ttl_seconds, sweep_batch)
+        self._records: "OrderedDict[str, _MemoryRecord]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.compact = compact
+        # Without compaction states are still copied on the way in and out, like pack/unpack do
+        self._pack = pack_state if compact else _copy_state
+        self._unpack = unpack_state if compact else _copy_state
+        self.evicted = 0
+        self.expired = 0
+        # Ids written or removed since the last snapshot; None until a snapshotter asks for them
+        self._changed: Optional[Set[str]] = None
+        self._removed: Optional[Set[str]] = None
+
+    def _loaded(self, record: _MemoryRecord):
+        """The record's stored state, decoding it first if it was restored from a snapshot and not used since.
+
+        Decodes outside the lock, then only publishes the result if the record
+        still holds the same bytes, so a concurrent `update` is never undone.
+        """
+        state = record.state
+        if not isinstance(state, bytes):
+            return state
+        decoded = self._pack(deserialize_state(state))
+        with self._lock:
+            if record.state is state:
+                record.state = decoded
+            return record.state
+
+    def _mark_changed(self, conversation_id: str) -> None:
+        if self._changed is not None:
+            self._changed.add(conversation_id)
+            self._removed.discard(conversation_id)
+
+    def _mark_removed(self, conversation_id: str) -> None:
+        if self._removed is not None:
+            self._removed.add(conversation_id)
+            self._changed.discard(conversation_id)
+
+    def _public(self, record: _MemoryRecord) -> Dict[str, Any]:
+        return {
+            "state": self._unpack(self._loaded(record)),
+            "created_at": datetime.fromtimestamp(record.created_at),
+            "last_activity": datetime.fromtimestamp(record.last_activity),
+        }
+
+    def create(self, conversation_id: str, state: ChatbotState) -> Dict[str, Any]:
+        now = time.time()
+        record = _MemoryRecord(self._pack(state), now, now)
+        with self._lock:
+            self._records[conversation_id] = record
+            self._records.move_to_end(conversation_id)
+            self._mark_changed(conversation_id)
+            self._evict_overflow()
+        return {"state": state, "created_at": datetime.fromtimestamp(now), "last_activity": datetime.fromtimestamp(now)}
+
+    def get(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            record = self._records.get(conversation_id)
+        if record is None or self._expired(record.last_activity):
+            return None
+        return self._public(record)
+
+    def put(self, conversation_id: str, state: ChatbotState) -> None:
+        packed = self._pack(state)
+        now = time.time()
+        with self._lock:
+            existing = self._records.get(conversation_id)
+            created_at = existing.created_at if existing else now
+            self._records[conversation_id] = _MemoryRecord(packed, created_at, now)
+            self._records.move_to_end(conversation_id)
+            self._mark_changed(conversation_id)
+            self._evict_overflow()
+
+    def touch(self, conversation_id: str) -> bool:
+        with self._lock:
+            record = self._records.get(conversation_id)
+            if record is None:
+                return False
+            record.last_activity = time.time()
+            self._records.move_to_end(conversation_id)
+            self._mark_changed(conversation_id)
+            return True
+
+    def delete(self, conversation_id: str) -> bool:
+        with self._lock:
+            self._mark_removed(conversation_id)
+            return self._records.pop(conversation_id, None) is not None
+
+    def update(self, conversation_id: str, fn: Callable[[ChatbotState], None]) -> bool:
+        with self._lock:
+            record = self._records.get(conversation_id)
+            if record is None:
+                return False
+            # Work on a copy so a request still holding the old state object isn't changed underneath it
+            stored = record.state
+            if isinstance(stored, bytes):
+                stored = self._pack(deserialize_state(stored))
+            state = self._unpack(stored)
+            fn(state)
+            record.state = self._pack(state)
+            self._mark_changed(conversation_id)
+            return True
+
+    def iter_states(self, limit: int) -> Iterator[ChatbotState]:
+        with self._lock:
+            records = [record for _, record in zip(range(limit), reversed(self._records.values()))]
+        for record in records:
+            yield self._unpack(self._loaded(record))
+
+    def read_messages(self, conversation_id: str, since: int, limit: Optional[int]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            record = self._records.get(conversation_id)
+        if record is None or self._expired(record.last_activity):
+            return None
+        # Stored states are replaced on write, never changed in place, so slicing outside the lock is safe
+        state = self._loaded(record)
+        if self.compact:
+            messages, trimmed, summary = state.messages, state.history_trimmed, state.history_summary
+        else:
+            messages, trimmed, summary = state.get("messages", []), state.get("history_trimmed") or 0, state.get("history_summary")
+        return self._page_record(
+            history_page(messages, trimmed, since, limit), summary, datetime.fromtimestamp(record.last_activity)
+        )
+
+    def expire_batch(self, limit: int) -> int:
+        cutoff = time.time() - self.ttl.total_seconds()
+        removed = 0
+        with self._lock:
+            while removed < limit and self._records:
+                conversation_id, record = next(iter(self._records.items()))
+                if record.last_activity >= cutoff:
+                    break
+                del self._records[conversation_id]
+                self._mark_removed(conversation_id)
+                removed += 1
+            self.expired += removed
+        return removed
+
+    def _evict_overflow(self) -> None:
+        while len(self._records) > self.max_size:
+            conversation_id, _ = self._records.popitem(last=False)
+            self._mark_removed(conversation_id)
+            self.evicted += 1
+
+    def track_changes(self) -> None:
+        """Start recording which conversations change, for incremental snapshots"""
+        with self._lock:
+            if self._changed is None:
+                self._changed, self._removed = set(), set()
+
+    def drain_changes(self, everything: bool = False) -> Tuple[List[Tuple[str, _MemoryRecord]], List[str]]:
+        """Records written and ids removed since the last call (every record with `everything`), and reset"""
+        with self._lock:
+            changed, removed = self._changed, self._removed
+            self._changed, self._removed = set(), set()
+            if everything:
+                return list(self._records.items()), []
+            return [(cid, self._records[cid]) for cid in changed if cid in self._records], list(removed)
+
+    def encoded_state(self, record: _MemoryRecord) -> bytes:
+        """The record's state as serialize_state bytes; restored, never-used states are passed through"""
+        state = record.state
+        return state if isinstance(state, bytes) else serialize_state(self._unpack(state))
+
+    def restore(self, records: Iterable[Tuple[str, bytes, float, float]]) -> int:
+        """Insert (id, serialized state, created_at, last_activity) records restored from a snapshot.
+
+        Conversations that already exist (started since the restart) win.
+        Restored ones go in front of them, oldest first, so expiry order holds.
+        """
+        restored = 0
+        newest_first = sorted(records, key=lambda record: record[3], reverse=True)
+        # In chunks, so requests for live conversations aren't held up behind a million inserts
+        for start in range(0, len(newest_first), 10000):
+            with self._lock:
+                for conversation_id, blob, created_at, last_activity in newest_first[start:start + 10000]:
+                    if conversation_id in self._records:
+                        continue
+                    self._records[conversation_id] = _MemoryRecord(blob, created_at, last_activity)
+                    self._records.move_to_end(conversation_id, last=False)
+                    restored += 1
+                self._evict_overflow()
+        return restored
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "memory",
+            "compact": self.compact,
+            "active_conversations": len(self),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl.total_seconds(),
+            "evicted": self.evicted,
+            "expired": self.expired,
+            "last_sweep": self.last_sweep.isoformat() if self.last_sweep else None,
+        }
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+
+# States above this size are zlib-compressed; smaller ones are stored as plain compact JSON
+_COMPRESS_THRESHOLD = 1024
+
+
+def serialize_state(state: ChatbotState) -> bytes:
+    """Encode a ChatbotState as compact JSON, compressed when large"""
+    payload = json.dumps(state, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    if len(payload) > _COMPRESS_THRESHOLD:
+        return b"z" + zlib.compress(payload, 6)
+    return b"j" + payload
+
+
+def deserialize_state(blob: bytes) -> ChatbotState:
+    payload = zlib.decompress(blob[1:]) if blob[:1] == b"z" else blob[1:]
+    return json.loads(payload)
+
+
+class SQLiteConversationStore(ConversationStore):
+    """Store shared by every worker process on a host, backed by SQLite in WAL mode.
+
+    Each write commits before returning, so the next request for the same
+    conversation sees it regardless of which worker serves it. Connections are
+    per thread and per process, so the store is safe to use after a fork.
+    """
+
+    def __init__(self, path: str, max_size: int, ttl_seconds: float, sweep_batch: int = 1000):
+        super().__init__(max_size, ttl_seconds, sweep_batch)
+        self.path = path
+        self._local = threading.local()
+        self.evicted = 0
+        self.expired = 0
+        conn = self._connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS conversations ("
+            "id TEXT PRIMARY KEY, state BLOB NOT NULL, created_at REAL NOT NULL, last_activity REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS conversations_last_activity ON conversations(last_activity)")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @staticmethod
+    def _record(row) -> Dict[str, Any]:
+        return {
+            "state": deserialize_state(row[0]),
+            "created_at": datetime.fromtimestamp(row[1]),
+            "last_activity": datetime.fromtimestamp(row[2]),
+        }
+
+    def create(self, conversation_id: str, state: ChatbotState) -> Dict[str, Any]:
+        now = time.time()
+        self._connection().execute(
+            "INSERT OR REPLACE INTO conversations (id, state, created_at, last_activity) VALUES (?, ?, ?, ?)",
+            (conversation_id, serialize_state(state), now, now),
+        )
+        return {"state": state, "created_at": datetime.fromtimestamp(now), "last_activity": datetime.fromtimestamp(now)}
+
+    def get(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute(
+            "SELECT state, created_at, last_activity FROM conversations WHERE id = ?", (conversation_id,)
+        ).fetchone()
+        return self._record(row) if row and not self._expired(row[2]) else None
+
+    def put(self, conversation_id: str, state: ChatbotState) -> None:
+        now = time.time()
+        self._connection().execute(
+            "INSERT INTO conversations (id, state, created_at, last_activity) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET state = excluded.state, last_activity = excluded.last_activity",
+            (conversation_id, serialize_state(state), now, now),
+        )
+
+    def touch(self, conversation_id: str) -> bool:
+        cursor = self._connection().execute(
+            "UPDATE conversations SET last_activity = ? WHERE id = ?", (time.time(), conversation_id)
+        )
+        return cursor.rowcount > 0
+
+    def delete(self, conversation_id: str) -> bool:
+        cursor = self._connection().execute("DELETE FROM conversations WHERE id = ?", (conversation_id,))
+        return cursor.rowcount > 0
+
+    def update(self, conversation_id: str, fn: Callable[[ChatbotState], None]) -> bool:
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT state FROM conversations WHERE id = ?", (conversation_id,)).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return False
+            state = deserialize_state(row[0])
+            fn(state)
+            conn.execute("UPDATE conversations SET state = ? WHERE id = ?", (serialize_state(state), conversation_id))
+            conn.execute("COMMIT")
+            return True
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def iter_states(self, limit: int) -> Iterator[ChatbotState]:
+        rows = self._connection().execute(
+            "SELECT state FROM conversations ORDER BY last_activity DESC LIMIT ?", (limit,)
+        ).fetchall()
+        for row in rows:
+            yield deserialize_state(row[0])
+
+    def expire_batch(self, limit: int) -> int:
+        conn = self._connection()
+        cutoff = time.time() - self.ttl.total_seconds()
+        removed = conn.execute(
+            "DELETE FROM conversations WHERE id IN ("
+            "SELECT id FROM conversations WHERE last_activity < ? ORDER BY last_activity LIMIT ?)",
+            (cutoff, limit),
+        ).rowcount
+        self.expired += removed
+        if removed < limit:
+            # max_size is enforced here rather than on every write, which would need a COUNT(*) per put
+            overflow = min(len(self) - self.max_size, limit - removed)
+            if overflow > 0:
+                evicted = conn.execute(
+                    "DELETE FROM conversations WHERE id IN ("
+                    "SELECT id FROM conversations ORDER BY last_activity LIMIT ?)",
+                    (overflow,),
+                ).rowcount
+                self.evicted += evicted
+                removed += evicted
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "sqlite",
+            "path": self.path,
+            "active_conversations": len(self),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl.total_seconds(),
+            "evicted": self.evicted,
+            "expired": self.expired,
+            "last_sweep": self.last_sweep.isoformat() if self.last_sweep else None,
+        }
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM conversations").fetchone()[0]
+
+
+def create_conversation_store() -> ConversationStore:
+    """Build the conversation store configured in Config"""
+    backend = Config.CONVERSATION_BACKEND
+    if backend == "memory":
+        return InMemoryConversationStore(
+            max_size=Config.CONVERSATION_MAX_SIZE,
+            ttl_seconds=Config.CONVERSATION_TTL_SECONDS,
+            compact=Config.CONVERSATION_COMPACT_STATE,
+        )
+    if backend == "sqlite":
+        return SQLiteConversationStore(
+            path=Config.CONVERSATION_DB_PATH,
+            max_size=Config.CONVERSATION_MAX_SIZE,
+            ttl_seconds=Config.CONVERSATION_TTL_SECONDS,
+        )
+    raise ValueError(f"Unknown conversation backend: {backend}")
@@ -0,0 +1,186 @@
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+# Keyword tables mirror the values the extraction prompt allows
+INSURANCE_TYPE_WORDS = {
+    "health": "health", "medical": "health", "mediclaim": "health",
+    "life": "life",
+    "auto": "auto", "car": "auto", "vehicle": "auto", "motor": "auto", "bike": "auto",
+}
+INSURED_FOR_WORDS = {
+    "myself": "self", "self": "self",
+    "wife": "spouse", "husband": "spouse", "spouse": "spouse", "partner": "spouse",
+    "son": "child", "daughter": "child", "child": "child", "kid": "child", "kids": "child",
+    "children": "child", "baby": "child",
+    "mother": "parent", "father": "parent", "mom": "parent", "mum": "parent", "dad": "parent",
+    "parent": "parent", "parents": "parent", "mommy": "parent", "daddy": "parent",
+}
+GREETING_WORDS = {
+    "hi", "hii", "hello", "hey", "hiya", "howdy", "greetings", "namaste", "yo",
+    "morning", "afternoon", "evening",
+}
+# Only greetings next to the word they pair with ("good morning", "hi there"); "good plans" is not a hello
+GREETING_PAIRS = {"good": {"morning", "afternoon", "evening"}, "there": {"hi", "hii", "hello", "hey"}}
+SUGGESTION_WORDS = {
+    "suggest", "suggestion", "recommend", "recommendation", "best", "compare", "comparison",
+    "which", "advice", "advise", "better", "should",
+}
+# "term" only means life insurance in "term life" / "term insurance", not "what is the term"
+TERM_LIFE_FOLLOWERS = {"life", "insurance", "plan", "plans", "policy", "cover"}
+FIRST_PERSON_WORDS = {"i", "im", "me", "my"}
+# Any of these flips the meaning ("I don't need health insurance"); the rules can't tell what is refused
+NEGATION_WORDS = {"no", "not", "dont", "doesnt", "didnt", "wont", "cant", "without", "never", "nor"}
+# A small number is only an age when one of these ties it to the person: "is 2", "aged 5", "5 years old"
+AGE_CUES_BEFORE = {"im", "am", "is", "age", "aged", "shes", "hes", "theyre", "turning", "turned"}
+AGE_CUES_AFTER = {"years", "year", "yrs", "yr", "old", "yo"}
+# A number next to one of these picks an option ("option 2", "plan 1"), it is not an age
+CHOICE_WORDS = {"option", "options", "plan", "plans", "quote", "quotes", "number", "no", "tier"}
+# Words that carry no information of their own; they count as "explained" so they don't lower confidence
+FILLER_WORDS = {
+    "i", "im", "m", "am", "s", "is", "are", "my", "me", "for", "a", "an", "the", "and", "of", "to", "in",
+    "need", "needs", "want", "wants", "looking", "look", "get", "buy", "some", "would", "like", "interested",
+    "insurance", "plan", "plans", "policy", "policies", "cover", "coverage", "quote", "please", "pls",
+    "years", "year", "yrs", "yr", "old", "age", "aged", "she", "he", "her", "his", "they", "their",
+    "thanks", "thank", "you", "ok", "okay", "yes", "sure", "so", "just", "now", "one", "do", "can",
+    "what", "us", "option", "options", "it", "be", "will", "shes", "hes", "theyre", "its",
+}
+
+_TOKEN_RE = re.compile(r"[a-z]+|\d+")
+_APOSTROPHE_RE = re.compile(r"[’']")
+
+
+@dataclass
+class FastExtraction:
+    """Result of the rule-based extractor, in the same shape as the LLM's JSON"""
+    fields: Dict[str, Any]
+    confidence: float
+
+
+class FastPathExtractor:
+    """Keyword/regex extractor that answers obvious turns without an LLM round trip.
+
+    Confidence is the share of the message's words explained by a rule or
+    known filler word, so anything the rules don't understand ("tell me a
+    joke") drops below the threshold and goes to the LLM. Negated messages
+    ("not for my wife", "I don't need car insurance") always go to the LLM.
+    """
+
+    def __init__(self, min_age: int = 1, max_age: int = 120, plausible_ages: tuple = (18, 100)):
+        self.min_age = min_age
+        self.max_age = max_age
+        # Ages accepted without an age cue in the message
+        self.plausible_ages = plausible_ages
+
+    def extract(self, message: str) -> Optional[FastExtraction]:
+        tokens = _TOKEN_RE.findall(_APOSTROPHE_RE.sub("", message.lower()))
+        if not tokens:
+            return None
+
+        if NEGATION_WORDS.intersection(tokens):
+            return None
+
+        fields = {"age": None, "insurance_type": None, "insured_for": None, "intent": None}
+        explained = 0
+        greeting = suggestion = first_person = age_cue = False
+        numbers = []
+
+        for position, token in enumerate(tokens):
+            previous = tokens[position - 1] if position else None
+            following = tokens[position + 1] if position + 1 < len(tokens) else None
+            if token.isdigit():
+                if previous in CHOICE_WORDS or following in CHOICE_WORDS:
+                    return None  # "option 2", "plan 1 please": a choice the LLM has to resolve
+                if following in INSURED_FOR_WORDS:
+                    return None  # "my 2 kids": a count, not an age
+                if previous in AGE_CUES_BEFORE or following in AGE_CUES_AFTER:
+                    age_cue = True
+                numbers.append(int(token))
+                explained += 1
+            elif token in INSURANCE_TYPE_WORDS or (token == "term" and following in TERM_LIFE_FOLLOWERS):
+                insurance_type = INSURANCE_TYPE_WORDS.get(token, "life")
+                if fields["insurance_type"] not in (None, insurance_type):
+                    return None  # conflicting types, leave it to the LLM
+                fields["insurance_type"] = insurance_type
+                explained += 1
+            elif token in INSURED_FOR_WORDS:
+                if fields["insured_for"] not in (None, INSURED_FOR_WORDS[token]):
+                    return None
+                fields["insured_for"] = INSURED_FOR_WORDS[token]
+                explained += 1
+            elif token in GREETING_WORDS or previous in GREETING_PAIRS.get(token, ()) \
+                    or following in GREETING_PAIRS.get(token, ()):
+                greeting = True
+                explained += 1
+            elif token in SUGGESTION_WORDS:
+                suggestion = True
+                explained += 1
+            elif token in FILLER_WORDS:
+                explained += 1
+            if token in FIRST_PERSON_WORDS:
+                first_person = True
+
+        if len(numbers) > 1:
+            return None
+        if numbers:
+            if not self.min_age <= numbers[0] <= self.max_age:
+                return None
+            low, high = self.plausible_ages
+            if not age_cue and not low <= numbers[0] <= high:
+                return None
+            fields["age"] = numbers[0]
+            if fields["insured_for"] is None and first_person:
+                fields["insured_for"] = "self"
+
+        has_info = any(fields[key] is not None for key in ("age", "insurance_type", "insured_for"))
+        if suggestion:
+            fields["intent"] = "ask_suggestion"
+        elif has_info:
+            fields["intent"] = "get_insurance_info"
+        elif greeting:
+            fields["intent"] = "greet"
+        else:
+            return FastExtraction(fields=fields, confidence=0.0)
+
+        return FastExtraction(fields=fields, confidence=explained / len(tokens))
+
+
+@dataclass
+class FastPathStats:
+    """Counts turns answered by the fast path or the intent classifier and estimates the LLM time saved"""
+    turns: int = 0
+    hits: int = 0
+    classifier_hits: int = 0
+    llm_calls: int = 0
+    llm_seconds: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record_hit(self) -> None:
+        with self._lock:
+            self.turns += 1
+            self.hits += 1
+
+    def record_classifier_hit(self) -> None:
+        with self._lock:
+            self.turns += 1
+            self.classifier_hits += 1
+
+    def record_llm(self, seconds: float) -> None:
+        with self._lock:
+            self.turns += 1
+            self.llm_calls += 1
+            self.llm_seconds += seconds
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            avg_llm = self.llm_seconds / self.llm_calls if self.llm_calls else 0.0
+            return {
+                "turns": self.turns,
+                "fast_path_hits": self.hits,
+                "classifier_hits": self.classifier_hits,
+                "llm_extractions": self.llm_calls,
+                "hit_rate": (self.hits + self.classifier_hits) / self.turns if self.turns else 0.0,
+                "avg_llm_extraction_seconds": avg_llm,
+                "estimated_seconds_saved": (self.hits + self.classifier_hits) * avg_llm,
+            }
@@ -0,0 +1,161 @@
+import queue
+import re
+import threading
+from typing import Any, Dict, List, Optional
+
+from .state import ChatbotState
+
+# Rough token estimate used for the per-conversation cap; good enough for English chat text
+CHARS_PER_TOKEN = 4
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+
+def _message_bytes(message: Dict[str, str]) -> int:
+    return len(message["content"].encode("utf-8")) + len(message["role"])
+
+
+def history_stats(state: ChatbotState) -> Dict[str, int]:
+    """Approximate memory held by one conversation's history"""
+    messages = state.get("messages", [])
+    overflow = state.get("history_overflow") or []
+    summary = state.get("history_summary") or ""
+    message_bytes = sum(_message_bytes(m) for m in messages)
+    overflow_bytes = sum(_message_bytes(m) for m in overflow)
+    summary_bytes = len(summary.encode("utf-8"))
+    total = message_bytes + overflow_bytes + summary_bytes
+    return {
+        "messages": len(messages),
+        "message_bytes": message_bytes,
+        "pending_summary_messages": len(overflow),
+        "pending_summary_bytes": overflow_bytes,
+        "summary_bytes": summary_bytes,
+        "total_bytes": total,
+        "approx_tokens": total // CHARS_PER_TOKEN,
+    }
+
+
+def fold_messages(summary: str, messages: List[Dict[str, str]], max_chars: int, line_chars: int = 160) -> str:
+    """Append one short line per message to the summary, dropping the oldest lines past max_chars"""
+    lines = summary.splitlines() if summary else []
+    for message in messages:
+        text = " ".join(message["content"].split())
+        first_sentence = _SENTENCE_END.split(text, 1)[0]
+        if len(first_sentence) > line_chars:
+            first_sentence = first_sentence[:line_chars - 1] + "…"
+        lines.append(f"{message['role']}: {first_sentence}")
+    while lines and sum(len(line) + 1 for line in lines) > max_chars:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+def history_page(messages, trimmed: int, since: int = 0, limit: Optional[int] = None) -> Dict[str, Any]:
+    """Messages with a sequence id above `since`, at most `limit` of them, plus the cursor for the next call.
+
+    Sequence ids number every message of the conversation from 1 and never
+    change: `trimmed` messages have left the window, so messages[i] has id
+    trimmed + i + 1. `messages` is a list of dicts or a MessageLog; only the
+    requested slice is copied. `truncated` means some messages after `since`
+    were already folded into the summary.
+    """
+    last_seq = trimmed + len(messages)
+    start = min(max(0, since - trimmed), len(messages))
+    end = len(messages) if limit is None else min(len(messages), start + limit)
+    page = messages[start:end]
+    for offset, message in enumerate(page):
+        message = page[offset] = dict(message)
+        message["seq"] = trimmed + start + offset + 1
+    return {
+        "messages": page,
+        "first_seq": trimmed + 1 if messages else None,
+        "last_seq": last_seq,
+        # A cursor past the end (e.g. from before a restart) is pulled back to the real end
+        "next_cursor": trimmed + end,
+        "has_more": end < len(messages),
+        "truncated": since < trimmed,
+    }
+
+
+class HistoryPolicy:
+    """Keeps the last `window_turns` turns verbatim and caps each conversation's history size.
+
+    Messages that fall out of the window are parked in `history_overflow`; the
+    HistoryCompactor folds them into `history_summary` off the request path.
+    """
+
+    def __init__(self, window_turns: int, max_bytes: int, max_tokens: int, summary_max_chars: int):
+        self.window_messages = max(2, window_turns * 2)
+        self.max_bytes = min(max_bytes, max_tokens * CHARS_PER_TOKEN)
+        self.summary_max_chars = summary_max_chars
+
+    def apply(self, state: ChatbotState) -> bool:
+        """Trim the state in place; returns True when there is history waiting to be summarized"""
+        messages = state.get("messages", [])
+        overflow = state.get("history_overflow") or []
+        cut = max(0, len(messages) - self.window_messages)
+        size = sum(_message_bytes(m) for m in messages[cut:])
+        # Keep at least the latest exchange even if it alone is over the cap
+        while size > self.max_bytes and len(messages) - cut > 2:
+            size -= _message_bytes(messages[cut])
+            cut += 1
+        if cut:
+            overflow = overflow + messages[:cut]
+            state["messages"] = messages[cut:]
+            # Sequence ids of the remaining messages stay the same; see history_page
+            state["history_trimmed"] = (state.get("history_trimmed") or 0) + cut
+        if sum(_message_bytes(m) for m in overflow) > self.max_bytes:
+            # The compactor is behind; fold inline rather than let memory grow
+            state["history_summary"] = fold_messages(state.get("history_summary") or "", overflow, self.summary_max_chars)
+            overflow = []
+        state["history_overflow"] = overflow
+        return bool(overflow)
+
+    def compact(self, state: ChatbotState) -> None:
+        """Fold pending overflow messages into the summary"""
+        overflow = state.get("history_overflow") or []
+        if overflow:
+            state["history_summary"] = fold_messages(state.get("history_summary") or "", overflow, self.summary_max_chars)
+            state["history_overflow"] = []
+
+
+class HistoryCompactor:
+    """Background thread that summarizes overflowed history for scheduled conversations.
+
+    Compaction is a read-modify-write through the store, so a turn that commits
+    in between simply leaves its overflow for the next pass; nothing is lost or
+    summarized twice.
+    """
+
+    def __init__(self, store, policy: HistoryPolicy):
+        self.store = store
+        self.policy = policy
+        self._pending = set()
+        self._queue: "queue.Queue[str]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.compacted = 0
+
+    def schedule(self, conversation_id: str) -> None:
+        with self._lock:
+            if conversation_id in self._pending:
+                return
+            self._pending.add(conversation_id)
+        self._queue.put(conversation_id)
+
+    def start(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="history-compactor", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            conversation_id = self._queue.get()
+            with self._lock:
+                self._pending.discard(conversation_id)
+            try:
+                if self.store.update(conversation_id, self.policy.compact):
+                    self.compacted += 1
+            except Exception as e:
+                print(f"History compaction failed for {conversation_id}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {"queued": self._queue.qsize(), "compacted": self.compacted}
@@ -0,0 +1,318 @@
+import json
+import math
+import random
+import re
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .fast_extract import FastPathExtractor
+
+_TOKEN_RE = re.compile(r"[a-z]+|\d+")
+_APOSTROPHE_RE = re.compile(r"[’']")
+# Fields the extraction prompt returns besides the intent
+FIELDS = ("age", "insurance_type", "insured_for")
+# Confidence thresholds tabulated in the evaluation report
+REPORT_THRESHOLDS = (0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.95, 0.98, 0.99)
+
+
+def ngram_features(message: str) -> List[str]:
+    """Word unigrams and bigrams plus character trigrams of each word; digits collapse to one token"""
+    tokens = ["<num>" if token.isdigit() else token
+              for token in _TOKEN_RE.findall(_APOSTROPHE_RE.sub("", message.lower()))]
+    features = [f"w:{token}" for token in tokens]
+    features.extend(f"b:{first} {second}" for first, second in zip(["<s>"] + tokens, tokens + ["</s>"]))
+    for token in tokens:
+        padded = f"^{token}$"
+        features.extend(f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2))
+    return features
+
+
+class IntentLog:
+    """Appends (message, LLM extraction, latency) records as JSON lines, the training data for IntentClassifier"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.records = 0
+        self._lock = threading.Lock()
+
+    def record(self, message: str, extracted: Dict[str, Any], llm_seconds: float) -> None:
+        line = json.dumps({
+            "message": message,
+            "intent": extracted.get("intent"),
+            **{name: extracted.get(name) for name in FIELDS},
+            "llm_seconds": round(llm_seconds, 4),
+            "at": time.time(),
+        })
+        try:
+            with self._lock, open(self.path, "a", encoding="utf-8") as handle:
+                handle.write(line + "\n")
+                self.records += 1
+        except OSError as e:
+            print(f"Intent log write failed: {e}")
+
+
+def read_intent_log(paths: Iterable[str]) -> List[Dict[str, Any]]:
+    """Logged records with a message and an intent; malformed lines are skipped"""
+    records = []
+    for path in paths:
+        with open(path, encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if isinstance(record.get("message"), str) and isinstance(record.get("intent"), str):
+                    records.append(record)
+    return records
+
+
+@dataclass
+class IntentPrediction:
+    intent: str
+    confidence: float
+
+
+class IntentClassifier:
+    """Multinomial logistic regression over hashed n-gram features.
+
+    Messages are turned into `n_features` hashed binary features
+    (ngram_features, crc32), so the model is a dense weight matrix with
+    one row per hash bucket and inference is a handful of row lookups.
+    """
+
+    def __init__(self, labels: List[str], n_features: int = 1 << 18,
+                 weights: Optional[np.ndarray] = None, bias: Optional[np.ndarray] = None):
+        self.labels = list(labels)
+        self.n_features = n_features
+        self.weights = weights if weights is not None else np.zeros((n_features, len(labels)), dtype=np.float32)
+        self.bias = bias if bias is not None else np.zeros(len(labels), dtype=np.float32)
+
+    def featurize(self, message: str) -> np.ndarray:
+        features = ngram_features(message)
+        if not features:
+            return np.zeros(0, dtype=np.int64)
+        return np.unique(np.fromiter(
+            (zlib.crc32(feature.encode("utf-8")) % self.n_features for feature in features),
+            dtype=np.int64, count=len(features),
+        ))
+
+    def _probabilities(self, rows: np.ndarray) -> np.ndarray:
+        logits = self.bias.copy()
+        if len(rows):
+            logits += self.weights[rows].sum(axis=0) / math.sqrt(len(rows))
+        logits -= logits.max()
+        exp = np.exp(logits)
+        return exp / exp.sum()
+
+    def predict(self, message: str) -> IntentPrediction:
+        probabilities = self._probabilities(self.featurize(message))
+        best = int(probabilities.argmax())
+        return IntentPrediction(self.labels[best], float(probabilities[best]))
+
+    def extract(self, message: str, rules: FastPathExtractor, min_confidence: float,
+                min_rule_confidence: float = 0.8) -> Optional[Dict[str, Any]]:
+        """The extraction prompt's answer without the LLM, or None to defer to it.
+
+        The classifier supplies the intent and the rule-based extractor the
+        fields, but only when the rules explain at least `min_rule_confidence`
+        of the message. Otherwise the fields are left empty, and a
+        get_insurance_info turn, which exists to collect them, goes to the LLM.
+        A message the rules find contradictory (two ages, two insurance types)
+        or the classifier is unsure about goes to the LLM too.
+        """
+        prediction = self.predict(message)
+        if prediction.confidence < min_confidence:
+            return None
+        extraction = rules.extract(message)
+        if extraction is None:
+            return None
+        if extraction.confidence >= min_rule_confidence:
+            return dict(extraction.fields, intent=prediction.intent)
+        if prediction.intent == "get_insurance_info":
+            return None
+        return dict(dict.fromkeys(FIELDS), intent=prediction.intent)
+
+    def fit(self, messages: List[str], intents: List[str], epochs: int = 8, learning_rate: float = 2.0,
+            l2: float = 1e-6, batch_size: int = 32, seed: int = 0) -> "IntentClassifier":
+        """Minibatch SGD on the softmax cross-entropy; features are hashed once up front"""
+        index = {label: i for i, label in enumerate(self.labels)}
+        rows = [self.featurize(message) for message in messages]
+        targets = np.array([index[intent] for intent in intents], dtype=np.int64)
+        order = np.arange(len(rows))
+        rng = np.random.default_rng(seed)
+        for epoch in range(epochs):
+            rng.shuffle(order)
+            step = learning_rate / math.sqrt(epoch + 1)
+            for start in range(0, len(order), batch_size):
+                batch = order[start:start + batch_size]
+                batch_rows = [rows[i] for i in batch]
+                scales = np.array([1 / math.sqrt(len(r)) if len(r) else 0.0 for r in batch_rows], dtype=np.float32)
+                logits = np.stack([
+                    self.weights[r].sum(axis=0) * s if len(r) else np.zeros(len(self.labels), dtype=np.float32)
+                    for r, s in zip(batch_rows, scales)
+                ]) + self.bias
+                logits -= logits.max(axis=1, keepdims=True)
+                probabilities = np.exp(logits)
+                probabilities /= probabilities.sum(axis=1, keepdims=True)
+                probabilities[np.arange(len(batch)), targets[batch]] -= 1  # gradient of the loss wrt the logits
+                gradient = probabilities / len(batch)
+                flat_rows = np.concatenate(batch_rows)
+                flat_gradient = np.repeat(gradient * scales[:, None], [len(r) for r in batch_rows], axis=0)
+                if l2:
+                    self.weights[flat_rows] *= 1 - step * l2
+                np.add.at(self.weights, flat_rows, -step * flat_gradient)
+                self.bias -= step * gradient.sum(axis=0)
+        return self
+
+    def save(self, path: str) -> None:
+        with open(path, "wb") as handle:
+            np.savez_compressed(handle, weights=self.weights, bias=self.bias, labels=np.array(self.labels),
+                                n_features=np.array(self.n_features))
+
+    @classmethod
+    def load(cls, path: str) -> "IntentClassifier":
+        with np.load(path) as data:
+            return cls([str(label) for label in data["labels"]], int(data["n_features"]),
+                       data["weights"].astype(np.float32), data["bias"].astype(np.float32))
+
+
+def split_records(records: List[Dict[str, Any]], eval_fraction: float, seed: int = 0
+                  ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Split by message text, so repeats of one message never land on both sides"""
+    messages = sorted({record["message"] for record in records})
+    random.Random(seed).shuffle(messages)
+    held_out = set(messages[:int(len(messages) * eval_fraction)])
+    train = [record for record in records if record["message"] not in held_out]
+    evaluation = [record for record in records if record["message"] in held_out]
+    return train, evaluation
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q / 100))] if ordered else 0.0
+
+
+def evaluate(classifier: IntentClassifier, records: List[Dict[str, Any]], min_confidence: float,
+             extractor: Optional[FastPathExtractor] = None) -> Dict[str, Any]:
+    """Agreement with the logged LLM answers, coverage by threshold and the LLM time the local path would save"""
+    extractor = extractor or FastPathExtractor()
+    predictions, latencies = [], []
+    for record in records:
+        started = time.perf_counter()
+        predictions.append(classifier.predict(record["message"]))
+        latencies.append(time.perf_counter() - started)
+
+    by_threshold = []
+    for threshold in REPORT_THRESHOLDS:
+        covered = [(p, r) for p, r in zip(predictions, records) if p.confidence >= threshold]
+        by_threshold.append({
+            "threshold": threshold,
+            "coverage": len(covered) / len(records) if records else 0.0,
+            "intent_agreement": sum(p.intent == r["intent"] for p, r in covered) / len(covered) if covered else None,
+        })
+
+    confusion: Dict[str, Dict[str, int]] = {}
+    local, intent_agree, full_agree, saved_seconds, local_latencies = 0, 0, 0, 0.0, []
+    for record in records:
+        started = time.perf_counter()
+        fields = classifier.extract(record["message"], extractor, min_confidence)
+        local_latencies.append(time.perf_counter() - started)
+        if fields is None:
+            continue
+        local += 1
+        row = confusion.setdefault(record["intent"], {})
+        row[fields["intent"]] = row.get(fields["intent"], 0) + 1
+        intent_agree += fields["intent"] == record["intent"]
+        full_agree += all(fields[name] == record.get(name) for name in ("intent",) + FIELDS)
+        saved_seconds += record.get("llm_seconds") or 0.0
+
+    llm_seconds = [record["llm_seconds"] for record in records if record.get("llm_seconds")]
+    return {
+        "records": len(records),
+        "labels": classifier.labels,
+        "intent_accuracy": sum(p.intent == r["intent"] for p, r in zip(predictions, records)) / len(records)
+        if records else None,
+        "by_threshold": by_threshold,
+        "min_confidence": min_confidence,
+        "answered_locally": local / len(records) if records else 0.0,
+        "intent_agreement_local": intent_agree / local if local else None,
+        "full_agreement_local": full_agree / local if local else None,
+        "confusion_local": confusion,
+        "classifier_latency_us": {"p50": _percentile(latencies, 50) * 1e6, "p99": _percentile(latencies, 99) * 1e6},
+        "local_path_latency_us": {"p50": _percentile(local_latencies, 50) * 1e6,
+                                  "p99": _percentile(local_latencies, 99) * 1e6},
+        "llm_latency_ms": {"p50": _percentile(llm_seconds, 50) * 1e3, "p99": _percentile(llm_seconds, 99) * 1e3},
+        "llm_seconds_saved": saved_seconds,
+        "llm_seconds_saved_per_1000_turns": saved_seconds / len(records) * 1000 if records else 0.0,
+    }
+
+
+def train(log_paths: List[str], out_path: str, report_path: Optional[str] = None, eval_fraction: float = 0.2,
+          min_confidence: float = 0.9, n_features: int = 1 << 18, epochs: int = 8) -> Dict[str, Any]:
+    """Train on the logged LLM answers, save the model and write the evaluation report"""
+    records = read_intent_log(log_paths)
+    if not records:
+        raise ValueError(f"no usable records in {', '.join(log_paths)}")
+    train_records, eval_records = split_records(records, eval_fraction)
+    labels = sorted({record["intent"] for record in records})
+    started = time.perf_counter()
+    classifier = IntentClassifier(labels, n_features).fit(
+        [record["message"] for record in train_records], [record["intent"] for record in train_records], epochs=epochs
+    )
+    report = {
+        "train_records": len(train_records),
+        "train_seconds": time.perf_counter() - started,
+        "label_counts": {label: sum(record["intent"] == label for record in records) for label in labels},
+        "evaluation": evaluate(classifier, eval_records or train_records, min_confidence),
+    }
+    classifier.save(out_path)
+    with open(report_path or f"{out_path}.report.json", "w", encoding="utf-8") as handle:
+        json.dump(report, handle, indent=2)
+    return report
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    evaluation = report["evaluation"]
+    print(f"{evaluation['records']} held-out records, intent accuracy {evaluation['intent_accuracy']:.3f}")
+    for row in evaluation["by_threshold"]:
+        agreement = "-" if row["intent_agreement"] is None else f"{row['intent_agreement']:.3f}"
+        print(f"  confidence >= {row['threshold']:.2f}: coverage {row['coverage']:.3f}, intent agreement {agreement}")
+    local = evaluation["full_agreement_local"]
+    print(f"at {evaluation['min_confidence']}: {evaluation['answered_locally']:.1%} answered locally, "
+          f"full extraction agreement {'-' if local is None else f'{local:.3f}'}")
+    print(f"classifier p50 {evaluation['classifier_latency_us']['p50']:.0f} us vs LLM p50 "
+          f"{evaluation['llm_latency_ms']['p50']:.0f} ms; "
+          f"{evaluation['llm_seconds_saved_per_1000_turns']:.1f} LLM seconds saved per 1000 turns")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Train or evaluate the local intent classifier on logged LLM extractions")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    train_parser = subcommands.add_parser("train", help="train a model and write its evaluation report")
+    train_parser.add_argument("logs", nargs="+", help="JSON lines written by IntentLog (INTENT_LOG_PATH)")
+    train_parser.add_argument("--out", required=True, help="model file (.npz)")
+    train_parser.add_argument("--report", help="report file (default: OUT.report.json)")
+    train_parser.add_argument("--eval-fraction", type=float, default=0.2)
+    train_parser.add_argument("--min-confidence", type=float, default=0.9)
+    train_parser.add_argument("--features", type=int, default=1 << 18, help="number of hash buckets")
+    train_parser.add_argument("--epochs", type=int, default=8)
+    eval_parser = subcommands.add_parser("evaluate", help="evaluate a saved model on a log")
+    eval_parser.add_argument("model")
+    eval_parser.add_argument("logs", nargs="+")
+    eval_parser.add_argument("--min-confidence", type=float, default=0.9)
+    args = parser.parse_args()
+
+    if args.command == "train":
+        print_report(train(args.logs, args.out, args.report, args.eval_fraction, args.min_confidence,
+                            args.features, args.epochs))
+        print(f"model written to {args.out}")
+    else:
+        print_report({"evaluation": evaluate(IntentClassifier.load(args.model), read_intent_log(args.logs),
+                                              args.min_confidence)})
@@ -0,0 +1,186 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from langchain_core.messages import AIMessage, BaseMessage
+
+_WHITESPACE = str.maketrans({"\t": " ", "\r": " ", "\n": " "})
+
+
+def normalize_messages(messages: List[BaseMessage]) -> List[List[str]]:
+    """Reduce formatted messages to (type, content) pairs with whitespace collapsed.
+
+    The prompts are indented triple-quoted strings, so two prompts that only
+    differ in indentation or line breaks map to the same key.
+    """
+    return [[message.type, " ".join(str(message.content).translate(_WHITESPACE).split())] for message in messages]
+
+
+def cache_key(messages: List[BaseMessage], model: str) -> str:
+    payload = json.dumps([model, normalize_messages(messages)], separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """Bounded LRU+TTL cache of LLM completions with an optional SQLite tier that survives restarts.
+
+    The SQLite tier is purged every `purge_every` writes rather than on each
+    one: expired rows go first, then the oldest rows beyond `max_disk_entries`.
+    Between purges it can hold up to `purge_every` rows over the cap.
+    SQLite is only touched under its own lock, never the memory tier's, so
+    memory lookups don't wait for disk I/O; async callers run the disk side
+    in a thread (see CachedChatModel).
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, disk_path: Optional[str] = None,
+                 max_disk_entries: int = 100000, purge_every: int = 256):
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self.disk_path = disk_path
+        self.max_disk_entries = max_disk_entries
+        self.purge_every = max(1, purge_every)
+        self._puts_since_purge = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+        self._disk = None
+        if disk_path:
+            self._disk = sqlite3.connect(disk_path, isolation_level=None, check_same_thread=False)
+            self._disk.execute("PRAGMA journal_mode=WAL")
+            self._disk.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, content TEXT NOT NULL, stored_at REAL NOT NULL)"
+            )
+            # Purges delete by age, oldest first
+            self._disk.execute("CREATE INDEX IF NOT EXISTS llm_cache_stored_at ON llm_cache (stored_at)")
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.disk_purged = 0
+        if self._disk is not None:
+            self._purge_disk(time.time())
+
+    @property
+    def has_disk(self) -> bool:
+        return self._disk is not None
+
+    def get(self, key: str, memory_only: bool = False) -> Optional[str]:
+        """The cached completion, or None.
+
+        `memory_only` skips SQLite and leaves a miss uncounted, so an async
+        caller can follow up with a full `get` in a worker thread.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                content, stored_at = entry
+                if now - stored_at <= self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return content
+                del self._entries[key]
+                self.expirations += 1
+            if memory_only:
+                return None
+            if self._disk is None:
+                self.misses += 1
+                return None
+        with self._disk_lock:
+            row = self._disk.execute("SELECT content, stored_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        with self._lock:
+            if row and now - row[1] <= self.ttl:
+                self._store(key, row[0], row[1])
+                self.disk_hits += 1
+                return row[0]
+            self.misses += 1
+            return None
+
+    def put(self, key: str, content: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._store(key, content, now)
+        if self._disk is not None:
+            with self._disk_lock:
+                self._disk.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, content, stored_at) VALUES (?, ?, ?)", (key, content, now)
+                )
+                self._puts_since_purge += 1
+                if self._puts_since_purge >= self.purge_every:
+                    self._purge_disk(now)
+
+    def _purge_disk(self, now: float) -> None:
+        """Drop expired rows, then the oldest rows over `max_disk_entries`; caller holds the disk lock"""
+        self._puts_since_purge = 0
+        purged = self._disk.execute("DELETE FROM llm_cache WHERE stored_at < ?", (now - self.ttl,)).rowcount
+        excess = self._disk.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0] - self.max_disk_entries
+        if excess > 0:
+            purged += self._disk.execute(
+                "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY stored_at LIMIT ?)", (excess,)
+            ).rowcount
+        self.disk_purged += purged
+
+    def _store(self, key: str, content: str, stored_at: float) -> None:
+        self._entries[key] = (content, stored_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "disk_path": self.disk_path,
+                "max_disk_entries": self.max_disk_entries,
+                "disk_purged": self.disk_purged,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
+
+
+class CachedChatModel:
+    """Wraps a chat model so identical prompts to the same model are answered from the cache.
+
+    Only `ainvoke` is intercepted; everything else is delegated to the wrapped model.
+    Memory hits are answered inline; SQLite reads and writes run in a worker
+    thread so disk I/O never blocks the event loop.
+    """
+
+    def __init__(self, llm, cache: LLMResponseCache, model_name: str):
+        self.llm = llm
+        self.cache = cache
+        self.model_name = model_name
+
+    async def ainvoke(self, messages: List[BaseMessage], **kwargs) -> BaseMessage:
+        key = cache_key(messages, self.model_name)
+        if self.cache.has_disk:
+            content = self.cache.get(key, memory_only=True)
+            if content is None:
+                content = await asyncio.to_thread(self.cache.get, key)
+        else:
+            content = self.cache.get(key)
+        if content is not None:
+            return AIMessage(content=content, response_metadata={"cache": "hit"})
+        response = await self.llm.ainvoke(messages, **kwargs)
+        if self.cache.has_disk:
+            await asyncio.to_thread(self.cache.put, key, response.content)
+        else:
+            self.cache.put(key, response.content)
+        return response
+
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
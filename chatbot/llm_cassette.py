@@ -0,0 +1,119 @@
+import asyncio
+import json
+import threading
+import time
+from typing import Any, Dict, List
+
+from langchain_core.messages import AIMessage, BaseMessage
+
+from .llm_cache import cache_key, normalize_messages
+from .llm_gateway import current_node
+
+CASSETTE_MODES = ("record", "replay")
+
+
+class CassetteMiss(LookupError):
+    """Replay found no recording for a prompt; the node answers with its fallback text"""
+
+
+class LLMCassette:
+    """A JSON-lines file of recorded LLM calls: the prompt, the response and how long it took.
+
+    In "record" mode calls are appended as they complete (so several runs can
+    extend one cassette). In "replay" mode the file is loaded once and each
+    prompt key serves its recordings in order, starting over when they run out.
+    """
+
+    def __init__(self, path: str, mode: str):
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"LLM cassette mode must be one of {', '.join(CASSETTE_MODES)}, not {mode!r}")
+        self.path = path
+        self.mode = mode
+        self._entries: Dict[str, List[Dict[str, Any]]] = {}
+        self._positions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.recorded = 0
+        self.replayed = 0
+        self.misses = 0
+        if mode == "replay":
+            try:
+                with open(path, encoding="utf-8") as handle:
+                    for line in handle:
+                        if line.strip():
+                            entry = json.loads(line)
+                            self._entries.setdefault(entry["key"], []).append(entry)
+            except (OSError, json.JSONDecodeError, KeyError) as e:
+                raise ValueError(f"Cannot replay LLM cassette {path}: {e}")
+
+    def record(self, key: str, messages: List[BaseMessage], response: BaseMessage, seconds: float) -> None:
+        line = json.dumps({
+            "key": key,
+            "node": current_node.get(),
+            "messages": normalize_messages(messages),
+            "content": response.content,
+            "response_metadata": response.response_metadata,
+            "usage_metadata": getattr(response, "usage_metadata", None),
+            "seconds": round(seconds, 6),
+        }, ensure_ascii=False, default=str)
+        with self._lock, open(self.path, "a", encoding="utf-8") as handle:
+            handle.write(line + "\n")
+            self.recorded += 1
+
+    def replay(self, key: str) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                self.misses += 1
+                raise CassetteMiss(f"no recording for prompt {key[:12]} ({current_node.get()})")
+            position = self._positions.get(key, 0)
+            self._positions[key] = (position + 1) % len(entries)
+            self.replayed += 1
+            return entries[position]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "path": self.path,
+                "mode": self.mode,
+                "prompts": len(self._entries),
+                "recorded": self.recorded,
+                "replayed": self.replayed,
+                "misses": self.misses,
+            }
+
+
+class CassetteChatModel:
+    """Wraps the upstream chat model to record its calls to a cassette or answer from one.
+
+    Sits directly above the LLM client, so in replay the gateway, single-flight
+    and cache layers still run and only the network is taken out (while
+    recording the cache is left out, so no prompt skips the cassette). Replayed
+    calls sleep for the recorded time multiplied by `latency_scale` (1 keeps
+    the recorded latency, 0 answers at once). Only successful calls are
+    recorded; failures pass through.
+    """
+
+    def __init__(self, llm, cassette: LLMCassette, model_name: str, latency_scale: float = 1.0):
+        self.llm = llm
+        self.cassette = cassette
+        self.model_name = model_name
+        self.latency_scale = latency_scale
+
+    async def ainvoke(self, messages: List[BaseMessage], **kwargs) -> BaseMessage:
+        key = cache_key(messages, self.model_name)
+        if self.cassette.mode == "replay":
+            entry = self.cassette.replay(key)
+            if self.latency_scale > 0:
+                await asyncio.sleep(entry["seconds"] * self.latency_scale)
+            return AIMessage(
+                content=entry["content"],
+                response_metadata=dict(entry.get("response_metadata") or {}, cassette="replay"),
+                usage_metadata=entry.get("usage_metadata"),
+            )
+        started = time.perf_counter()
+        response = await self.llm.ainvoke(messages, **kwargs)
+        self.cassette.record(key, messages, response, time.perf_counter() - started)
+        return response
+
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
@@ -0,0 +1,279 @@
+import asyncio
+import contextvars
+import math
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import groq
+from langchain_core.messages import BaseMessage
+
+from .llm_scheduler import PrioritySlots
+from .metrics import METRICS
+
+# Graph node making the current LLM call; set by InsuranceChatbotAPI._invoke_llm
+current_node: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("current_node", default=None)
+# Conversation the current turn belongs to; set by InsuranceChatbotAPI.chat, used for fair queueing
+current_conversation: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("current_conversation", default=None)
+
+# Errors worth retrying: the request may well succeed a moment later
+_TRANSIENT_ERRORS = (
+    groq.APIConnectionError,  # includes APITimeoutError
+    groq.RateLimitError,
+    groq.InternalServerError,
+    ConnectionError,
+    asyncio.TimeoutError,
+)
+
+
+class LLMUnavailable(Exception):
+    """The gateway refused or gave up on a call; nodes answer with their fallback text"""
+
+
+class LLMOverloaded(LLMUnavailable):
+    pass
+
+
+class CircuitOpen(LLMUnavailable):
+    pass
+
+
+def is_transient(error: BaseException) -> bool:
+    if isinstance(error, _TRANSIENT_ERRORS):
+        return True
+    status = getattr(error, "status_code", None)
+    return status in (408, 409, 429) or (isinstance(status, int) and status >= 500)
+
+
+def parse_node_timeouts(spec: str) -> Dict[str, float]:
+    """Parse "node=seconds,node=seconds" into a dict"""
+    timeouts = {}
+    for item in spec.split(","):
+        if item.strip():
+            node, seconds = item.split("=")
+            timeouts[node.strip()] = float(seconds)
+    return timeouts
+
+
+def parse_node_priorities(spec: str) -> Dict[str, int]:
+    """Parse "node=class,node=class" into a dict; class 0 is served first"""
+    return {node: int(value) for node, value in parse_node_timeouts(spec).items()}
+
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive failures and lets one probe through after `reset_seconds`"""
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self.state = "half_open"
+                self._probing = False
+            if self.state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    self.times_opened += 1
+                self.state = "open"
+                self.opened_at = time.monotonic()
+                self._probing = False
+
+    def release_probe(self) -> None:
+        """A half-open probe ended without telling us anything (e.g. a bad request); allow another"""
+        with self._lock:
+            self._probing = False
+
+
+class LLMGateway:
+    """Guards every upstream LLM call with a concurrency limit, a timeout, retries and a circuit breaker.
+
+    At most `max_concurrency` calls run at once and at most `max_queue` wait for
+    a slot; beyond that calls fail fast with LLMOverloaded. Waiting calls get
+    slots by their node's priority class and round-robin between conversations
+    (see PrioritySlots). Each call gets the timeout budget of the node making
+    it, covering queueing and retries. While the breaker is open calls fail
+    immediately with CircuitOpen.
+    """
+
+    def __init__(
+        self,
+        llm,
+        max_concurrency: int,
+        max_queue: int,
+        default_timeout: float,
+        node_timeouts: Optional[Dict[str, float]] = None,
+        max_retries: int = 2,
+        retry_base_delay: float = 0.25,
+        breaker: Optional[CircuitBreaker] = None,
+        node_priorities: Optional[Dict[str, int]] = None,
+        default_priority: int = 1,
+        priority_step: float = 1.0,
+    ):
+        self.llm = llm
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.default_timeout = default_timeout
+        self.node_timeouts = node_timeouts or {}
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.breaker = breaker or CircuitBreaker(failure_threshold=5, reset_seconds=30)
+        self.node_priorities = node_priorities or {}
+        self.default_priority = default_priority
+        self.priority_step = priority_step
+        self._slots_instance: Optional[PrioritySlots] = None
+        self._slots_loop = None
+        self.in_flight = 0
+        self.waiting = 0
+        self.counters = {
+            "calls": 0, "succeeded": 0, "failed": 0, "retries": 0,
+            "timeouts": 0, "rejected_overloaded": 0, "rejected_circuit_open": 0,
+            "rejected_admission": 0,
+        }
+
+    def _slots(self) -> PrioritySlots:
+        # Created on first use so it belongs to the loop the calls actually run on
+        loop = asyncio.get_running_loop()
+        if self._slots_instance is None or self._slots_loop is not loop:
+            self._slots_instance = PrioritySlots(self.max_concurrency, self.priority_step)
+            self._slots_loop = loop
+        return self._slots_instance
+
+    def timeout_for(self, node: Optional[str]) -> float:
+        return self.node_timeouts.get(node, self.default_timeout)
+
+    def priority_for(self, node: Optional[str]) -> int:
+        return self.node_priorities.get(node, self.default_priority)
+
+    def retry_after(self) -> Optional[int]:
+        """Seconds a new turn should back off when the wait queue is full, else None.
+
+        Checked by the chat routes before a turn starts, so an overloaded
+        gateway answers 429 straight away instead of queueing more work.
+        """
+        if self.waiting < self.max_queue:
+            return None
+        self.counters["rejected_admission"] += 1
+        hold_seconds = self._slots_instance.hold_seconds if self._slots_instance else self.default_timeout
+        return max(1, math.ceil((self.waiting + 1) * hold_seconds / self.max_concurrency))
+
+    async def ainvoke(self, messages: List[BaseMessage], **kwargs) -> BaseMessage:
+        self.counters["calls"] += 1
+        if not self.breaker.allow():
+            self.counters["rejected_circuit_open"] += 1
+            raise CircuitOpen("LLM circuit breaker is open")
+        slots = self._slots()
+        if self.in_flight + self.waiting >= self.max_concurrency + self.max_queue:
+            self.counters["rejected_overloaded"] += 1
+            self.breaker.release_probe()
+            raise LLMOverloaded(f"LLM queue is full ({self.waiting} waiting)")
+
+        budget = self.timeout_for(current_node.get())
+        deadline = time.monotonic() + budget
+        # Counted as waiting from admission, so a burst arriving in one loop tick still sees the bound
+        self.waiting += 1
+        call = {"queued": True, "started": False}
+        try:
+            response = await asyncio.wait_for(self._call(slots, messages, deadline, call, kwargs), budget)
+        except asyncio.TimeoutError:
+            self.counters["timeouts"] += 1
+            self.counters["failed"] += 1
+            # Running out of budget in our own queue says nothing about the upstream's health
+            if call["started"]:
+                self.breaker.record_failure()
+            else:
+                self.breaker.release_probe()
+            raise
+        except Exception as e:
+            self.counters["failed"] += 1
+            if is_transient(e):
+                self.breaker.record_failure()
+            else:
+                self.breaker.release_probe()
+            raise
+        except BaseException:
+            self.breaker.release_probe()
+            raise
+        finally:
+            if call["queued"]:
+                # Timed out or cancelled before the call even started waiting on the semaphore
+                self.waiting -= 1
+        self.counters["succeeded"] += 1
+        self.breaker.record_success()
+        return response
+
+    async def _call(self, slots: PrioritySlots, messages, deadline: float, call: Dict[str, bool], kwargs) -> BaseMessage:
+        node = current_node.get()
+        priority = self.priority_for(node)
+        conversation = current_conversation.get()
+        queued_at = time.perf_counter()
+        try:
+            await slots.acquire(priority, conversation)
+        finally:
+            self.waiting -= 1
+            call["queued"] = False
+            METRICS.observe("chatbot_llm_queue_wait_seconds", time.perf_counter() - queued_at,
+                            node=node, priority=str(priority))
+        started = time.perf_counter()
+        self.in_flight += 1
+        call["started"] = True
+        try:
+            attempt = 0
+            while True:
+                try:
+                    response = await self.llm.ainvoke(messages, **kwargs)
+                    usage = getattr(response, "usage_metadata", None)
+                    if usage:
+                        node = current_node.get()
+                        METRICS.observe("chatbot_llm_prompt_tokens", usage.get("input_tokens", 0), node=node)
+                        METRICS.observe("chatbot_llm_completion_tokens", usage.get("output_tokens", 0), node=node)
+                    return response
+                except Exception as e:
+                    # Full jitter, and never sleep past the node's budget
+                    delay = random.uniform(0, self.retry_base_delay * 2 ** attempt)
+                    if attempt >= self.max_retries or not is_transient(e) or time.monotonic() + delay >= deadline:
+                        raise
+                    attempt += 1
+                    self.counters["retries"] += 1
+                    await asyncio.sleep(delay)
+        finally:
+            self.in_flight -= 1
+            slots.release(conversation, time.perf_counter() - started)
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(
+            self.counters,
+            in_flight=self.in_flight,
+            waiting=self.waiting,
+            max_concurrency=self.max_concurrency,
+            max_queue=self.max_queue,
+            circuit=self.breaker.state,
+            circuit_opened=self.breaker.times_opened,
+            scheduler=self._slots_instance.stats() if self._slots_instance else None,
+        )
+
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
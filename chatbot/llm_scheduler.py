@@ -0,0 +1,81 @@
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class PrioritySlots:
+    """Concurrency slots handed out by priority class, round-robin between conversations.
+
+    A drop-in for the gateway's semaphore. Waiters are ordered by a virtual
+    start time: arrival plus `priority_step` seconds per priority class (0 is
+    served first) plus one more step for every call the same conversation
+    already has queued or running. Cheap nodes jump the queue, one busy
+    conversation cannot crowd out the others, and a low-priority call that
+    has waited `priority_step` seconds per class stops being overtaken.
+    Loop-bound like asyncio.Semaphore: only use it from one event loop.
+    """
+
+    def __init__(self, max_concurrency: int, priority_step: float):
+        self.max_concurrency = max_concurrency
+        self.priority_step = priority_step
+        self.free = max_concurrency
+        self._waiters: List[Tuple[float, int, asyncio.Future]] = []
+        self._order = itertools.count()
+        self._active: Dict[Optional[str], int] = {}
+        # Moving average of how long a call holds its slot, for Retry-After estimates
+        self.hold_seconds = 1.0
+        self.granted_by_priority: Dict[int, int] = {}
+
+    def _grant(self, priority: int) -> None:
+        self.granted_by_priority[priority] = self.granted_by_priority.get(priority, 0) + 1
+
+    async def acquire(self, priority: int, conversation: Optional[str]) -> None:
+        active = self._active.get(conversation, 0)
+        self._active[conversation] = active + 1
+        if self.free > 0 and not self._waiters:
+            self.free -= 1
+            self._grant(priority)
+            return
+        fairness = active if conversation is not None else 0
+        start = time.monotonic() + self.priority_step * (priority + fairness)
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (start, next(self._order), waiter))
+        try:
+            await waiter
+        except BaseException:
+            if waiter.done() and not waiter.cancelled():
+                # Granted in the same tick we were cancelled: pass the slot on
+                self._wake_next()
+            self._leave(conversation)
+            raise
+        self._grant(priority)
+
+    def release(self, conversation: Optional[str], held_seconds: float) -> None:
+        self.hold_seconds += 0.2 * (held_seconds - self.hold_seconds)
+        self._leave(conversation)
+        self._wake_next()
+
+    def _leave(self, conversation: Optional[str]) -> None:
+        remaining = self._active[conversation] - 1
+        if remaining:
+            self._active[conversation] = remaining
+        else:
+            del self._active[conversation]
+
+    def _wake_next(self) -> None:
+        while self._waiters:
+            _, _, waiter = heapq.heappop(self._waiters)
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.free += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "free": self.free,
+            "conversations": len(self._active),
+            "hold_seconds": round(self.hold_seconds, 3),
+            "granted_by_priority": dict(self.granted_by_priority),
+        }
@@ -0,0 +1,192 @@
+import math
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+# HDR-style log-linear buckets: values below 2**_SUB_BITS get one bucket each, above that every
+# power of two is split into 2**(_SUB_BITS - 1) buckets, so any recorded value is off by at most ~3%
+_SUB_BITS = 6
+_LINEAR = 1 << _SUB_BITS
+_HALF = _LINEAR >> 1
+
+# Cumulative `le` bounds exposed to Prometheus, in the metric's own unit
+LATENCY_BOUNDS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+TOKEN_BOUNDS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+BYTE_BOUNDS = (256, 1024, 4096, 16384, 65536, 262144)
+
+
+def _bucket_index(value: int) -> int:
+    if value < _LINEAR:
+        return value
+    shift = value.bit_length() - _SUB_BITS
+    return _LINEAR + (shift - 1) * _HALF + (value >> shift) - _HALF
+
+
+def _bucket_upper(index: int) -> int:
+    """Largest integer value that lands in the bucket"""
+    if index < _LINEAR:
+        return index
+    shift = (index - _LINEAR) // _HALF + 1
+    mantissa = (index - _LINEAR) % _HALF + _HALF
+    return ((mantissa + 1) << shift) - 1
+
+
+class Histogram:
+    """Fixed-precision histogram: O(1) record, no allocation after warm-up.
+
+    Values are scaled to integers (`scale=1e6` turns seconds into
+    microseconds) before bucketing; `percentile` and the exported buckets are
+    converted back to the original unit.
+    """
+
+    def __init__(self, scale: float = 1.0):
+        self.scale = scale
+        self.counts: List[int] = []
+        self.count = 0
+        self.total = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, value: float) -> None:
+        index = _bucket_index(max(0, int(value * self.scale)))
+        with self._lock:
+            if index >= len(self.counts):
+                self.counts.extend([0] * (index + 1 - len(self.counts)))
+            self.counts[index] += 1
+            self.count += 1
+            self.total += value
+
+    def percentile(self, q: float) -> float:
+        with self._lock:
+            target = max(1, math.ceil(self.count * q / 100))
+            seen = 0
+            for index, bucket_count in enumerate(self.counts):
+                seen += bucket_count
+                if seen >= target:
+                    return _bucket_upper(index) / self.scale
+        return 0.0
+
+    def cumulative(self, bounds: Tuple[float, ...]) -> List[int]:
+        """Number of values <= each bound (to bucket precision)"""
+        with self._lock:
+            counts = list(self.counts)
+        result, seen, index = [], 0, 0
+        for bound in bounds:
+            limit = bound * self.scale
+            while index < len(counts) and _bucket_upper(index) <= limit:
+                seen += counts[index]
+                index += 1
+            result.append(seen)
+        return result
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metrics:
+    """Process-wide counters, histograms and gauges, rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self._help: Dict[str, Tuple[str, str]] = {}
+        self._histograms: Dict[str, Dict[tuple, Histogram]] = {}
+        self._bounds: Dict[str, Tuple[float, ...]] = {}
+        self._scales: Dict[str, float] = {}
+        self._counters: Dict[str, Dict[tuple, float]] = {}
+        self._gauges: Dict[str, Callable[[], float]] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str, help_text: str, bounds: Tuple[float, ...], scale: float = 1.0) -> None:
+        self._help[name] = ("histogram", help_text)
+        self._bounds[name] = bounds
+        self._scales[name] = scale
+        self._histograms.setdefault(name, {})
+
+    def counter(self, name: str, help_text: str) -> None:
+        self._help[name] = ("counter", help_text)
+        self._counters.setdefault(name, {})
+
+    def gauge(self, name: str, help_text: str, read: Callable[[], float]) -> None:
+        """A value read at scrape time, e.g. the number of stored conversations"""
+        self._help[name] = ("gauge", help_text)
+        self._gauges[name] = read
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        series = self._histograms[name]
+        histogram = series.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = series.setdefault(key, Histogram(self._scales[name]))
+        histogram.record(value)
+
+    def inc(self, name: str, amount: float = 1, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters[name]
+            series[key] = series.get(key, 0) + amount
+
+    def get_histogram(self, name: str, **labels) -> Optional[Histogram]:
+        return self._histograms.get(name, {}).get(tuple(sorted(labels.items())))
+
+    def series(self, name: str) -> Dict[tuple, Histogram]:
+        """Every labelled histogram recorded under `name`"""
+        return dict(self._histograms.get(name, {}))
+
+    def reset(self, name: str) -> None:
+        """Drop the recorded series of one histogram, e.g. between benchmark runs"""
+        with self._lock:
+            self._histograms[name] = {}
+
+    def render_prometheus(self) -> str:
+        lines = []
+        for name, (kind, help_text) in self._help.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind == "counter":
+                with self._lock:
+                    series = list(self._counters[name].items())
+                for labels, value in series:
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+            elif kind == "gauge":
+                try:
+                    lines.append(f"{name} {_format_value(self._gauges[name]())}")
+                except Exception as e:
+                    print(f"Metrics gauge {name} failed: {e}")
+            else:
+                bounds = self._bounds[name]
+                for labels, histogram in list(self._histograms[name].items()):
+                    for bound, cumulative in zip(bounds, histogram.cumulative(bounds)):
+                        le = 'le="%s"' % _format_value(bound)
+                        lines.append(f"{name}_bucket{_format_labels(labels, le)} {cumulative}")
+                    inf = 'le="+Inf"'
+                    lines.append(f"{name}_bucket{_format_labels(labels, inf)} {histogram.count}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(histogram.total)}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+METRICS = Metrics()
+METRICS.histogram("chatbot_turn_duration_seconds", "Wall time of a chat turn by graph path (nodes visited)",
+                  LATENCY_BOUNDS, scale=1e6)
+METRICS.histogram("chatbot_node_duration_seconds", "Wall time of each LangGraph node", LATENCY_BOUNDS, scale=1e6)
+METRICS.histogram("chatbot_llm_call_duration_seconds", "Wall time of each LLM call, including queueing and retries",
+                  LATENCY_BOUNDS, scale=1e6)
+METRICS.histogram("chatbot_llm_queue_wait_seconds", "Time an LLM call waited for a gateway slot, by node and priority class",
+                  LATENCY_BOUNDS, scale=1e6)
+METRICS.counter("chatbot_turns_rejected_total", "Chat turns refused with 429 because the LLM wait queue was full")
+METRICS.histogram("chatbot_llm_prompt_tokens", "Prompt tokens per upstream LLM call", TOKEN_BOUNDS)
+METRICS.histogram("chatbot_llm_completion_tokens", "Completion tokens per upstream LLM call", TOKEN_BOUNDS)
+METRICS.counter("chatbot_llm_calls_total", "LLM calls by node and outcome (ok, cache_hit, error)")
+METRICS.counter("chatbot_fallbacks_total", "Replies or extractions produced by a node's fallback instead of the LLM")
+METRICS.histogram("chatbot_conversation_history_bytes", "History size of a conversation after each turn", BYTE_BOUNDS)
+METRICS.histogram("http_request_duration_seconds", "Flask request latency by route", LATENCY_BOUNDS, scale=1e6)
@@ -0,0 +1,307 @@
+import re
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from .age_index import AgeBracketIndex, PlanEntry
+
+# Plan fields holding lists of names; a query on one matches plans whose list contains every requested term
+LIST_FIELDS = ("add_ons", "exclusions", "discounts", "riders")
+# Fields parsed from "$150-200/month"-style strings into sorted (low, high) indexes
+NUMERIC_FIELDS = ("premium", "deductible", "coverage")
+SORT_KEYS = {"premium": "premium_low", "deductible": "deductible_low", "coverage": "coverage_high"}
+
+# Words too generic to identify an add-on on their own ("Dental cover" is found by "dental", not "cover")
+_GENERIC_WORDS = {"cover", "coverage", "package", "treatments", "insurance", "plan", "with", "home"}
+_WORD = re.compile(r"[a-z0-9]+")
+_AMOUNT = re.compile(r"\$\s*([\d,]+(?:\.\d+)?)(?:\s*-\s*\$?\s*([\d,]+(?:\.\d+)?))?")
+_PERIOD = re.compile(r"/\s*([a-z]+)")
+# Words that turn a mention into a refusal ("no", "not", "don't" -> "don t", "without") and how far back they reach
+_NEGATIONS = {"no", "not", "without", "never", "don", "dont", "doesn", "except", "excluding", "exclude"}
+_NEGATION_REACH = 4
+_PRICE_CAP = re.compile(r"\b(?:under|below|less than|cheaper than|up to|max(?:imum)?|within)\s*\$\s*([\d,]+)")
+
+
+class SearchQueryError(ValueError):
+    """A search request with an unknown field or a value of the wrong type"""
+
+
+class SearchResult(NamedTuple):
+    total: int
+    entries: List[PlanEntry]
+
+
+def normalize_term(value: Any) -> str:
+    return " ".join(_WORD.findall(str(value).lower()))
+
+
+def parse_amount_range(text: Any) -> Optional[Tuple[float, float]]:
+    """"$150-200/month" -> (150, 200), "$1,500" -> (1500, 1500); None when the text has no dollar amount"""
+    match = _AMOUNT.search(str(text))
+    if not match:
+        return None
+    low = float(match.group(1).replace(",", ""))
+    high = float(match.group(2).replace(",", "")) if match.group(2) else low
+    return low, high
+
+
+def premium_period(text: Any) -> Optional[str]:
+    match = _PERIOD.search(str(text).lower())
+    return match.group(1) if match else None
+
+
+def _plan_amount(plan: Dict[str, Any], field: str) -> Optional[Tuple[float, float]]:
+    if field == "coverage":
+        # Coverage is prose for health and auto plans; travel plans carry the amount in coverage_limit
+        return parse_amount_range(plan.get("coverage", "")) or parse_amount_range(plan.get("coverage_limit", ""))
+    return parse_amount_range(plan.get(field, ""))
+
+
+class PlanSearchIndex:
+    """Attribute indexes over a catalog, built once per catalog snapshot.
+
+    Boolean and list fields go into an inverted index of (field, term) ->
+    entry ids; list values are indexed both whole and word by word, so
+    "maternity" finds "Maternity cover". Premium, deductible and coverage
+    ranges are kept as sorted (value, id) arrays, so a price cap is a bisect
+    and a sorted query walks the array instead of sorting the catalog.
+    Entry ids are catalog positions, which keeps unsorted results in
+    catalog order.
+    """
+
+    def __init__(self, entries: Iterable[PlanEntry]):
+        self._entries: Tuple[PlanEntry, ...] = tuple(entries)
+        self._ids = {(e.insurance_type, e.plan_tier, e.age_bracket): i for i, e in enumerate(self._entries)}
+        self._all: FrozenSet[int] = frozenset(range(len(self._entries)))
+        postings: Dict[Tuple[str, str], Set[int]] = {}
+        self.boolean_fields: Set[str] = set()
+        numeric: Dict[str, List[Tuple[float, int]]] = {}
+
+        def post(field: str, term: str, entry_id: int) -> None:
+            postings.setdefault((field, term), set()).add(entry_id)
+
+        for entry_id, entry in enumerate(self._entries):
+            post("insurance_type", normalize_term(entry.insurance_type), entry_id)
+            post("plan_tier", normalize_term(entry.plan_tier), entry_id)
+            for field, value in entry.plan.items():
+                if isinstance(value, bool):
+                    self.boolean_fields.add(field)
+                    post(field, "true" if value else "false", entry_id)
+                elif field in LIST_FIELDS and isinstance(value, list):
+                    for item in value:
+                        term = normalize_term(item)
+                        post(field, term, entry_id)
+                        for word in term.split():
+                            post(field, word, entry_id)
+            period = premium_period(entry.plan.get("premium", ""))
+            if period:
+                post("premium_period", period, entry_id)
+            for field in NUMERIC_FIELDS:
+                amount = _plan_amount(entry.plan, field)
+                if amount:
+                    numeric.setdefault(f"{field}_low", []).append((amount[0], entry_id))
+                    numeric.setdefault(f"{field}_high", []).append((amount[1], entry_id))
+
+        self._postings: Dict[Tuple[str, str], FrozenSet[int]] = {key: frozenset(ids) for key, ids in postings.items()}
+        self._numeric: Dict[str, Tuple[List[float], List[int]]] = {}
+        self._values: Dict[str, Dict[int, float]] = {}
+        for key, pairs in numeric.items():
+            pairs.sort()
+            self._numeric[key] = ([value for value, _ in pairs], [entry_id for _, entry_id in pairs])
+            self._values[key] = {entry_id: value for value, entry_id in pairs}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def terms(self, field: str) -> List[str]:
+        """Every indexed term of a field, whole values and single words"""
+        return sorted(term for name, term in self._postings if name == field)
+
+    def _matching(self, field: str, term: Any) -> FrozenSet[int]:
+        return self._postings.get((field, normalize_term(term)), frozenset())
+
+    def _bounded(self, candidates: FrozenSet[int], key: str, limit: float, at_most: bool) -> FrozenSet[int]:
+        """Narrow candidates to ids whose `key` value is <= limit (or >= limit)"""
+        values, ids = self._numeric.get(key, ([], []))
+        if at_most:
+            start, end = 0, bisect_right(values, limit)
+        else:
+            start, end = bisect_left(values, limit), len(values)
+        if end - start <= len(candidates):
+            return candidates & frozenset(ids[start:end])
+        # Fewer candidates than matching ids: checking each candidate beats building the slice
+        by_id = self._values.get(key, {})
+        return frozenset(
+            entry_id for entry_id in candidates
+            if entry_id in by_id and (by_id[entry_id] <= limit if at_most else by_id[entry_id] >= limit)
+        )
+
+    def _for_age(self, age_index: AgeBracketIndex, age: int, insurance_types: List[str]) -> FrozenSet[int]:
+        return frozenset(
+            self._ids[(e.insurance_type, e.plan_tier, e.age_bracket)]
+            for insurance_type in insurance_types
+            for e in age_index.lookup(insurance_type, age)
+        )
+
+    def search(self, query: Dict[str, Any], age_index: Optional[AgeBracketIndex] = None) -> SearchResult:
+        """Run a query from `parse_search_query`.
+
+        Numeric filters match overlapping ranges: `premium_max=200` keeps
+        plans whose premium starts at or below 200, `coverage_min` plans
+        whose coverage reaches at least that much.
+        """
+        candidate_sets: List[FrozenSet[int]] = []
+        types = query.get("insurance_type")
+        if types:
+            candidate_sets.append(frozenset().union(*(self._matching("insurance_type", t) for t in types)))
+        if query.get("plan_tier"):
+            candidate_sets.append(frozenset().union(*(self._matching("plan_tier", t) for t in query["plan_tier"])))
+        if query.get("age") is not None and age_index is not None:
+            wanted = {normalize_term(t) for t in types or ()}
+            age_types = [t for t in age_index.insurance_types() if not wanted or normalize_term(t) in wanted]
+            candidate_sets.append(self._for_age(age_index, query["age"], age_types))
+        for field, value in query.get("flags", {}).items():
+            candidate_sets.append(self._matching(field, "true" if value else "false"))
+        for field in LIST_FIELDS:
+            for term in query.get(field, ()):
+                candidate_sets.append(self._matching(field, term))
+        if query.get("premium_period"):
+            candidate_sets.append(self._matching("premium_period", query["premium_period"]))
+
+        # Intersect smallest first so each step touches as few ids as possible
+        candidates = self._all
+        for ids in sorted(candidate_sets, key=len):
+            candidates = candidates & ids
+            if not candidates:
+                break
+        # Range bounds last, when the term filters have usually left few candidates
+        for field in NUMERIC_FIELDS:
+            if candidates and query.get(f"{field}_max") is not None:
+                candidates = self._bounded(candidates, f"{field}_low", query[f"{field}_max"], at_most=True)
+            if candidates and query.get(f"{field}_min") is not None:
+                candidates = self._bounded(candidates, f"{field}_high", query[f"{field}_min"], at_most=False)
+
+        offset, limit = query.get("offset", 0), query.get("limit", 10)
+        return SearchResult(len(candidates), [
+            self._entries[entry_id] for entry_id in self._ordered(candidates, query.get("sort"), offset + limit)[offset:]
+        ])
+
+    def _ordered(self, candidates: FrozenSet[int], sort: Optional[str], count: int) -> List[int]:
+        """The first `count` candidate ids in sort order; plans without the sort field come last"""
+        if not sort:
+            return sorted(candidates)[:count]
+        descending = sort.startswith("-")
+        key = SORT_KEYS[sort.lstrip("-")]
+        _, ids = self._numeric.get(key, ([], []))
+        walk = reversed(ids) if descending else ids
+        if len(candidates) * 8 < len(ids):
+            # A few candidates: sorting them beats walking the whole index
+            values = self._values[key]
+            walk = sorted((entry_id for entry_id in candidates if entry_id in values),
+                          key=lambda entry_id: (values[entry_id], entry_id), reverse=descending)
+        ordered = []
+        for entry_id in walk:
+            if entry_id in candidates:
+                ordered.append(entry_id)
+                if len(ordered) == count:
+                    return ordered
+        seen = set(ordered)
+        ordered.extend(entry_id for entry_id in sorted(candidates) if entry_id not in seen)
+        return ordered[:count]
+
+
+def _string_list(data: Dict[str, Any], key: str) -> List[str]:
+    value = data[key]
+    values = [value] if isinstance(value, str) else value
+    if not isinstance(values, list) or not all(isinstance(item, str) and item.strip() for item in values):
+        raise SearchQueryError(f"{key} must be a string or a list of strings")
+    return values
+
+
+def _number(data: Dict[str, Any], key: str) -> float:
+    value = data[key]
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+        raise SearchQueryError(f"{key} must be a non-negative number")
+    return float(value)
+
+
+def parse_search_query(data: Any, index: PlanSearchIndex, max_limit: int = 100) -> Dict[str, Any]:
+    """Validate a search request body into the query dict `PlanSearchIndex.search` takes"""
+    if not isinstance(data, dict):
+        raise SearchQueryError("Request body must be a JSON object")
+    query: Dict[str, Any] = {"flags": {}}
+    for key in data:
+        if key in ("insurance_type", "plan_tier") or key in LIST_FIELDS:
+            query[key] = _string_list(data, key)
+        elif key in index.boolean_fields:
+            if not isinstance(data[key], bool):
+                raise SearchQueryError(f"{key} must be true or false")
+            query["flags"][key] = data[key]
+        elif key in {f"{field}_{bound}" for field in NUMERIC_FIELDS for bound in ("min", "max")}:
+            query[key] = _number(data, key)
+        elif key == "premium_period":
+            if not isinstance(data[key], str):
+                raise SearchQueryError("premium_period must be a string such as 'month' or 'trip'")
+            query[key] = data[key]
+        elif key == "age":
+            if isinstance(data[key], bool) or not isinstance(data[key], int):
+                raise SearchQueryError("age must be an integer")
+            query[key] = data[key]
+        elif key == "sort":
+            if not isinstance(data[key], str) or data[key].lstrip("-") not in SORT_KEYS:
+                raise SearchQueryError(f"sort must be one of {sorted(SORT_KEYS)}, optionally prefixed with '-'")
+            query[key] = data[key]
+        elif key in ("limit", "offset"):
+            value = data[key]
+            if isinstance(value, bool) or not isinstance(value, int) or value < (1 if key == "limit" else 0):
+                raise SearchQueryError(f"{key} must be a {'positive' if key == 'limit' else 'non-negative'} integer")
+            query[key] = min(value, max_limit) if key == "limit" else value
+        else:
+            raise SearchQueryError(f"Unknown search field: {key}")
+    return query
+
+
+def _asked_for(words: List[str], padded: str, term: str) -> bool:
+    """`term` appears in the message at least once without a negation shortly before it"""
+    if f" {term} " not in padded:
+        return False
+    phrase = term.split()
+    for start in range(len(words) - len(phrase) + 1):
+        if words[start:start + len(phrase)] != phrase:
+            continue
+        before = words[max(0, start - _NEGATION_REACH):start]
+        if "but" in before:
+            # "no maternity but cashless": the negation ends at "but"
+            before = before[len(before) - before[::-1].index("but"):]
+        if not _NEGATIONS.intersection(before):
+            return True
+    return False
+
+
+def filters_from_message(message: str, index: PlanSearchIndex) -> Dict[str, Any]:
+    """Attribute filters a chat message asks for, e.g. "cashless with maternity under $200".
+
+    Only terms the catalog actually has are picked up, so the chat graph can
+    narrow its plan lookup without an extra LLM call. Negated mentions
+    ("I don't want maternity cover", "without riders") are not requirements.
+    """
+    text = normalize_term(message)
+    words = text.split()
+    padded = f" {text} "
+    query: Dict[str, Any] = {"flags": {}}
+    for field in sorted(index.boolean_fields):
+        if _asked_for(words, padded, field.replace("_", " ")):
+            query["flags"][field] = True
+    # Exclusions are what a plan leaves out, so a message mentioning one is not asking for it
+    for field in ("add_ons", "discounts", "riders"):
+        terms = [
+            term for term in index.terms(field)
+            if (" " in term or (len(term) >= 5 and term not in _GENERIC_WORDS)) and _asked_for(words, padded, term)
+        ]
+        # "maternity cover" already implies "maternity"
+        terms = [term for term in terms if not any(term != other and f" {term} " in f" {other} " for other in terms)]
+        if terms:
+            query[field] = terms
+    cap = _PRICE_CAP.search(message.lower())
+    if cap:
+        query["premium_max"] = float(cap.group(1).replace(",", ""))
+    return query if len(query) > 1 or query["flags"] else {}
@@ -0,0 +1,224 @@
+import hashlib
+from dataclasses import dataclass
+from textwrap import dedent
+from typing import Dict, List, Tuple
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from langchain_core.prompts import ChatPromptTemplate
+
+_MESSAGE_CLASSES = {"system": SystemMessage, "human": HumanMessage, "ai": AIMessage}
+
+
+@dataclass(frozen=True)
+class PromptSpec:
+    """A parsed prompt template with a version and a hash of its source text.
+
+    `template` is the LangChain form for interop; formatting goes through the
+    pre-split (message class, format string) parts, which skips LangChain's
+    per-call template validation.
+    """
+    name: str
+    version: int
+    template: ChatPromptTemplate
+    sha: str
+    parts: Tuple[Tuple[type, str], ...]
+
+    @property
+    def key(self) -> str:
+        """Stable identifier such as "extraction@v2:1a2b3c4d", for cache keys and logs"""
+        return f"{self.name}@v{self.version}:{self.sha[:8]}"
+
+    def format_messages(self, **variables) -> List[BaseMessage]:
+        return [message_class(content=text.format(**variables)) for message_class, text in self.parts]
+
+
+class PromptRegistry:
+    """Holds every prompt the graph uses, parsed once at startup"""
+
+    def __init__(self):
+        self._prompts: Dict[str, PromptSpec] = {}
+
+    def register(self, name: str, version: int, messages: List[Tuple[str, str]]) -> PromptSpec:
+        messages = [(role, dedent(text).strip()) for role, text in messages]
+        source = "\n".join(f"{role}: {text}" for role, text in messages)
+        spec = PromptSpec(
+            name=name,
+            version=version,
+            template=ChatPromptTemplate.from_messages(messages),
+            sha=hashlib.sha256(f"{name}:{version}:{source}".encode("utf-8")).hexdigest(),
+            parts=tuple((_MESSAGE_CLASSES[role], text) for role, text in messages),
+        )
+        self._prompts[name] = spec
+        return spec
+
+    def __getitem__(self, name: str) -> PromptSpec:
+        return self._prompts[name]
+
+    def versions(self) -> Dict[str, str]:
+        return {name: spec.key for name, spec in self._prompts.items()}
+
+
+def build_prompt_registry() -> PromptRegistry:
+    """Parse the graph's prompts. Literal braces in the prompt text are doubled."""
+    registry = PromptRegistry()
+
+    registry.register("greeting", 1, [
+        ("system", """
+            You are a friendly insurance assistant.
+            The user just greeted you and you have their complete info:
+            - Age: {user_age}
+            - Insurance Type: {insurance_type}
+            - Insured For: {insured_for}
+
+            Generate an engaging greeting that:
+            1. Acknowledges them warmly
+            2. Confirms their info briefly
+            3. Offers 2-3 specific next steps like:
+            - "Would you like to see available plans?"
+            - "Should I recommend the best options for you?"
+            - "Do you want to compare different coverage levels?"
+
+            Keep it friendly, concise, and action-oriented."""),
+        ("human", "Generate engaging greeting with options"),
+    ])
+
+    registry.register("suggestion", 1, [
+        ("system", """
+            You are an expert insurance advisor.
+            Based on the given plans, suggest the best choice, explain why,
+            and include pros/cons in bullet points. Be friendly and clear."""),
+        ("human", """
+            User Info:
+            Age: {user_age}
+            Insurance Type: {insurance_type}
+            Insured For: {insured_for}
+
+            Plans:
+            {plans}"""),
+    ])
+
+    registry.register("extraction", 1, [
+        ("system", """
+            You are an intent and information extraction assistant.
+
+            Return ONLY a JSON object with this format:
+            {{
+                "age": number_or_null,
+                "insurance_type": "health" | "life" | "auto" | null,
+                "insured_for": "self" | "spouse" | "child" | "parent" | null,
+                "intent": "get_insurance_info" | "ask_suggestion" | "other"
+            }}
+
+            Rules:
+            - "get_insurance_info": User is giving info or asking for an insurance plan.
+            - "ask_suggestion": User is asking for advice, recommendation, or comparison based on existing info.
+            - "other": Anything unrelated to insurance.
+            - "greet": If the user says "hi", "hello", etc.
+
+            Examples:
+            - "I'm 25 and need health insurance" -> {{"age": 25, "insurance_type": "health", "insured_for": "self", "intent": "get_insurance_info"}}
+            - "Looking for car insurance for my father" -> {{"age": null, "insurance_type": "auto", "insured_for": "parent", "intent": "get_insurance_info"}}
+            - "My wife needs life insurance, she's 30" -> {{"age": 30, "insurance_type": "life", "insured_for": "spouse", "intent": "get_insurance_info"}}
+            - "What do you suggest?" -> {{"age": null, "insurance_type": null, "insured_for": null, "intent": "ask_suggestion"}}
+            - "Tell me a joke" -> {{"age": null, "insurance_type": null, "insured_for": null, "intent": "other"}}
+            - "If Greetings {{"age": null, "insurance_type": null, "insured_for": null, "intent": "greet"}}"""),
+        ("human", "Extract from: {user_message}"),
+    ])
+
+    # v2: missing_info and the user's details are real variables; v1 sent the placeholders literally
+    registry.register("followup", 2, [
+        ("system", """
+            You are a friendly insurance assistant.
+            CRITICAL RULES:
+
+            1. ONLY ask for the missing information: {missing_info}
+            2. DO NOT ask about coverage details, family members, medical conditions, etc.
+            3. Keep it simple and direct
+            4. Available insurance types: health, life, auto
+            5. Insured for options: self, spouse, child, parent
+            6. Only ask for the missing information, nothing else!
+            7. For FIRST-TIME greetings (when conversation history is empty or minimal), greet warmly and say "How may I assist you today?"
+            8. For SUBSEQUENT greetings (when conversation history exists), acknowledge the greeting briefly and ask for missing info.
+
+            Current user info:
+            - Age: {user_age}
+            - Insurance type: {insurance_type}
+            - Insured For: {insured_for}"""),
+        ("human", """
+            Missing information that I need: {missing_info}
+            Intent: {intent}
+            Is this first interaction: {is_first_interaction}
+
+            Conversation history:
+            {history_text}
+
+            INSTRUCTIONS:
+            - If intent is "greet" AND this is the first interaction (minimal/no history), respond with warm greeting + "How may I assist you today?"
+            - If intent is "greet" AND this is NOT the first interaction (history exists), acknowledge greeting + ask for missing info
+            - For all other intents, ask for missing information only
+
+            Generate appropriate response based on above rules."""),
+    ])
+
+    registry.register("no_results", 1, [
+        ("system", "You are a helpful insurance assistant. Generate a polite response when no insurance options are found."),
+        ("human", "No insurance options found for {insured_for} {insurance_type} insurance for age {user_age}. Suggest contacting support."),
+    ])
+
+    registry.register("response", 1, [
+        ("system", """
+            You are a helpful insurance assistant.
+            Present the list of insurance information in a friendly, well-formatted way using emojis and clear structure.
+            Be enthusiastic but professional."""),
+        ("human", """
+            Present this insurance information to the user:
+            {insurance_info}
+            If there are multiple options at the end summarize them and compare them.
+            Make it engaging and ask if they want more details."""),
+    ])
+
+    registry.register("single_call", 1, [
+        ("system", """
+            You are a friendly insurance assistant. In ONE step, extract the user's details
+            and write your reply to them.
+
+            Return ONLY a JSON object with this format:
+            {{
+                "age": number_or_null,
+                "insurance_type": "health" | "life" | "auto" | null,
+                "insured_for": "self" | "spouse" | "child" | "parent" | null,
+                "intent": "get_insurance_info" | "ask_suggestion" | "greet" | "other",
+                "reply": "your message to the user"
+            }}
+
+            Extraction rules:
+            - Only fill fields the user's latest message states; use null otherwise.
+            - "get_insurance_info": User is giving info or asking for an insurance plan.
+            - "ask_suggestion": User is asking for advice, recommendation, or comparison.
+            - "greet": The user says "hi", "hello", etc.
+            - "other": Anything unrelated to insurance.
+
+            Reply rules:
+            - If age, insurance type or insured-for is still unknown after this message,
+              ONLY ask for the missing details (insurance types: health, life, auto;
+              insured for: self, spouse, child, parent).
+            - If everything is known, present EVERY plan from the catalog below that matches
+              the insurance type and age, quoting each premium exactly as written, then ask
+              if they want more details. Use emojis and a clear structure.
+            - Never invent plans or prices that are not in the catalog.
+
+            Catalog (insurance type | tier | ages | premium | coverage):
+            {catalog}"""),
+        ("human", """
+            Known user info before this message:
+            - Age: {user_age}
+            - Insurance type: {insurance_type}
+            - Insured For: {insured_for}
+
+            Conversation history:
+            {history_text}
+
+            User message: {user_message}"""),
+    ])
+
+    return registry
@@ -0,0 +1,64 @@
+import threading
+import time
+from typing import Optional
+
+from config import Config
+
+# chatbot_api pulls in langgraph, langchain and the Groq client; it is imported on first use
+# so the rest of the app (e.g. /api/insurance) can start serving without paying for it
+
+_chatbot = None
+_error: Optional[str] = None
+_lock = threading.Lock()
+
+
+def get_chatbot():
+    """Return the shared InsuranceChatbotAPI, building it on first call.
+
+    Returns None when chat is disabled (no API key configured); `chatbot_error`
+    says why. Safe to call from many threads: only one builds the chatbot.
+    """
+    global _chatbot, _error
+    if _chatbot is not None or _error is not None:
+        return _chatbot
+    with _lock:
+        if _chatbot is None and _error is None:
+            if not Config.GROQ_API_KEY and Config.LLM_CASSETTE_MODE != "replay":
+                # Don't pay for the LangChain imports just to find out chat can't run
+                _error = "GROQ_API_KEY is not set"
+                print(f"Chat disabled: {_error}")
+                return None
+            from .chatbot_api import InsuranceChatbotAPI
+            try:
+                _chatbot = InsuranceChatbotAPI()
+            except ValueError as e:
+                _error = str(e)
+                print(f"Chat disabled: {e}")
+    return _chatbot
+
+
+def peek_chatbot():
+    """The chatbot if it has already been built, without building it"""
+    return _chatbot
+
+
+def chatbot_error() -> Optional[str]:
+    return _error
+
+
+def warm_up() -> None:
+    """Build the chatbot and start the event loop now rather than on the first chat request"""
+    from .utils import get_event_loop
+
+    started = time.perf_counter()
+    get_event_loop()
+    get_chatbot()
+    print(f"Chatbot warm-up finished in {time.perf_counter() - started:.2f}s"
+          + ("" if _error is None else " (chat disabled)"))
+
+
+def start_warm_up() -> threading.Thread:
+    """Warm up in a background thread so the server can accept requests meanwhile"""
+    thread = threading.Thread(target=warm_up, name="chatbot-warm-up", daemon=True)
+    thread.start()
+    return thread
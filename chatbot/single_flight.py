@@ -0,0 +1,71 @@
+import asyncio
+import threading
+from typing import Any, Dict, List
+
+from langchain_core.messages import BaseMessage
+
+from .llm_cache import cache_key
+
+
+class SingleFlightChatModel:
+    """Shares one upstream call between concurrent identical prompts.
+
+    The first caller for a prompt (the leader) starts the call; callers that
+    arrive with the same prompt while it is in flight await the same result,
+    error included. Unlike the response cache this also covers keys that have
+    never been seen, e.g. a burst of identical greetings.
+    """
+
+    def __init__(self, llm, model_name: str):
+        self.llm = llm
+        self.model_name = model_name
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.upstream_calls = 0
+        self.collapsed = 0
+        self.max_waiters = 0
+        self._waiters: Dict[str, int] = {}
+
+    async def ainvoke(self, messages: List[BaseMessage], **kwargs) -> BaseMessage:
+        if kwargs:
+            # Per-call options could change the answer; don't share those calls
+            return await self.llm.ainvoke(messages, **kwargs)
+        key = cache_key(messages, self.model_name)
+        with self._lock:
+            self.calls += 1
+            shared = self._in_flight.get(key)
+            if shared is None:
+                self.upstream_calls += 1
+                # A task rather than a bare await, so followers still get the result if the leader is cancelled
+                shared = asyncio.ensure_future(self.llm.ainvoke(messages))
+                self._in_flight[key] = shared
+                self._waiters[key] = 0
+                shared.add_done_callback(lambda task, key=key: self._finish(key, task))
+            else:
+                self.collapsed += 1
+                self._waiters[key] += 1
+                self.max_waiters = max(self.max_waiters, self._waiters[key])
+        return await asyncio.shield(shared)
+
+    def _finish(self, key: str, task: asyncio.Future) -> None:
+        with self._lock:
+            self._in_flight.pop(key, None)
+            self._waiters.pop(key, None)
+        if not task.cancelled():
+            # Mark the error as retrieved even if every waiter has gone away
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "upstream_calls": self.upstream_calls,
+                "collapsed": self.collapsed,
+                "collapse_rate": self.collapsed / self.calls if self.calls else 0.0,
+                "max_waiters": self.max_waiters,
+                "in_flight": len(self._in_flight),
+            }
+
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
@@ -11,4 +11,8 @@ class ChatbotState(TypedDict):
     last_response: str
     insured_for: Optional[str]
     intent: Optional[str]  # Added to track user intent
-    greeting_detected: bool = False  # Track if greeting was detected
\ No newline at end of file
+    greeting_detected: bool = False  # Track if greeting was detected
+    candidate_response: Optional[str]  # Reply drafted by the single-call node, pending verification
+    history_summary: str  # Compact summary of turns that fell out of the message window
+    history_overflow: List[Dict[str, str]]  # Messages out of the window, waiting to be summarized
+    history_trimmed: int  # Messages dropped from the front of `messages` so far; messages[i] has sequence id trimmed + i + 1
\ No newline at end of file
@@ -0,0 +1,72 @@
+import contextvars
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+
+@dataclass
+class TurnTrace:
+    """What one chat turn did: LLM calls made and graph nodes visited, in order"""
+    llm_calls: int = 0
+    nodes: List[str] = field(default_factory=list)
+    started: float = field(default_factory=time.perf_counter)
+
+    @property
+    def path(self) -> str:
+        return ">".join(self.nodes)
+
+
+# Trace of the running turn; set by InsuranceChatbotAPI for the duration of a graph run
+_turn_trace: contextvars.ContextVar[Optional[TurnTrace]] = contextvars.ContextVar("turn_trace", default=None)
+
+
+def start_turn() -> contextvars.Token:
+    return _turn_trace.set(TurnTrace())
+
+
+def count_llm_call() -> None:
+    trace = _turn_trace.get()
+    if trace is not None:
+        trace.llm_calls += 1
+
+
+def record_node(node: str) -> None:
+    trace = _turn_trace.get()
+    if trace is not None:
+        trace.nodes.append(node)
+
+
+def finish_turn(token: contextvars.Token) -> TurnTrace:
+    """Reset the context and return the finished turn's trace"""
+    trace = _turn_trace.get()
+    _turn_trace.reset(token)
+    return trace
+
+
+class TurnStats:
+    """Average LLM calls per turn for each graph mode, plus single-call fallbacks"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._modes: Dict[str, Dict[str, int]] = {}
+
+    def _counts(self, mode: str) -> Dict[str, int]:
+        return self._modes.setdefault(mode, {"turns": 0, "llm_calls": 0, "fallbacks": 0})
+
+    def record(self, mode: str, llm_calls: int) -> None:
+        with self._lock:
+            counts = self._counts(mode)
+            counts["turns"] += 1
+            counts["llm_calls"] += llm_calls
+
+    def record_fallback(self, mode: str) -> None:
+        with self._lock:
+            self._counts(mode)["fallbacks"] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                mode: dict(counts, avg_llm_calls_per_turn=counts["llm_calls"] / counts["turns"] if counts["turns"] else 0.0)
+                for mode, counts in self._modes.items()
+            }
@@ -1,13 +1,70 @@
 import asyncio
+import contextvars
+import os
+import threading
+from concurrent.futures import Future
 from functools import wraps
 
+_loop = None
+_loop_pid = None
+_loop_lock = threading.Lock()
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """Return the long-lived event loop for this worker process, starting it on first use.
+
+    The loop runs forever in a daemon thread so the LLM client (and its HTTP
+    connection pool) is bound to a single loop for the life of the process.
+    A forked worker gets its own loop because the parent's thread does not survive the fork.
+    """
+    global _loop, _loop_pid
+    with _loop_lock:
+        if _loop is None or _loop.is_closed() or _loop_pid != os.getpid():
+            _loop = asyncio.new_event_loop()
+            _loop_pid = os.getpid()
+            thread = threading.Thread(target=_loop.run_forever, name="chatbot-event-loop", daemon=True)
+            thread.start()
+        return _loop
+
+
+def _copy_task_result(task: asyncio.Task, future: Future):
+    if future.cancelled():
+        return
+    if task.cancelled():
+        future.cancel()
+    elif task.exception() is not None:
+        future.set_exception(task.exception())
+    else:
+        future.set_result(task.result())
+
+
+def submit_async(coro) -> Future:
+    """Schedule a coroutine on the shared loop and return a concurrent Future for its result.
+
+    The caller's context (including Flask's request and app context) is copied
+    into the task so `request` and `jsonify` keep working inside async views.
+    """
+    loop = get_event_loop()
+    context = contextvars.copy_context()
+    future = Future()
+
+    def _start():
+        task = loop.create_task(coro, context=context)
+        task.add_done_callback(lambda t: _copy_task_result(t, future))
+        # Cancelling the returned future (e.g. the client went away) cancels the task too
+        future.add_done_callback(lambda f: f.cancelled() and loop.call_soon_threadsafe(task.cancel))
+
+    loop.call_soon_threadsafe(_start)
+    return future
+
+
+def run_async(coro, timeout: float = None):
+    """Run a coroutine on the shared loop and block until it finishes"""
+    return submit_async(coro).result(timeout)
+
+
 def async_route(f):
     @wraps(f)
     def wrapper(*args, **kwargs):
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            return loop.run_until_complete(f(*args, **kwargs))
-        finally:
-            loop.close()
+        return run_async(f(*args, **kwargs))
     return wrapper
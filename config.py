@@ -10,3 +10,87 @@ class Config:
     LANGSMITH_API_KEY = os.getenv("LANGSMITH_API_KEY")
     LANGCHAIN_TRACING_V2 = os.getenv("LANGCHAIN_TRACING_V2", True)
     FLASK_SECRET_KEY = os.getenv('FLASK_SECRET_KEY', 'session-key')
+
+    # Build the chatbot in a background thread at startup instead of on the first chat request
+    CHATBOT_WARM_UP = os.getenv("CHATBOT_WARM_UP", "true").lower() in ("1", "true", "yes")
+
+    # Plan catalog: the built-in insurance_db catalog when unset, else a .json file (same nested shape)
+    # or a .jsonl file with one plan per line; the file is polled and hot-reloaded when it changes
+    CATALOG_PATH = os.getenv("CATALOG_PATH")
+    CATALOG_RELOAD_INTERVAL = float(os.getenv("CATALOG_RELOAD_INTERVAL", 5))
+
+    # Conversation storage
+    CONVERSATION_BACKEND = os.getenv("CONVERSATION_BACKEND", "memory")
+    CONVERSATION_MAX_SIZE = int(os.getenv("CONVERSATION_MAX_SIZE", 100000))
+    CONVERSATION_TTL_SECONDS = float(os.getenv("CONVERSATION_TTL_SECONDS", 24 * 60 * 60))
+    CONVERSATION_SWEEP_INTERVAL = float(os.getenv("CONVERSATION_SWEEP_INTERVAL", 60))
+    CONVERSATION_DB_PATH = os.getenv("CONVERSATION_DB_PATH", "conversations.db")
+    # Hold in-memory states as slot objects instead of nested dicts
+    CONVERSATION_COMPACT_STATE = os.getenv("CONVERSATION_COMPACT_STATE", "true").lower() in ("1", "true", "yes")
+    # Memory backend only: append changed conversations to this file every interval and restore it at startup.
+    # One file per process; multi-worker deployments should use the sqlite backend instead
+    CONVERSATION_SNAPSHOT_PATH = os.getenv("CONVERSATION_SNAPSHOT_PATH")
+    CONVERSATION_SNAPSHOT_INTERVAL = float(os.getenv("CONVERSATION_SNAPSHOT_INTERVAL", 10))
+    # How long a chat request for an unknown conversation waits for the startup restore to finish
+    CONVERSATION_RESTORE_WAIT_SECONDS = float(os.getenv("CONVERSATION_RESTORE_WAIT_SECONDS", 5))
+
+    # Rule-based extraction that skips the LLM for obvious turns
+    FAST_PATH_ENABLED = os.getenv("FAST_PATH_ENABLED", "true").lower() in ("1", "true", "yes")
+    FAST_PATH_MIN_CONFIDENCE = float(os.getenv("FAST_PATH_MIN_CONFIDENCE", 0.8))
+
+    # Local intent classifier trained from logged LLM extractions (python -m chatbot.intent_classifier train ...).
+    # INTENT_LOG_PATH records every LLM extraction as training data; the model answers turns the rules miss
+    INTENT_LOG_PATH = os.getenv("INTENT_LOG_PATH")
+    INTENT_CLASSIFIER_PATH = os.getenv("INTENT_CLASSIFIER_PATH")
+    INTENT_CLASSIFIER_MIN_CONFIDENCE = float(os.getenv("INTENT_CLASSIFIER_MIN_CONFIDENCE", 0.9))
+
+    # LLM client
+    LLM_MODEL = os.getenv("LLM_MODEL", "llama3-70b-8192")
+    LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+    LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", 10000))
+    LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", 60 * 60))
+    LLM_CACHE_DISK_PATH = os.getenv("LLM_CACHE_DISK_PATH")
+    # Rows kept in the SQLite tier; expired and excess rows are purged every LLM_CACHE_DISK_PURGE_EVERY writes
+    LLM_CACHE_DISK_MAX_ENTRIES = int(os.getenv("LLM_CACHE_DISK_MAX_ENTRIES", 100000))
+    LLM_CACHE_DISK_PURGE_EVERY = int(os.getenv("LLM_CACHE_DISK_PURGE_EVERY", 256))
+    # Concurrent identical prompts share one upstream call
+    LLM_SINGLE_FLIGHT_ENABLED = os.getenv("LLM_SINGLE_FLIGHT_ENABLED", "true").lower() in ("1", "true", "yes")
+
+    # LLM gateway: concurrency cap, timeouts, retries and circuit breaker around every upstream call
+    LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 16))
+    LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", 64))
+    LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", 20))
+    # Per-node budgets as "node=seconds,..."; extraction has a cheap regex fallback so it gives up early
+    LLM_NODE_TIMEOUTS = os.getenv(
+        "LLM_NODE_TIMEOUTS",
+        "extract_info_with_llm=6,ask_followup_with_llm=10,acknowledge_greeting=10,"
+        "generate_response_with_llm=25,generate_suggestion_with_llm=25,extract_and_reply_with_llm=25"
+    )
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 2))
+    LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", 0.25))
+    LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", 5))
+    LLM_BREAKER_RESET_SECONDS = float(os.getenv("LLM_BREAKER_RESET_SECONDS", 30))
+    # Record/replay for repeatable perf runs: "record" appends every upstream call to LLM_CASSETTE_PATH, "replay"
+    # answers from it without the network (no API key needed), sleeping recorded latency x LLM_CASSETTE_LATENCY_SCALE.
+    # The response cache is off while recording so every prompt reaches the cassette
+    LLM_CASSETTE_MODE = os.getenv("LLM_CASSETTE_MODE", "").lower()
+    LLM_CASSETTE_PATH = os.getenv("LLM_CASSETTE_PATH", "llm_cassette.jsonl")
+    LLM_CASSETTE_LATENCY_SCALE = float(os.getenv("LLM_CASSETTE_LATENCY_SCALE", 1.0))
+    # Priority classes as "node=class,..." (0 first); short follow-ups and greetings go ahead of long generations.
+    # A waiting call is overtaken for at most LLM_PRIORITY_STEP_SECONDS per class it is behind
+    LLM_NODE_PRIORITIES = os.getenv(
+        "LLM_NODE_PRIORITIES",
+        "acknowledge_greeting=0,ask_followup_with_llm=0,extract_info_with_llm=1,extract_and_reply_with_llm=1,"
+        "generate_response_with_llm=2,generate_suggestion_with_llm=2"
+    )
+    LLM_DEFAULT_PRIORITY = int(os.getenv("LLM_DEFAULT_PRIORITY", 1))
+    LLM_PRIORITY_STEP_SECONDS = float(os.getenv("LLM_PRIORITY_STEP_SECONDS", 1.0))
+
+    # Merge extraction and reply generation into one LLM call (falls back to two calls when the draft fails checks)
+    CHAT_SINGLE_CALL = os.getenv("CHAT_SINGLE_CALL", "false").lower() in ("1", "true", "yes")
+
+    # Conversation history: recent turns kept verbatim, older ones folded into a summary
+    HISTORY_WINDOW_TURNS = int(os.getenv("HISTORY_WINDOW_TURNS", 6))
+    HISTORY_MAX_BYTES = int(os.getenv("HISTORY_MAX_BYTES", 32 * 1024))
+    HISTORY_MAX_TOKENS = int(os.getenv("HISTORY_MAX_TOKENS", 8000))
+    HISTORY_SUMMARY_MAX_CHARS = int(os.getenv("HISTORY_SUMMARY_MAX_CHARS", 2000))
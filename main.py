@@ -3,12 +3,14 @@ from flask_cors import CORS
 from dotenv import load_dotenv
 import os
 
-from chatbot.chatbot_api import InsuranceChatbotAPI
-from chatbot.utils import async_route
+from chatbot.catalog import CATALOG
+from chatbot.provider import start_warm_up
+from config import Config
 from routes.chat_routes import chat_bp
 from routes.insurance_routes import insurance_bp
 from routes.admin_routes import admin_bp
 from routes.error_handlers import register_error_handlers
+from routes.request_metrics import register_request_metrics
 
 load_dotenv()
 
@@ -21,6 +23,15 @@ app.register_blueprint(chat_bp, url_prefix="/api/chat")
 app.register_blueprint(insurance_bp, url_prefix="/api/insurance")
 app.register_blueprint(admin_bp, url_prefix="/api/admin")
 register_error_handlers(app)
+register_request_metrics(app)
+
+# Load the catalog now so a bad CATALOG_PATH fails at startup rather than on the first request
+CATALOG.current()
+CATALOG.start_watcher(Config.CATALOG_RELOAD_INTERVAL)
+
+# The insurance routes serve immediately; chat becomes ready once the warm-up finishes
+if Config.CHATBOT_WARM_UP:
+    start_warm_up()
 
 # Start app
 if __name__ == '__main__':
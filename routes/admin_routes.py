@@ -1,22 +1,23 @@
-from flask import Blueprint, jsonify
-from datetime import datetime, timedelta
-from routes.chat_routes import conversation_states
+from flask import Blueprint, Response, jsonify, request
+from chatbot.catalog import CATALOG, CatalogError
+from chatbot.history import history_stats
+from chatbot.metrics import METRICS
+from chatbot.provider import chatbot_error, peek_chatbot, warm_up
+from routes.chat_routes import conversation_snapshots, conversation_states, history_compactor
 
 admin_bp = Blueprint("admin", __name__)
 
-# Cleanup old conversations (run periodically in production)
+METRICS.gauge("chatbot_conversations_active", "Conversations held in the conversation store", lambda: len(conversation_states))
+METRICS.gauge("chatbot_llm_in_flight", "Upstream LLM calls currently running",
+              lambda: peek_chatbot().llm_gateway.in_flight if peek_chatbot() else 0)
+METRICS.gauge("chatbot_llm_waiting", "LLM calls waiting for a gateway slot",
+              lambda: peek_chatbot().llm_gateway.waiting if peek_chatbot() else 0)
+
+# Idle conversations are expired by the store's background sweeper;
+# this only forces an immediate sweep.
 def cleanup_old_conversations():
-    """Remove conversations older than 24 hours"""
-    cutoff_time = datetime.now() - timedelta(hours=24)
-    expired_conversations = [
-        conv_id for conv_id, conv_data in conversation_states.items()
-        if conv_data["last_activity"] < cutoff_time
-    ]
-    
-    for conv_id in expired_conversations:
-        del conversation_states[conv_id]
-    
-    return len(expired_conversations)
+    """Expire conversations idle for longer than the configured TTL"""
+    return conversation_states.expire()
 
 @admin_bp.route("/cleanup", methods=["POST"])
 def cleanup():
@@ -25,5 +26,61 @@ def cleanup():
     return jsonify({
         "cleaned_conversations": cleaned_count,
         "active_conversations": len(conversation_states),
+        "store": conversation_states.stats(),
+        "status": "success"
+    })
+
+def _history_memory_stats(sample_size):
+    """Per-conversation history size over the most recently active conversations"""
+    samples = [history_stats(state) for state in conversation_states.iter_states(sample_size)]
+    if not samples:
+        return {"sampled_conversations": 0}
+    totals = [sample["total_bytes"] for sample in samples]
+    return {
+        "sampled_conversations": len(samples),
+        "avg_bytes_per_conversation": sum(totals) / len(samples),
+        "max_bytes_per_conversation": max(totals),
+        "avg_tokens_per_conversation": sum(s["approx_tokens"] for s in samples) / len(samples),
+        "pending_summary_messages": sum(s["pending_summary_messages"] for s in samples),
+        "compactor": history_compactor.stats()
+    }
+
+@admin_bp.route("/stats", methods=["GET"])
+def stats():
+    """Admin endpoint reporting store, fast-path, LLM cache, gateway and single-flight, LLM call and history memory stats"""
+    # Stats never force the chatbot to load; before the first chat (or warm-up) its sections are null
+    chatbot = peek_chatbot()
+    return jsonify({
+        "store": conversation_states.stats(),
+        "snapshot": conversation_snapshots.stats() if conversation_snapshots else None,
+        "catalog": CATALOG.stats(),
+        "chat": "ready" if chatbot else ("disabled" if chatbot_error() else "not_loaded"),
+        "fast_path": chatbot.fast_path_stats.snapshot() if chatbot else None,
+        "llm_cache": chatbot.llm_cache.stats() if chatbot and chatbot.llm_cache else None,
+        "llm_gateway": chatbot.llm_gateway.stats() if chatbot else None,
+        "llm_single_flight": chatbot.single_flight.stats() if chatbot and chatbot.single_flight else None,
+        "llm_cassette": chatbot.cassette.stats() if chatbot and chatbot.cassette else None,
+        "llm_calls_per_turn": chatbot.turn_stats.snapshot() if chatbot else None,
+        "history": _history_memory_stats(request.args.get("sample", 1000, type=int)),
         "status": "success"
-    })
\ No newline at end of file
+    })
+
+@admin_bp.route("/warmup", methods=["POST"])
+def warmup():
+    """Load the chatbot now (e.g. from a deploy hook) instead of on the first chat request"""
+    warm_up()
+    return jsonify({"chat": "ready" if peek_chatbot() else "disabled", "error": chatbot_error(), "status": "success"})
+
+@admin_bp.route("/catalog/reload", methods=["POST"])
+def reload_catalog():
+    """Reload the catalog file now instead of waiting for the watcher; an invalid file leaves the current version live"""
+    try:
+        reloaded = CATALOG.reload(force=True)
+    except CatalogError as e:
+        return jsonify({"error": str(e), "catalog": CATALOG.stats(), "status": "error"}), 400
+    return jsonify({"reloaded": reloaded, "catalog": CATALOG.stats(), "status": "success"})
+
+@admin_bp.route("/metrics", methods=["GET"])
+def metrics():
+    """Prometheus scrape endpoint: node, LLM and route latency histograms, token counts, fallbacks and store size"""
+    return Response(METRICS.render_prometheus(), mimetype="text/plain; version=0.0.4")
@@ -0,0 +1,89 @@
+import gzip
+import hashlib
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from flask import Response, current_app, request
+
+try:
+    import brotli
+except ImportError:  # optional: without it only identity and gzip variants are served
+    brotli = None
+
+# Bodies shorter than this are sent uncompressed; the encoding header would eat most of the saving
+MIN_COMPRESS_BYTES = 256
+
+
+class PreparedResponse:
+    """A JSON body serialized once, with precompressed variants and a strong ETag per variant"""
+
+    __slots__ = ("body", "gzip", "brotli", "etag")
+
+    def __init__(self, payload: Dict[str, Any]):
+        self.body = current_app.json.dumps(payload).encode("utf-8") + b"\n"
+        self.etag = hashlib.sha256(self.body).hexdigest()[:24]
+        compress = len(self.body) >= MIN_COMPRESS_BYTES
+        self.gzip = gzip.compress(self.body, compresslevel=9, mtime=0) if compress else None
+        self.brotli = brotli.compress(self.body, quality=11) if compress and brotli is not None else None
+
+    def respond(self, catalog_version: str) -> Response:
+        """The best variant the client accepts, or 304 when it already holds this body"""
+        body, etag, encoding = self.body, self.etag, None
+        if self.brotli is not None and request.accept_encodings["br"]:
+            body, etag, encoding = self.brotli, f"{self.etag}-br", "br"
+        elif self.gzip is not None and request.accept_encodings["gzip"]:
+            body, etag, encoding = self.gzip, f"{self.etag}-gzip", "gzip"
+
+        if_none_match = request.if_none_match
+        # Any variant's tag proves the client has this body, whichever encoding it came in
+        if if_none_match and (if_none_match.star_tag or any(
+            if_none_match.contains_weak(tag) for tag in (self.etag, f"{self.etag}-gzip", f"{self.etag}-br")
+        )):
+            response = Response(status=304)
+        else:
+            response = Response(body, mimetype="application/json")
+            if encoding:
+                response.headers["Content-Encoding"] = encoding
+        response.set_etag(etag)
+        response.headers["Vary"] = "Accept-Encoding"
+        # Clients may keep the body but must revalidate, so a catalog reload shows up on the next poll
+        response.headers["Cache-Control"] = "no-cache"
+        response.headers["X-Catalog-Version"] = catalog_version
+        return response
+
+
+class CatalogResponses:
+    """Prepared response bodies for one catalog version, built on first request.
+
+    Keys are bounded by what the routes accept (the types listing and one
+    quote per insurance type and valid age), so the dict never grows past a
+    few hundred bodies per version.
+    """
+
+    def __init__(self, version: str):
+        self.version = version
+        self._prepared: Dict[Hashable, PreparedResponse] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, build: Callable[[], Dict[str, Any]]) -> PreparedResponse:
+        prepared = self._prepared.get(key)
+        if prepared is None:
+            prepared = PreparedResponse(build())
+            with self._lock:
+                prepared = self._prepared.setdefault(key, prepared)
+        return prepared
+
+    def __len__(self) -> int:
+        return len(self._prepared)
+
+
+_current: Optional[CatalogResponses] = None
+
+
+def responses_for(catalog) -> CatalogResponses:
+    """Prepared bodies for `catalog`'s version; a reload starts a fresh set and the old one is dropped"""
+    global _current
+    responses = _current
+    if responses is None or responses.version != catalog.version:
+        responses = _current = CatalogResponses(catalog.version)
+    return responses
@@ -1,14 +1,57 @@
-from flask import Blueprint, request, jsonify
-from chatbot.chatbot_api import InsuranceChatbotAPI
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from chatbot.provider import chatbot_error, get_chatbot
 from chatbot.state import ChatbotState
-from chatbot.utils import async_route
+from chatbot.conversation_snapshot import ConversationSnapshotter
+from chatbot.conversation_store import InMemoryConversationStore, create_conversation_store
+from chatbot.history import HistoryCompactor, HistoryPolicy, history_page, history_stats
+from chatbot.metrics import METRICS
+from chatbot.utils import async_route, submit_async
+from config import Config
+import asyncio
+import atexit
+import json
+import queue
+import time
 import uuid
-from datetime import datetime
 
 chat_bp = Blueprint("chat", __name__)
 
-chatbot = InsuranceChatbotAPI()
-conversation_states = {}
+# Largest `limit` a history poll may ask for
+HISTORY_MAX_PAGE = 1000
+# History responses with more messages than this are streamed, HISTORY_STREAM_CHUNK messages per write
+HISTORY_STREAM_THRESHOLD = 200
+HISTORY_STREAM_CHUNK = 100
+
+conversation_states = create_conversation_store()
+conversation_states.start_sweeper(Config.CONVERSATION_SWEEP_INTERVAL)
+conversation_snapshots = None
+if Config.CONVERSATION_SNAPSHOT_PATH and isinstance(conversation_states, InMemoryConversationStore):
+    # Restores in the background, so the insurance routes serve while conversations load
+    conversation_snapshots = ConversationSnapshotter(conversation_states, Config.CONVERSATION_SNAPSHOT_PATH)
+    conversation_snapshots.start(Config.CONVERSATION_SNAPSHOT_INTERVAL)
+    atexit.register(conversation_snapshots.stop)
+history_policy = HistoryPolicy(
+    window_turns=Config.HISTORY_WINDOW_TURNS,
+    max_bytes=Config.HISTORY_MAX_BYTES,
+    max_tokens=Config.HISTORY_MAX_TOKENS,
+    summary_max_chars=Config.HISTORY_SUMMARY_MAX_CHARS
+)
+history_compactor = HistoryCompactor(conversation_states, history_policy)
+history_compactor.start()
+
+def _commit_turn(conversation_id, state):
+    """Apply the history policy and store the state; older turns are summarized in the background"""
+    needs_summary = history_policy.apply(state)
+    conversation_states.put(conversation_id, state)
+    METRICS.observe("chatbot_conversation_history_bytes", history_stats(state)["total_bytes"])
+    if needs_summary:
+        history_compactor.schedule(conversation_id)
+
+def _wait_for_restore():
+    """Wait for the startup restore if it is still running; True when there may now be more conversations"""
+    if conversation_snapshots is None or not conversation_snapshots.restoring:
+        return False
+    return conversation_snapshots.wait_restored(Config.CONVERSATION_RESTORE_WAIT_SECONDS)
 
 @chat_bp.route("/start", methods=["POST"])
 def start_conversation():
@@ -16,23 +59,22 @@ def start_conversation():
     conversation_id = str(uuid.uuid4())
     
     # Initialize conversation state
-    conversation_states[conversation_id] = {
-        "state": ChatbotState(
-            messages=[],
-            user_age=None,
-            insurance_type=None,
-            user_query="",
-            relevant_docs=[],
-            missing_info=[],
-            conversation_stage="start",
-            last_response="",
-            insured_for=None,
-            intent=None, # Initialize intent as None
-            greeting_detected=False  # Initialize greeting_detected as False
-        ),
-        "created_at": datetime.now(),
-        "last_activity": datetime.now()
-    }
+    conversation_states.create(conversation_id, ChatbotState(
+        messages=[],
+        user_age=None,
+        insurance_type=None,
+        user_query="",
+        relevant_docs=[],
+        missing_info=[],
+        conversation_stage="start",
+        last_response="",
+        insured_for=None,
+        intent=None, # Initialize intent as None
+        greeting_detected=False,  # Initialize greeting_detected as False
+        history_summary="",
+        history_overflow=[],
+        history_trimmed=0
+    ))
     
     return jsonify({
         "conversation_id": conversation_id,
@@ -40,12 +82,43 @@ def start_conversation():
         "status": "success"
     })
 
+def _chat_disabled():
+    return jsonify({"error": f"Chat is disabled: {chatbot_error()}", "status": "error"}), 503
+
+def _overloaded(chatbot):
+    """429 with Retry-After when the LLM wait queue is full, so a burst backs off instead of timing out in the queue"""
+    retry_after = chatbot.llm_gateway.retry_after()
+    if retry_after is None:
+        return None
+    METRICS.inc("chatbot_turns_rejected_total")
+    response = jsonify({"error": "The assistant is busy, please retry shortly", "retry_after": retry_after,
+                        "status": "error"})
+    response.headers["Retry-After"] = str(retry_after)
+    return response, 429
+
+def _user_info(state):
+    return {
+        "age": state.get("user_age"),
+        "insurance_type": state.get("insurance_type"),
+        "insured_for": state.get("insured_for"),
+        "intent": state.get("intent")
+    }
+
+def _history_cursor(state):
+    """Sequence id of the latest message, for the client's next `history?since=` poll"""
+    return (state.get("history_trimmed") or 0) + len(state.get("messages", []))
+
 @chat_bp.route("/<conversation_id>", methods=["POST"])
 @async_route
 async def chat_message(conversation_id):
     """Send a message in an existing conversation"""
+    # The first call builds the chatbot (blocking I/O); keep it off the shared event loop
+    chatbot = await asyncio.to_thread(get_chatbot)
     if not chatbot:
-        return jsonify({"error": "Chatbot not initialized. Please check OpenAI API key."}), 500
+        return _chat_disabled()
+    busy = _overloaded(chatbot)
+    if busy:
+        return busy
     
     # Get request data
     data = request.get_json()
@@ -53,35 +126,25 @@ async def chat_message(conversation_id):
         return jsonify({"error": "Message is required"}), 400
     
     user_message = data['message']
-    print(f"Received message for conversation {conversation_id}: {user_message}")
-    # Check if conversation exists
-    if conversation_id not in conversation_states:
-        return jsonify({"error": "Conversation not found"}), 404
-    
     # Get conversation state
-    conversation = conversation_states[conversation_id]
+    conversation = conversation_states.get(conversation_id)
+    if conversation is None and await asyncio.to_thread(_wait_for_restore):
+        conversation = conversation_states.get(conversation_id)
+    if conversation is None:
+        return jsonify({"error": "Conversation not found"}), 404
     state = conversation["state"]
     
     try:
         # Process message
-        response, updated_state = await chatbot.chat(user_message, state)
+        response, updated_state = await chatbot.chat(user_message, state, conversation_id)
         
         # Update conversation state
-        conversation_states[conversation_id] = {
-            "state": updated_state,
-            "created_at": conversation["created_at"],
-            "last_activity": datetime.now()
-        }
-        print(f"Updated conversation state for {conversation_id}: {updated_state}")
+        _commit_turn(conversation_id, updated_state)
         return jsonify({
             "response": response,
             "conversation_id": conversation_id,
-            "user_info": {
-                "age": updated_state.get("user_age"),
-                "insurance_type": updated_state.get("insurance_type"),
-                "insured_for": updated_state.get("insured_for"),
-                "intent": updated_state.get("intent")
-            },
+            "user_info": _user_info(updated_state),
+            "history_cursor": _history_cursor(updated_state),
             "status": "success"
         })
         
@@ -91,23 +154,144 @@ async def chat_message(conversation_id):
             "status": "error"
         }), 500
 
+_STREAM_END = object()
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@chat_bp.route("/<conversation_id>/stream", methods=["POST"])
+def chat_stream(conversation_id):
+    """Send a message and stream the reply as Server-Sent Events.
+
+    Emits `token` events as the LLM generates the reply, a `node` event when
+    each graph node finishes and a final `done` event. The conversation is
+    only updated once the whole turn has completed.
+    """
+    chatbot = get_chatbot()
+    if not chatbot:
+        return _chat_disabled()
+    busy = _overloaded(chatbot)
+    if busy:
+        return busy
+
+    data = request.get_json()
+    if not data or 'message' not in data:
+        return jsonify({"error": "Message is required"}), 400
+
+    conversation = conversation_states.get(conversation_id)
+    if conversation is None and _wait_for_restore():
+        conversation = conversation_states.get(conversation_id)
+    if conversation is None:
+        return jsonify({"error": "Conversation not found"}), 404
+
+    user_message = data['message']
+    started = time.perf_counter()
+    events = queue.Queue()
+
+    async def pump():
+        async for event in chatbot.stream_chat(user_message, conversation["state"], conversation_id):
+            events.put(event)
+
+    future = submit_async(pump())
+    future.add_done_callback(lambda f: events.put(_STREAM_END))
+
+    def generate():
+        first_token_ms = None
+        try:
+            while True:
+                event = events.get()
+                if event is _STREAM_END:
+                    if not future.cancelled() and future.exception() is not None:
+                        yield _sse("error", {
+                            "error": f"Error processing message: {future.exception()}",
+                            "status": "error"
+                        })
+                    break
+                kind = event.pop("event")
+                if kind == "token" and first_token_ms is None:
+                    first_token_ms = (time.perf_counter() - started) * 1000
+                if kind == "done":
+                    updated_state = event["state"]
+                    _commit_turn(conversation_id, updated_state)
+                    yield _sse("done", {
+                        "response": event["response"],
+                        "conversation_id": conversation_id,
+                        "user_info": _user_info(updated_state),
+                        "history_cursor": _history_cursor(updated_state),
+                        "time_to_first_token_ms": first_token_ms,
+                        "status": "success"
+                    })
+                else:
+                    yield _sse(kind, event)
+        finally:
+            # Client disconnected mid-stream: stop the run and leave the conversation as it was
+            future.cancel()
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _json_with_messages(body, messages):
+    """jsonify `body` plus its messages; long message lists are streamed in chunks instead of built as one string"""
+    if len(messages) <= HISTORY_STREAM_THRESHOLD:
+        return jsonify(dict(body, messages=messages))
+
+    def generate():
+        yield json.dumps(body)[:-1] + ', "messages": ['
+        for start in range(0, len(messages), HISTORY_STREAM_CHUNK):
+            yield ("," if start else "") + ",".join(json.dumps(m) for m in messages[start:start + HISTORY_STREAM_CHUNK])
+        yield "]}\n"
+
+    return Response(generate(), mimetype="application/json")
+
 @chat_bp.route("/<conversation_id>/history", methods=["GET"])
 def get_history(conversation_id):
-    """Get conversation history"""
-    if conversation_id not in conversation_states:
+    """Get conversation history.
+
+    Every message carries a `seq` id. With `?since=<seq>` (and optionally
+    `limit`) only newer messages are returned, so a polling client passes
+    back `next_cursor` and pays for new messages only.
+    """
+    since = request.args.get("since", type=int)
+    limit = request.args.get("limit", type=int)
+    if ("since" in request.args and (since is None or since < 0)) or (
+        "limit" in request.args and (limit is None or not 0 < limit <= HISTORY_MAX_PAGE)
+    ):
+        return jsonify({"error": f"since must be a sequence id >= 0 and limit between 1 and {HISTORY_MAX_PAGE}"}), 400
+
+    if since is not None or limit is not None:
+        page = conversation_states.read_messages(conversation_id, since or 0, limit)
+        if page is None and _wait_for_restore():
+            page = conversation_states.read_messages(conversation_id, since or 0, limit)
+        if page is None:
+            return jsonify({"error": "Conversation not found"}), 404
+        messages = page.pop("messages")
+        page["last_activity"] = page["last_activity"].isoformat()
+        return _json_with_messages(dict(page, conversation_id=conversation_id, status="success"), messages)
+
+    conversation = conversation_states.get(conversation_id)
+    if conversation is None and _wait_for_restore():
+        conversation = conversation_states.get(conversation_id)
+    if conversation is None:
         return jsonify({"error": "Conversation not found"}), 404
     
-    conversation = conversation_states[conversation_id]
     state = conversation["state"]
+    page = history_page(state.get("messages", []), state.get("history_trimmed") or 0)
     
-    return jsonify({
+    return _json_with_messages({
         "conversation_id": conversation_id,
-        "messages": state.get("messages", []),
+        "summary": state.get("history_summary", ""),
         "user_info": {
             "age": state.get("user_age"),
             "insurance_type": state.get("insurance_type")
         },
+        "memory": history_stats(state),
+        "first_seq": page["first_seq"],
+        "last_seq": page["last_seq"],
+        "next_cursor": page["next_cursor"],
         "created_at": conversation["created_at"].isoformat(),
         "last_activity": conversation["last_activity"].isoformat(),
         "status": "success"
-    })
+    }, page["messages"])
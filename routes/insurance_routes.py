@@ -1,69 +1,190 @@
-from flask import Blueprint, request, jsonify
-from chatbot.insurance_db import INSURANCE_DATABASE
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from chatbot.catalog import current_catalog
+from chatbot.plan_search import SearchQueryError, parse_search_query
+from routes.catalog_responses import responses_for
+import json
 
 insurance_bp = Blueprint("insurance", __name__)
 
+# Rows are validated and bracket-resolved this many at a time while streaming a batch
+BATCH_CHUNK_SIZE = 1024
+# Largest page a search returns
+SEARCH_MAX_LIMIT = 100
+
 
 @insurance_bp.route("/types", methods=["GET"])
 def get_types():
     """Get available insurance types and age brackets"""
-    return jsonify({
-        "insurance_types": list(INSURANCE_DATABASE.keys()),
+    catalog = current_catalog()
+    # Serialized and compressed once per catalog version; polls with a matching ETag get a 304
+    return responses_for(catalog).get("types", lambda: {
+        "insurance_types": catalog.index.insurance_types(),
         "age_brackets": {
-            insurance_type: list(brackets.keys())
-            for insurance_type, brackets in INSURANCE_DATABASE.items()
+            insurance_type: catalog.index.brackets(insurance_type)
+            for insurance_type in catalog.index.insurance_types()
         },
+        "catalog_version": catalog.version,
         "status": "success"
-    })
+    }).respond(catalog.version)
+
+def _validate_quote_request(data, index):
+    """Return an error message for an invalid quote request, or None"""
+    if not isinstance(data, dict):
+        return "Each quote request must be a JSON object"
 
-@insurance_bp.route("/quote", methods=["POST"])
-def get_quote():
-    """Get insurance quote directly"""
-    data = request.get_json()
-    if not data:
-        return jsonify({"error": "Request body is required"}), 400
-    
     age = data.get('age')
     insurance_type = data.get('insurance_type')
-    
+
     if not age or not insurance_type:
-        return jsonify({"error": "Age and insurance_type are required"}), 400
-    
+        return "Age and insurance_type are required"
+
     if not isinstance(age, int) or age < 18 or age > 100:
-        return jsonify({"error": "Age must be between 18 and 100"}), 400
-    
-    if insurance_type not in INSURANCE_DATABASE:
-        return jsonify({"error": f"Invalid insurance type. Available: {list(INSURANCE_DATABASE.keys())}"}), 400
-    
-    # Get age bracket
-    if insurance_type == "health":
-        if 18 <= age <= 25: age_bracket = "18-25"
-        elif 26 <= age <= 35: age_bracket = "26-35"
-        elif 36 <= age <= 50: age_bracket = "36-50"
-        elif 51 <= age <= 65: age_bracket = "51-65"
-        else: age_bracket = None
-    elif insurance_type == "life":
-        if 18 <= age <= 30: age_bracket = "18-30"
-        elif 31 <= age <= 45: age_bracket = "31-45"
-        elif 46 <= age <= 60: age_bracket = "46-60"
-        else: age_bracket = None
-    elif insurance_type == "auto":
-        if 18 <= age <= 25: age_bracket = "18-25"
-        elif 26 <= age <= 40: age_bracket = "26-40"
-        elif 41 <= age <= 65: age_bracket = "41-65"
-        else: age_bracket = None
+        return "Age must be between 18 and 100"
+
+    if not isinstance(insurance_type, str):
+        return "insurance_type must be a string"
+
+    if insurance_type not in index:
+        return f"Invalid insurance type. Available: {index.insurance_types()}"
+
+    return None
+
+@insurance_bp.route("/quote", methods=["GET", "POST"])
+def get_quote():
+    """Get insurance quote directly (JSON body, or ?age=&insurance_type= on GET)"""
+    if request.method == "GET":
+        data = {"age": request.args.get("age", type=int), "insurance_type": request.args.get("insurance_type")}
     else:
-        age_bracket = None
-    
-    if not age_bracket or age_bracket not in INSURANCE_DATABASE[insurance_type]:
+        data = request.get_json()
+        if not data:
+            return jsonify({"error": "Request body is required"}), 400
+
+    # One snapshot for the whole request, even if the catalog reloads meanwhile
+    catalog = current_catalog()
+    error = _validate_quote_request(data, catalog.index)
+    if error:
+        return jsonify({"error": error}), 400
+
+    age = data['age']
+    insurance_type = data['insurance_type']
+
+    entries = catalog.index.lookup(insurance_type, age)
+    if not entries:
         return jsonify({"error": "No insurance options available for this age and type"}), 404
-    
-    quote = INSURANCE_DATABASE[insurance_type][age_bracket]
-    
-    return jsonify({
+
+    # The body only depends on (type, age) and the catalog version, so it is serialized once
+    return responses_for(catalog).get(("quote", insurance_type, age), lambda: {
         "age": age,
         "insurance_type": insurance_type,
-        "age_bracket": age_bracket,
-        "quote": quote,
+        "age_bracket": entries[0].age_bracket,
+        "quote": {entry.plan_tier: entry.plan for entry in entries},
+        "catalog_version": catalog.version,
+        "status": "success"
+    }).respond(catalog.version)
+
+@insurance_bp.route("/search", methods=["POST"])
+def search_plans():
+    """Filter and sort plans by attributes, e.g. cashless health plans with a maternity add-on under $200/month"""
+    catalog = current_catalog()
+    try:
+        query = parse_search_query(request.get_json(silent=True), catalog.search, SEARCH_MAX_LIMIT)
+    except SearchQueryError as e:
+        return jsonify({"error": str(e)}), 400
+
+    result = catalog.search.search(query, catalog.index)
+    return jsonify({
+        "total": result.total,
+        "results": [
+            {
+                "insurance_type": entry.insurance_type,
+                "plan_tier": entry.plan_tier,
+                "age_bracket": entry.age_bracket,
+                "plan": entry.plan
+            }
+            for entry in result.entries
+        ],
+        "catalog_version": catalog.version,
         "status": "success"
-    })
\ No newline at end of file
+    })
+
+def _read_batch_rows():
+    """Yield quote rows from a JSON array body or, for NDJSON, line by line as the body streams in"""
+    if request.mimetype in ("application/x-ndjson", "application/jsonl"):
+        for line in request.stream:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                yield ValueError(f"Invalid JSON: {e}")
+    else:
+        yield from request.get_json()
+
+def _quote_chunk(rows, start_index, quote_cache, age_index):
+    """Resolve one chunk of rows into NDJSON lines, vectorizing the bracket lookup per insurance type"""
+    import numpy as np
+
+    lines = [None] * len(rows)
+    rows_by_type = {}
+    for offset, row in enumerate(rows):
+        error = str(row) if isinstance(row, ValueError) else _validate_quote_request(row, age_index)
+        if error:
+            lines[offset] = json.dumps({"index": start_index + offset, "error": error, "status": "error"})
+        else:
+            rows_by_type.setdefault(row["insurance_type"], []).append(offset)
+
+    for insurance_type, offsets in rows_by_type.items():
+        ages = np.fromiter((rows[offset]["age"] for offset in offsets), dtype=np.int64, count=len(offsets))
+        positions = age_index.segment_positions(insurance_type, ages)
+        for offset, age, position in zip(offsets, ages.tolist(), positions.tolist()):
+            key = (insurance_type, position)
+            if key not in quote_cache:
+                entries = age_index.entries_at(insurance_type, position)
+                # The serialized quote is shared by every row landing in the same segment
+                quote_cache[key] = (
+                    json.dumps(entries[0].age_bracket),
+                    json.dumps({entry.plan_tier: entry.plan for entry in entries}),
+                ) if entries else None
+            cached = quote_cache[key]
+            if cached is None:
+                lines[offset] = json.dumps({
+                    "index": start_index + offset,
+                    "error": "No insurance options available for this age and type",
+                    "status": "error"
+                })
+            else:
+                lines[offset] = (
+                    f'{{"index": {start_index + offset}, "age": {age}, '
+                    f'"insurance_type": {json.dumps(insurance_type)}, "age_bracket": {cached[0]}, '
+                    f'"quote": {cached[1]}, "status": "success"}}'
+                )
+    return lines
+
+@insurance_bp.route("/quote/batch", methods=["POST"])
+def get_quote_batch():
+    """Quote many (age, insurance_type) rows in one request, streaming one NDJSON line per row"""
+    if request.mimetype not in ("application/x-ndjson", "application/jsonl"):
+        data = request.get_json(silent=True)
+        if not isinstance(data, list):
+            return jsonify({"error": "Request body must be a JSON array or NDJSON"}), 400
+
+    # Every row of the batch is quoted from the snapshot current when the request arrived
+    catalog = current_catalog()
+
+    def generate():
+        quote_cache = {}
+        chunk = []
+        index = 0
+        for row in _read_batch_rows():
+            chunk.append(row)
+            if len(chunk) == BATCH_CHUNK_SIZE:
+                yield "\n".join(_quote_chunk(chunk, index, quote_cache, catalog.index)) + "\n"
+                index += len(chunk)
+                chunk = []
+        if chunk:
+            yield "\n".join(_quote_chunk(chunk, index, quote_cache, catalog.index)) + "\n"
+
+    response = Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+    response.headers["X-Catalog-Version"] = catalog.version
+    return response
@@ -0,0 +1,23 @@
+import time
+from flask import g, request
+from chatbot.metrics import METRICS
+
+def register_request_metrics(app):
+    """Record every request's latency, labelled by route pattern rather than raw path"""
+    @app.before_request
+    def start_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def record_latency(response):
+        started = g.pop("request_started", None)
+        if started is not None:
+            # Streaming responses are timed up to the first byte; the body is produced after this hook
+            METRICS.observe(
+                "http_request_duration_seconds",
+                time.perf_counter() - started,
+                route=request.url_rule.rule if request.url_rule else "unmatched",
+                method=request.method,
+                status=str(response.status_code)
+            )
+        return response
@@ -0,0 +1,7 @@
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+# Tests build the app and chatbot without a background warm-up thread
+os.environ.setdefault("CHATBOT_WARM_UP", "false")
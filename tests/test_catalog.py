@@ -0,0 +1,68 @@
+import json
+import time
+
+import pytest
+
+from chatbot.catalog import CatalogError, CatalogStore, read_catalog_file, validate_catalog, write_catalog_file
+from chatbot.insurance_db import INSURANCE_DATABASE
+
+
+def write_rows(path, rows):
+    path.write_text("".join(json.dumps(row) + "\n" for row in rows), encoding="utf-8")
+
+
+def good_row(**overrides):
+    return dict({"insurance_type": "health", "plan_tier": "basic", "age_bracket": "18-30",
+                 "plan": {"premium": "$100/month"}}, **overrides)
+
+
+@pytest.mark.parametrize("bad", [
+    {"insurance_type": 5},
+    {"insurance_type": ["health"]},
+    {"plan_tier": 1},
+    {"age_bracket": {"low": 18}},
+])
+def test_jsonl_non_string_keys_are_catalog_errors(tmp_path, bad):
+    path = tmp_path / "catalog.jsonl"
+    write_rows(path, [good_row(), good_row(**dict({"age_bracket": "31-40"}, **bad))])
+    with pytest.raises(CatalogError):
+        read_catalog_file(str(path))
+
+
+def test_invalid_utf8_json_is_a_catalog_error(tmp_path):
+    path = tmp_path / "catalog.json"
+    path.write_bytes(b'{"health": "\xff\xfe"}')
+    with pytest.raises(CatalogError):
+        read_catalog_file(str(path))
+
+
+def test_validate_rejects_non_string_types_and_tiers():
+    with pytest.raises(CatalogError):
+        validate_catalog({5: {"basic": {"18-30": {"premium": "$1"}}}})
+    with pytest.raises(CatalogError):
+        validate_catalog({"health": {7: {"18-30": {"premium": "$1"}}}})
+
+
+def test_watcher_survives_a_bad_file_and_picks_up_the_fix(tmp_path):
+    path = tmp_path / "catalog.jsonl"
+    write_catalog_file(INSURANCE_DATABASE, str(path))
+    store = CatalogStore(str(path))
+    first = store.current().version
+    store.start_watcher(0.02)
+    try:
+        write_rows(path, [good_row(insurance_type=5)])
+        deadline = time.time() + 5
+        while store.last_error is None and time.time() < deadline:
+            time.sleep(0.02)
+        assert store.last_error is not None
+        assert store._watcher.is_alive()
+        assert store.current().version == first
+
+        write_rows(path, [good_row()])
+        deadline = time.time() + 5
+        while store.current().version == first and time.time() < deadline:
+            time.sleep(0.02)
+        assert store.current().version != first
+        assert store.last_error is None
+    finally:
+        store.stop_watcher()
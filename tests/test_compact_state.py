@@ -0,0 +1,22 @@
+import copy
+
+from chatbot.catalog import current_catalog
+from chatbot.compact_state import pack_state
+from test_conversation_snapshot import make_state
+
+
+def test_unpacked_plan_docs_do_not_share_the_catalog_plan():
+    entry = current_catalog().index.lookup("health", 30)[0]
+    original = copy.deepcopy(entry.plan)
+    state = make_state("hi")
+    state["relevant_docs"] = [{"insurance_type": entry.insurance_type, "plan_tier": entry.plan_tier,
+                               "age_bracket": entry.age_bracket, "data": entry.plan}]
+    compact = pack_state(state)
+    assert compact.relevant_docs[0] is entry  # still stored as a reference
+
+    data = compact.to_state()["relevant_docs"][0]["data"]
+    data["premium"] = "free"
+    data["add_ons"].append("Pony rides")
+
+    assert entry.plan == original
+    assert compact.to_state()["relevant_docs"][0]["data"] == original
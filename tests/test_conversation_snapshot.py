@@ -0,0 +1,95 @@
+import os
+
+import pytest
+
+import chatbot.conversation_store as conversation_store
+from chatbot.conversation_snapshot import ConversationSnapshotter, read_snapshot
+from chatbot.conversation_store import InMemoryConversationStore, serialize_state
+
+
+def make_state(text="hello"):
+    return {
+        "messages": [{"role": "user", "content": text}], "user_age": 30, "insurance_type": "health",
+        "user_query": text, "relevant_docs": [], "missing_info": [], "conversation_stage": "start",
+        "last_response": "", "insured_for": "self", "intent": None, "greeting_detected": False,
+        "history_summary": "", "history_overflow": [], "history_trimmed": 0,
+    }
+
+
+def make_store():
+    return InMemoryConversationStore(max_size=1000, ttl_seconds=3600)
+
+
+def test_restore_round_trip(tmp_path):
+    path = str(tmp_path / "conversations.snap")
+    store = make_store()
+    snapshotter = ConversationSnapshotter(store, path)
+    snapshotter.restore()
+    store.create("c1", make_state("first"))
+    store.create("c2", make_state("second"))
+    store.delete("c2")
+    assert snapshotter.snapshot() == 2  # one put, one delete
+
+    restored = make_store()
+    assert ConversationSnapshotter(restored, path).restore() == 1
+    assert restored.get("c1")["state"]["messages"][0]["content"] == "first"
+    assert restored.get("c2") is None
+
+
+def test_torn_tail_is_truncated(tmp_path):
+    path = str(tmp_path / "conversations.snap")
+    store = make_store()
+    snapshotter = ConversationSnapshotter(store, path)
+    snapshotter.restore()
+    store.create("c1", make_state())
+    snapshotter.snapshot()
+    valid_size = os.path.getsize(path)
+    with open(path, "ab") as handle:
+        handle.write(b"\x00\x00\x01\x00partial")
+
+    restored = make_store()
+    assert ConversationSnapshotter(restored, path).restore() == 1
+    assert os.path.getsize(path) == valid_size
+    assert restored.get("c1") is not None
+
+
+def test_compaction_rewrites_live_records_only(tmp_path, monkeypatch):
+    monkeypatch.setattr("chatbot.conversation_snapshot._COMPACT_MIN_RECORDS", 5)
+    path = str(tmp_path / "conversations.snap")
+    store = make_store()
+    snapshotter = ConversationSnapshotter(store, path)
+    snapshotter.restore()
+    store.create("c1", make_state())
+    for _ in range(6):
+        store.touch("c1")
+        snapshotter.snapshot()
+    assert snapshotter.records_in_file == 6
+    snapshotter.snapshot()
+    assert snapshotter.rewrites == 1
+    records, count, _ = read_snapshot(path)
+    assert count == 1 and list(records) == ["c1"]
+
+
+def test_bad_magic_is_rejected(tmp_path):
+    path = tmp_path / "conversations.snap"
+    path.write_bytes(b"NOTASNAP!!" + b"\x00" * 32)
+    with pytest.raises(ValueError):
+        read_snapshot(str(path))
+
+
+def test_lazy_decode_does_not_undo_concurrent_update(monkeypatch):
+    store = make_store()
+    store.restore([("c1", serialize_state(make_state()), 0.0, 2e9)])
+    original = conversation_store.deserialize_state
+    raced = []
+
+    def deserialize_during_update(blob):
+        # The first decode (from get) is overtaken by an update before it publishes
+        if not raced:
+            raced.append(True)
+            store.update("c1", lambda state: state.update(history_summary="UPDATED"))
+        return original(blob)
+
+    monkeypatch.setattr(conversation_store, "deserialize_state", deserialize_during_update)
+    assert store.get("c1")["state"]["history_summary"] == "UPDATED"
+    assert store.get("c1")["state"]["history_summary"] == "UPDATED"
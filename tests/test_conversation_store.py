@@ -0,0 +1,44 @@
+from datetime import timedelta
+
+import pytest
+
+from chatbot.conversation_store import ConversationStore, InMemoryConversationStore, SQLiteConversationStore
+from test_conversation_snapshot import make_state
+
+
+def test_store_interface_is_abstract():
+    with pytest.raises(TypeError):
+        ConversationStore(max_size=10, ttl_seconds=60)
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_expired_conversations_are_hidden_before_the_sweep(tmp_path, backend):
+    if backend == "memory":
+        store = InMemoryConversationStore(max_size=10, ttl_seconds=60)
+    else:
+        store = SQLiteConversationStore(str(tmp_path / "conversations.db"), max_size=10, ttl_seconds=60)
+    store.create("idle", make_state("hello"))
+    store.create("other", make_state("hello"))
+    assert store.get("idle") is not None
+
+    store.ttl = timedelta(seconds=-1)  # everything is now idle past its TTL
+    assert store.get("idle") is None
+    assert store.read_messages("idle", 0, None) is None
+    assert "idle" not in store
+    assert len(store) == 2  # still stored until the sweeper runs
+    assert store.expire() == 2
+
+
+@pytest.mark.parametrize("compact", [True, False])
+def test_uncommitted_turn_is_not_visible_to_history_reads(compact):
+    store = InMemoryConversationStore(max_size=10, ttl_seconds=60, compact=compact)
+    store.create("c", make_state("hello"))
+    before = len(store.read_messages("c", 0, None)["messages"])
+
+    state = store.get("c")["state"]
+    state["messages"].append({"role": "user", "content": "in progress"})
+    assert len(store.read_messages("c", 0, None)["messages"]) == before
+
+    store.put("c", state)
+    state["messages"].append({"role": "assistant", "content": "after put"})
+    assert len(store.read_messages("c", 0, None)["messages"]) == before + 1
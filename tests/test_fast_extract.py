@@ -0,0 +1,63 @@
+import pytest
+
+from chatbot.fast_extract import FastPathExtractor
+from config import Config
+
+
+def confident(message):
+    extraction = FastPathExtractor().extract(message)
+    if extraction is None or extraction.confidence < Config.FAST_PATH_MIN_CONFIDENCE:
+        return None
+    return extraction.fields
+
+
+@pytest.mark.parametrize("message", ["I want option 2", "plan 1 please", "good plans for me", "quote 3"])
+def test_choices_and_adjectives_go_to_the_llm(message):
+    assert confident(message) is None
+
+
+@pytest.mark.parametrize("message, age, insured_for", [
+    ("I'm 30", 30, "self"),
+    ("health insurance for 45", 45, None),
+    ("my son is 2", 2, "child"),
+    ("I am 5 years old", 5, "self"),
+])
+def test_ages_need_a_cue_or_a_plausible_value(message, age, insured_for):
+    fields = confident(message)
+    assert fields["age"] == age
+    assert fields["insured_for"] == insured_for
+
+
+def test_bare_small_number_is_not_an_age():
+    assert confident("health 7") is None
+
+
+@pytest.mark.parametrize("message", ["good morning", "hi there", "hello"])
+def test_greetings(message):
+    assert confident(message)["intent"] == "greet"
+
+
+@pytest.mark.parametrize("message", [
+    "I don't need health insurance for my wife",
+    "I dont want car insurance",
+    "not for my wife",
+    "health insurance without maternity",
+    "no life cover please",
+])
+def test_negated_messages_go_to_the_llm(message):
+    assert FastPathExtractor().extract(message) is None
+
+
+def test_term_alone_is_not_life_insurance():
+    assert confident("what is the term") is None
+    assert confident("term life for me")["insurance_type"] == "life"
+    assert confident("I need term insurance")["insurance_type"] == "life"
+
+
+def test_a_count_before_a_relation_is_not_an_age():
+    assert confident("my 2 kids need health insurance") is None
+    assert confident("my son is 2")["age"] == 2
+    assert confident("my daughter aged 7 needs health cover")["age"] == 7
+    assert confident("my son 4 years old health")["age"] == 4
+    # A relation word alone no longer makes a small number an age
+    assert confident("health insurance for my son 4") is None
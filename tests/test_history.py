@@ -0,0 +1,35 @@
+from chatbot.history import history_page
+
+
+def messages(count):
+    return [{"role": "user" if i % 2 == 0 else "assistant", "content": f"m{i}"} for i in range(count)]
+
+
+def test_pages_walk_the_history_with_stable_sequence_ids():
+    window = messages(5)
+    first = history_page(window, trimmed=0, since=0, limit=2)
+    assert [m["seq"] for m in first["messages"]] == [1, 2]
+    assert first["next_cursor"] == 2 and first["has_more"]
+
+    second = history_page(window, trimmed=0, since=first["next_cursor"], limit=10)
+    assert [m["seq"] for m in second["messages"]] == [3, 4, 5]
+    assert second["next_cursor"] == second["last_seq"] == 5 and not second["has_more"]
+    assert "seq" not in window[0]  # the page is a copy
+
+
+def test_trimmed_messages_keep_their_ids_and_flag_truncation():
+    page = history_page(messages(3), trimmed=4, since=2)
+    assert [m["seq"] for m in page["messages"]] == [5, 6, 7]
+    assert page["first_seq"] == 5 and page["truncated"]
+
+    caught_up = history_page(messages(3), trimmed=4, since=6)
+    assert [m["content"] for m in caught_up["messages"]] == ["m2"]
+    assert not caught_up["truncated"]
+
+
+def test_cursor_past_the_end_is_pulled_back():
+    page = history_page(messages(2), trimmed=0, since=50)
+    assert page["messages"] == [] and page["next_cursor"] == 2 and not page["has_more"]
+
+    empty = history_page([], trimmed=0)
+    assert empty["first_seq"] is None and empty["last_seq"] == 0
@@ -0,0 +1,20 @@
+import json
+
+from main import app
+
+
+def test_quote_batch_reports_non_string_types_per_row():
+    rows = [{"age": 30, "insurance_type": "health"}, {"age": 30, "insurance_type": ["health"]},
+            {"age": 30, "insurance_type": {"type": "life"}}, {"age": 40, "insurance_type": "life"}]
+    response = app.test_client().post("/api/insurance/quote/batch", json=rows)
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines() if line.strip()]
+    by_index = {line["index"]: line for line in lines if "index" in line}
+    assert by_index[0]["status"] == "success"
+    assert by_index[1]["status"] == by_index[2]["status"] == "error"
+    assert by_index[3]["status"] == "success"
+
+
+def test_quote_rejects_non_string_type():
+    response = app.test_client().post("/api/insurance/quote", json={"age": 30, "insurance_type": ["health"]})
+    assert response.status_code == 400
@@ -0,0 +1,33 @@
+from chatbot.fast_extract import FastPathExtractor
+from chatbot.intent_classifier import IntentClassifier
+
+MESSAGES = {
+    "greet": ["hi", "hello", "good morning", "hey there"],
+    "ask_suggestion": ["which plan would you recommend", "what do you suggest", "help me decide between these"],
+    "get_insurance_info": ["I need health insurance", "I'm 30 and want life cover", "car insurance for my wife",
+                           "health insurance for my son, 9 years old, he plays cricket at school"],
+    "other": ["tell me a joke", "what's the weather like", "who won the match"],
+}
+
+
+def trained():
+    messages = [m for ms in MESSAGES.values() for m in ms] * 20
+    intents = [intent for intent, ms in MESSAGES.items() for _ in ms] * 20
+    return IntentClassifier(list(MESSAGES), n_features=1 << 12).fit(messages, intents, epochs=10)
+
+
+def test_rule_fields_used_only_when_the_rules_are_confident():
+    classifier, rules = trained(), FastPathExtractor()
+    confident = classifier.extract("I'm 30 and want life cover", rules, 0.5, 0.8)
+    assert confident == {"age": 30, "insurance_type": "life", "insured_for": "self", "intent": "get_insurance_info"}
+
+    # The rules only understand part of this one, so its fields are the LLM's job
+    message = "health insurance for my son, 9 years old, he plays cricket at school"
+    assert rules.extract(message).confidence < 0.8
+    assert classifier.predict(message).intent == "get_insurance_info"
+    assert classifier.extract(message, rules, 0.5, 0.8) is None
+
+
+def test_intent_only_when_the_rules_are_unsure_and_no_fields_are_needed():
+    fields = trained().extract("tell me a joke", FastPathExtractor(), 0.5, 0.8)
+    assert fields == {"age": None, "insurance_type": None, "insured_for": None, "intent": "other"}
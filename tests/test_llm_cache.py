@@ -0,0 +1,83 @@
+import asyncio
+import sqlite3
+import threading
+import time
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from chatbot.llm_cache import CachedChatModel, LLMResponseCache, cache_key
+
+
+def disk_rows(path):
+    with sqlite3.connect(path) as db:
+        return db.execute("SELECT key FROM llm_cache ORDER BY stored_at").fetchall()
+
+
+def test_disk_tier_is_capped_and_purged_every_n_puts(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = LLMResponseCache(max_entries=100, ttl_seconds=3600, disk_path=path, max_disk_entries=5, purge_every=4)
+    for i in range(7):
+        cache.put(f"k{i}", f"v{i}")
+    # Only purged on every 4th write, so the cap is overshot until the next purge
+    assert len(disk_rows(path)) == 7
+    cache.put("k7", "v7")
+    assert [key for (key,) in disk_rows(path)] == ["k3", "k4", "k5", "k6", "k7"]
+    assert cache.stats()["disk_purged"] == 3
+
+
+def test_expired_rows_are_purged_and_the_index_exists(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = LLMResponseCache(max_entries=100, ttl_seconds=0.05, disk_path=path, purge_every=2)
+    cache.put("old", "x")
+    time.sleep(0.1)
+    cache.put("new", "y")
+    assert [key for (key,) in disk_rows(path)] == ["new"]
+    with sqlite3.connect(path) as db:
+        plan = db.execute("EXPLAIN QUERY PLAN DELETE FROM llm_cache WHERE stored_at < 0").fetchall()
+    assert any("llm_cache_stored_at" in str(row) for row in plan)
+
+
+class _RecordingConnection:
+    """Delegates to the real connection and notes which threads ran SQL"""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.threads = set()
+
+    def execute(self, *args):
+        self.threads.add(threading.get_ident())
+        return self.connection.execute(*args)
+
+
+class _EchoModel:
+    def __init__(self):
+        self.calls = 0
+
+    async def ainvoke(self, messages, **kwargs):
+        self.calls += 1
+        return AIMessage(content="answer")
+
+
+def test_cached_model_keeps_sqlite_off_the_event_loop(tmp_path):
+    cache = LLMResponseCache(max_entries=100, ttl_seconds=3600, disk_path=str(tmp_path / "cache.db"))
+    cache._disk = connection = _RecordingConnection(cache._disk)
+    model = _EchoModel()
+    cached = CachedChatModel(model, cache, "fake")
+    prompt = [HumanMessage(content="hello")]
+
+    async def scenario():
+        loop_thread = threading.get_ident()
+        first = await cached.ainvoke(prompt)
+        second = await cached.ainvoke(prompt)
+        return loop_thread, first, second
+
+    loop_thread, first, second = asyncio.run(scenario())
+    assert first.content == second.content == "answer"
+    assert second.response_metadata == {"cache": "hit"}
+    assert model.calls == 1
+    assert connection.threads and loop_thread not in connection.threads
+
+    # A fresh memory tier still finds the answer on disk
+    cache._entries.clear()
+    assert cache.get(cache_key(prompt, "fake")) == "answer"
+    assert cache.stats()["disk_hits"] == 1
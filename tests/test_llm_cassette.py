@@ -0,0 +1,16 @@
+from chatbot.chatbot_api import InsuranceChatbotAPI
+from config import Config
+
+
+def test_recording_bypasses_the_response_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "LLM_CACHE_ENABLED", True)
+    monkeypatch.setattr(Config, "LLM_CASSETTE_PATH", str(tmp_path / "cassette.jsonl"))
+
+    monkeypatch.setattr(Config, "LLM_CASSETTE_MODE", "record")
+    recording = InsuranceChatbotAPI(llm_api_key="fake")
+    assert recording.llm_cache is None
+    assert recording.cassette.mode == "record"
+
+    (tmp_path / "cassette.jsonl").write_text("")
+    monkeypatch.setattr(Config, "LLM_CASSETTE_MODE", "replay")
+    assert InsuranceChatbotAPI(llm_api_key="fake").llm_cache is not None
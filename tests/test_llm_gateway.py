@@ -0,0 +1,128 @@
+import asyncio
+import time
+
+import groq
+import pytest
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_groq import ChatGroq
+
+from benchmarks.fake_llm_server import FakeLLMBehavior, start_fake_llm_server
+from chatbot.llm_gateway import CircuitBreaker, LLMGateway, current_node
+from chatbot.metrics import METRICS
+
+PROMPT = [SystemMessage(content="You are a helpful insurance assistant."), HumanMessage(content="Tell me about plans")]
+
+
+@pytest.fixture(scope="module")
+def server():
+    server = start_fake_llm_server(FakeLLMBehavior())
+    yield server
+    server.shutdown()
+
+
+@pytest.fixture
+def behavior(server):
+    server.behavior.__init__(latency=0.01)
+    return server.behavior
+
+
+def make_gateway(server, **overrides):
+    options = dict(max_concurrency=4, max_queue=8, default_timeout=5.0, max_retries=2, retry_base_delay=0.01,
+                   breaker=CircuitBreaker(failure_threshold=100, reset_seconds=60))
+    options.update(overrides)
+    llm = ChatGroq(api_key="fake", model="fake", temperature=0, max_retries=0,
+                   base_url=f"http://127.0.0.1:{server.server_address[1]}")
+    return LLMGateway(llm, **options)
+
+
+async def outcome(gateway, node=None):
+    token = current_node.set(node)
+    try:
+        await gateway.ainvoke(PROMPT)
+        return "ok"
+    except Exception as e:
+        return type(e).__name__
+    finally:
+        current_node.reset(token)
+
+
+def test_full_queue_fails_fast_with_overloaded(server, behavior):
+    behavior.latency = 0.3
+    gateway = make_gateway(server, max_concurrency=1, max_queue=1)
+
+    async def burst():
+        return await asyncio.gather(*(outcome(gateway) for _ in range(4)))
+
+    outcomes = asyncio.run(burst())
+    assert sorted(outcomes) == ["LLMOverloaded", "LLMOverloaded", "ok", "ok"]
+    assert gateway.stats()["rejected_overloaded"] == 2
+    assert behavior.requests == 2
+
+
+def test_each_node_gets_its_own_timeout_budget(server, behavior):
+    behavior.hang_rate, behavior.hang_seconds = 1.0, 2.0
+    gateway = make_gateway(server, node_timeouts={"acknowledge_greeting": 0.2})
+
+    started = time.perf_counter()
+    assert asyncio.run(outcome(gateway, "acknowledge_greeting")) == "TimeoutError"
+    assert time.perf_counter() - started < 1.0
+    assert gateway.stats()["timeouts"] == 1
+
+
+def test_transient_errors_are_retried_then_given_up(server, behavior):
+    behavior.error_rate = 1.0
+    gateway = make_gateway(server, max_retries=2)
+    with pytest.raises(groq.InternalServerError):
+        asyncio.run(gateway.ainvoke(PROMPT))
+    assert behavior.requests == 3
+    assert gateway.stats()["retries"] == 2
+
+    behavior.__init__(latency=0.01, error_rate=0.5, seed=3)
+    gateway = make_gateway(server, max_retries=6)
+
+    async def sequential():
+        return [await outcome(gateway) for _ in range(10)]
+
+    assert asyncio.run(sequential()) == ["ok"] * 10
+    assert gateway.stats()["retries"] > 0
+
+
+def test_open_breaker_rejects_without_calling_upstream_then_probes(server, behavior):
+    behavior.error_rate = 1.0
+    gateway = make_gateway(server, max_retries=0, breaker=CircuitBreaker(failure_threshold=2, reset_seconds=0.3))
+
+    async def scenario():
+        first = [await outcome(gateway) for _ in range(3)]
+        requests_while_open = behavior.requests
+        await asyncio.sleep(0.35)
+        # Half-open: a failed probe opens the breaker again
+        failed_probe = await outcome(gateway)
+        reopened = gateway.breaker.state
+        await asyncio.sleep(0.35)
+        behavior.error_rate, behavior.latency = 0.0, 0.2
+        # Only one probe goes through while half-open; it closes the breaker
+        probes = await asyncio.gather(*(outcome(gateway) for _ in range(3)))
+        return first, requests_while_open, failed_probe, reopened, probes
+
+    first, requests_while_open, failed_probe, reopened, probes = asyncio.run(scenario())
+    assert first == ["InternalServerError", "InternalServerError", "CircuitOpen"]
+    assert requests_while_open == 2
+    assert failed_probe == "InternalServerError" and reopened == "open"
+    assert sorted(probes) == ["CircuitOpen", "CircuitOpen", "ok"]
+    assert gateway.breaker.state == "closed"
+
+
+def test_open_breaker_makes_the_node_answer_with_its_fallback(server, behavior, monkeypatch):
+    monkeypatch.setenv("GROQ_API_BASE", f"http://127.0.0.1:{server.server_address[1]}")
+    from chatbot.chatbot_api import InsuranceChatbotAPI
+
+    chatbot = InsuranceChatbotAPI(llm_api_key="fake")
+    for _ in range(chatbot.llm_gateway.breaker.failure_threshold):
+        chatbot.llm_gateway.breaker.record_failure()
+
+    response, _ = asyncio.run(chatbot.chat("hello"))
+    # The greeting still needs an age and type, so the follow-up node answers with its canned question
+    assert "Could you tell me your age" in response
+    assert 'chatbot_fallbacks_total{node="ask_followup_with_llm"}' in METRICS.render_prometheus()
+    assert chatbot.llm_gateway.stats()["rejected_circuit_open"] >= 1
+    assert behavior.requests == 0
@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+
+from chatbot.llm_scheduler import PrioritySlots
+
+
+async def hold_and_queue(slots, requests):
+    """Take the only slot, queue `requests` (priority, conversation, name) and record the order they are served"""
+    await slots.acquire(0, "holder")
+    served = []
+
+    async def call(priority, conversation, name):
+        await slots.acquire(priority, conversation)
+        served.append(name)
+        slots.release(conversation, 0.01)
+
+    tasks = [asyncio.create_task(call(*request)) for request in requests]
+    await asyncio.sleep(0)
+    slots.release("holder", 0.01)
+    await asyncio.gather(*tasks)
+    return served
+
+
+def test_lower_priority_class_is_served_first():
+    served = asyncio.run(hold_and_queue(PrioritySlots(1, priority_step=1.0),
+                                        [(2, "a", "slow"), (1, "b", "normal"), (0, "c", "cheap")]))
+    assert served == ["cheap", "normal", "slow"]
+
+
+def test_busy_conversation_does_not_crowd_out_others():
+    served = asyncio.run(hold_and_queue(PrioritySlots(1, priority_step=1.0),
+                                        [(1, "busy", "busy-1"), (1, "busy", "busy-2"), (1, "busy", "busy-3"),
+                                         (1, "quiet", "quiet-1")]))
+    assert served.index("quiet-1") < served.index("busy-2")
+
+
+def test_cancelled_waiter_gives_its_slot_back():
+    async def scenario():
+        slots = PrioritySlots(1, priority_step=1.0)
+        await slots.acquire(0, "a")
+        waiter = asyncio.create_task(slots.acquire(0, "b"))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        slots.release("a", 0.5)
+        return slots
+
+    slots = asyncio.run(scenario())
+    assert slots.free == 1
+    assert slots.stats()["conversations"] == 0
+    assert slots.granted_by_priority == {0: 1}
+    assert 0.5 < slots.hold_seconds < 1.0
@@ -0,0 +1,25 @@
+import pytest
+
+from chatbot.catalog import current_catalog
+from chatbot.plan_search import filters_from_message
+
+
+def filters(message):
+    return filters_from_message(message, current_catalog().search)
+
+
+def test_requested_terms_become_filters():
+    assert filters("cashless with maternity under $200") == {
+        "flags": {"cashless": True}, "add_ons": ["maternity"], "premium_max": 200.0,
+    }
+
+
+@pytest.mark.parametrize("message", ["I don't want maternity cover", "no maternity please", "without maternity",
+                                     "not interested in cashless"])
+def test_negated_terms_are_not_requirements(message):
+    assert filters(message) == {}
+
+
+def test_negation_stops_at_but_and_only_covers_its_own_terms():
+    assert filters("no maternity but cashless please") == {"flags": {"cashless": True}}
+    assert filters("maternity cover please, not dental") == {"flags": {}, "add_ons": ["maternity cover"]}